@@ -0,0 +1,130 @@
+"""
+Benchmarks reading the header of GGUF files with paka.gguf.
+
+Writes a synthetic GGUF file with a tokenizer the size of a large vocabulary
+and the tensor infos of a llama model, then reports the time and the peak
+Python memory of parsing its header. Touching every array value shows the cost
+that an eager parser pays on every read.
+
+    python -m benchmarks.gguf_header --tokens 256000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from paka.gguf import (
+    GGUFHeader,
+    GGUFValueType,
+    TensorInfo,
+    encode_gguf,
+    read_gguf,
+    read_gguf_range,
+)
+
+
+def synthetic_header(n_tokens: int, n_layers: int) -> bytes:
+    tokens = [f"<token_{i}>" for i in range(n_tokens)]
+    metadata: Dict[str, Tuple[int, Any]] = {
+        "general.architecture": (GGUFValueType.STRING, "llama"),
+        "llama.block_count": (GGUFValueType.UINT32, n_layers),
+        "llama.context_length": (GGUFValueType.UINT32, 8192),
+        "llama.embedding_length": (GGUFValueType.UINT32, 4096),
+        "tokenizer.ggml.model": (GGUFValueType.STRING, "gpt2"),
+        "tokenizer.ggml.tokens": (GGUFValueType.ARRAY, (GGUFValueType.STRING, tokens)),
+        "tokenizer.ggml.scores": (
+            GGUFValueType.ARRAY,
+            (GGUFValueType.FLOAT32, [float(-i) for i in range(n_tokens)]),
+        ),
+        "tokenizer.ggml.token_type": (
+            GGUFValueType.ARRAY,
+            (GGUFValueType.INT32, [1] * n_tokens),
+        ),
+        "tokenizer.ggml.merges": (
+            GGUFValueType.ARRAY,
+            (GGUFValueType.STRING, [f"a{i} b{i}" for i in range(n_tokens)]),
+        ),
+    }
+    tensor_infos: List[TensorInfo] = []
+    for layer in range(n_layers):
+        for name in ("attn_q", "attn_k", "attn_v", "attn_output", "ffn_up", "ffn_down"):
+            tensor_infos.append(
+                TensorInfo(
+                    name=f"blk.{layer}.{name}.weight",
+                    shape=[4096, 4096],
+                    dtype=2,
+                    offset=len(tensor_infos) * 4096 * 4096,
+                )
+            )
+    return encode_gguf(metadata, tensor_infos)
+
+
+def measure(func: Callable[[], Any], repeats: int) -> Tuple[float, int]:
+    """
+    Returns the median seconds and the peak traced memory of calling `func`.
+    """
+    seconds = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(seconds), peak
+
+
+def touch_arrays(header: GGUFHeader) -> None:
+    for value in header.metadata.values():
+        if hasattr(value, "tolist"):
+            value.tolist()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=256000)
+    parser.add_argument("--layers", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "synthetic.gguf")
+        header = synthetic_header(args.tokens, args.layers)
+        with open(path, "wb") as f:
+            f.write(header)
+            # Stand-in tensor data, so that the header is a small part of the file
+            f.truncate(len(header) + 1024**3)
+        print(f"Header: {len(header) / 1e6:.1f} MB, {args.tokens} tokens")
+
+        cases = {
+            "parse header": lambda: read_gguf(path),
+            "parse + touch arrays": lambda: touch_arrays(read_gguf(path)),
+        }
+        for name, func in cases.items():
+            seconds, peak = measure(func, args.repeats)
+            print(f"{name:<22} {seconds * 1000:8.1f} ms {peak / 1e6:8.1f} MB peak")
+
+        # Ranged reads, as from the model store or the HuggingFace Hub
+        reads = []
+
+        def read_range(start: int, end: int) -> bytes:
+            reads.append(end - start)
+            with open(path, "rb") as f:
+                return os.pread(f.fileno(), end - start, start)
+
+        header_info = read_gguf_range(read_range)
+        print(
+            f"ranged header read     {header_info.bytes_read / 1e6:8.1f} MB in {len(reads)} reads"
+        )
+
+
+if __name__ == "__main__":
+    main()
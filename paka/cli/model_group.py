@@ -14,7 +14,12 @@ from paka.cli.utils import (
     load_kubeconfig,
     read_pulumi_stack,
 )
-from paka.k8s.model_group.service import MODEL_PATH_PREFIX, filter_services
+from paka.gguf import read_gguf_range, s3_range_reader
+from paka.k8s.model_group.service import (
+    MODEL_PATH_PREFIX,
+    filter_services,
+    get_node_cache_states,
+)
 from paka.logger import logger
 
 model_group_app = typer.Typer()
@@ -110,3 +115,93 @@ def list(
     table = [(group, f"http://{group}.{domain}") for group in public_model_groups]
     table.extend([(group, f"private") for group in private_model_groups])
     logger.info(tabulate(table, headers=["Model Group", "Endpoint"]))
+
+
+@model_group_app.command()
+def list_nodes(
+    model_group_name: str = typer.Argument(
+        ...,
+        help="The name of the model group.",
+    ),
+    cluster_name: Optional[str] = typer.Option(
+        os.getenv("PAKA_CURRENT_CLUSTER"),
+        "--cluster",
+        "-c",
+        help="The name of the cluster.",
+    ),
+) -> None:
+    """
+    List the nodes of a model group and whether the model is cached on them.
+    """
+    load_kubeconfig(cluster_name)
+    states = get_node_cache_states(
+        get_cluster_namespace(cluster_name), model_group_name
+    )
+    if not states:
+        logger.info("No nodes found.")
+        return
+
+    table = sorted(states.items())
+    logger.info(tabulate(table, headers=["Node", "State"]))
+
+
+@model_group_app.command()
+def inspect(
+    model_group_name: str = typer.Argument(
+        ...,
+        help="The name of the model group.",
+    ),
+    cluster_name: Optional[str] = typer.Option(
+        os.getenv("PAKA_CURRENT_CLUSTER"),
+        "--cluster",
+        "-c",
+        help="The name of the cluster.",
+    ),
+) -> None:
+    """
+    Show the architecture, context length, quantization and size of the GGUF files of a model group.
+
+    Only the headers of the files are read from the object store.
+    """
+    cluster_name = ensure_cluster_name(cluster_name)
+    bucket = read_pulumi_stack(cluster_name, "bucket")
+
+    s3 = boto3.client("s3")
+    response = s3.list_objects_v2(
+        Bucket=bucket, Prefix=f"{MODEL_PATH_PREFIX}/{model_group_name}/"
+    )
+    keys = [
+        obj["Key"]
+        for obj in response.get("Contents", [])
+        if obj["Key"].lower().endswith(".gguf")
+    ]
+    if not keys:
+        logger.info("No GGUF files found.")
+        return
+
+    table = []
+    for key in keys:
+        header = read_gguf_range(s3_range_reader(s3, bucket, key))
+        table.append(
+            (
+                os.path.basename(key),
+                header.architecture,
+                header.context_length,
+                header.quantization,
+                f"{header.tensor_bytes / 1e9:.2f} GB",
+                f"{header.bytes_read / 1024:.0f} KB",
+            )
+        )
+    logger.info(
+        tabulate(
+            table,
+            headers=[
+                "File",
+                "Architecture",
+                "Context Length",
+                "Quantization",
+                "Tensors",
+                "Read",
+            ],
+        )
+    )
@@ -14,7 +14,11 @@ from paka.cluster.aws.cluster_autoscaler import create_cluster_autoscaler
 from paka.cluster.aws.ebs_csi_driver import create_ebs_csi_driver
 from paka.cluster.aws.elb import update_elb_idle_timeout
 from paka.cluster.aws.service_account import create_service_accounts
-from paka.cluster.aws.utils import create_vpc_endpoint_for_s3, get_ami_for_instance
+from paka.cluster.aws.utils import (
+    create_vpc_endpoint_for_s3,
+    get_ami_for_instance,
+    get_node_group_disk_args,
+)
 from paka.cluster.context import Context
 from paka.cluster.keda import create_keda
 from paka.cluster.knative import create_knative_and_istio
@@ -96,6 +100,7 @@ def create_node_group_for_model_group(
         disk_size = (
             model_group.gpu.diskSize if model_group.gpu else model_group.diskSize
         )
+        disk_args = get_node_group_disk_args(ctx, model_group, ami_type, disk_size)
 
         # Create a managed node group for our cluster
         eks.ManagedNodeGroup(
@@ -119,7 +124,7 @@ def create_node_group_for_model_group(
             taints=taints,
             # Supported AMI types https://docs.aws.amazon.com/eks/latest/APIReference/API_Nodegroup.html#AmazonEKS-Type-Nodegroup-amiType
             ami_type=ami_type,
-            disk_size=disk_size,
+            **disk_args,
             capacity_type="ON_DEMAND",
         )
 
@@ -157,6 +162,9 @@ def create_node_group_for_mixed_model_group(
             if mixed_model_group.gpu
             else mixed_model_group.diskSize
         )
+        disk_args = get_node_group_disk_args(
+            ctx, mixed_model_group, ami_type, disk_size
+        )
 
         # Create a managed node group for our cluster
         eks.ManagedNodeGroup(
@@ -180,7 +188,7 @@ def create_node_group_for_mixed_model_group(
             taints=taints,
             # Supported AMI types https://docs.aws.amazon.com/eks/latest/APIReference/API_Nodegroup.html#AmazonEKS-Type-Nodegroup-amiType
             ami_type=ami_type,
-            disk_size=disk_size,
+            **disk_args,
             capacity_type="ON_DEMAND",
         )
 
@@ -206,7 +214,7 @@ def create_node_group_for_mixed_model_group(
             taints=taints,
             # Supported AMI types https://docs.aws.amazon.com/eks/latest/APIReference/API_Nodegroup.html#AmazonEKS-Type-Nodegroup-amiType
             ami_type=ami_type,
-            disk_size=disk_size,
+            **disk_args,
             capacity_type="SPOT",
         )
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Sequence
+import base64
+from typing import Any, Dict, Optional, Sequence
 
 import pulumi
 import pulumi_aws as aws
@@ -8,8 +9,25 @@ import pulumi_eks as eks
 from pulumi import Input
 
 from paka.cluster.context import Context
+from paka.config import CloudModelGroup
 from paka.utils import get_instance_info
 
+# Assembles the instance store NVMe disks of a node into a RAID0 array and moves the
+# kubelet and containerd directories onto it, so that emptyDir volumes live on NVMe.
+# setup-local-disks ships with the EKS optimized AL2 AMIs.
+LOCAL_DISKS_USER_DATA = """MIME-Version: 1.0
+Content-Type: multipart/mixed; boundary="//"
+
+--//
+Content-Type: text/x-shellscript; charset="us-ascii"
+
+#!/bin/bash
+set -ex
+/bin/setup-local-disks raid0
+
+--//--
+"""
+
 
 def odic_role_for_sa(
     ctx: Context,
@@ -80,6 +98,66 @@ def get_ami_for_instance(ctx: Context, instance_type: str) -> str:
     return "AL2_x86_64"
 
 
+def get_node_group_disk_args(
+    ctx: Context,
+    model_group: CloudModelGroup,
+    ami_type: str,
+    disk_size: Optional[int],
+) -> Dict[str, Any]:
+    """
+    Returns the disk arguments of the managed node groups of a model group.
+
+    Model groups that keep the model on NVMe get a launch template that puts the
+    kubelet directory on the instance store disks. The root volume size then moves
+    into the launch template, as a node group with a launch template cannot set it.
+
+    Args:
+        ctx (Context): The cluster context.
+        model_group (CloudModelGroup): The model group.
+        ami_type (str): The AMI type of the node group.
+        disk_size (Optional[int]): The root volume size in GiB.
+
+    Returns:
+        Dict[str, Any]: The keyword arguments for eks.ManagedNodeGroup.
+
+    Raises:
+        ValueError: If the node type has no instance store NVMe disks, or the AMI type is not AL2.
+    """
+    if not model_group.modelVolume or model_group.modelVolume.medium != "nvme":
+        return {"disk_size": disk_size}
+
+    instance_info = get_instance_info(ctx.provider, ctx.region, model_group.nodeType)
+    if not instance_info.get("instance_storage") or not instance_info.get("nvme"):
+        raise ValueError(
+            f"Node type {model_group.nodeType} of model group {model_group.name} has no instance store NVMe disks."
+        )
+    if not ami_type.startswith("AL2_"):
+        raise ValueError(
+            f"The nvme model volume is not supported with the {ami_type} AMI type."
+        )
+
+    launch_template = aws.ec2.LaunchTemplate(
+        f"{ctx.cluster_name}-{model_group.name}-local-disks",
+        block_device_mappings=[
+            aws.ec2.LaunchTemplateBlockDeviceMappingArgs(
+                device_name="/dev/xvda",
+                ebs=aws.ec2.LaunchTemplateBlockDeviceMappingEbsArgs(
+                    # The default disk size of managed node groups
+                    volume_size=disk_size or 20,
+                    volume_type="gp3",
+                    delete_on_termination="true",
+                ),
+            )
+        ],
+        user_data=base64.b64encode(LOCAL_DISKS_USER_DATA.encode()).decode(),
+    )
+    return {
+        "launch_template": aws.eks.NodeGroupLaunchTemplateArgs(
+            id=launch_template.id, version=launch_template.latest_version
+        )
+    }
+
+
 def create_vpc_endpoint_for_s3(
     vpc_id: str, route_table_ids: Input[Sequence[Input[str]]], region: str
 ) -> aws.ec2.VpcEndpoint:
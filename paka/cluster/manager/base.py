@@ -10,6 +10,7 @@ from paka.cluster.context import Context
 from paka.cluster.pulumi import ensure_pulumi
 from paka.config import CloudConfig, Config
 from paka.constants import PULUMI_STACK_NAME
+from paka.k8s.model_group.runtime.vllm import get_vllm_plan, is_vllm_image
 from paka.k8s.model_group.service import (
     cleanup_staled_model_group_services,
     create_model_group_service,
@@ -61,10 +62,35 @@ class ClusterManager(ABC):
 
         return self._stack_for_program(program)
 
+    def check_model_groups_fit(self) -> None:
+        """
+        Refuses vLLM model groups whose model does not fit on their node type, before any
+        node is provisioned.
+
+        Only the models on the HuggingFace Hub can be checked, since the model store is
+        created with the cluster.
+
+        Raises:
+            ValueError: If a model does not fit in the VRAM of its node type.
+        """
+        for model_group in self.cloud_config.modelGroups or []:
+            if model_group.runtime.command or not is_vllm_image(
+                model_group.runtime.image
+            ):
+                continue
+            plan = get_vllm_plan(self.ctx, model_group, use_model_store=False)
+            if plan:
+                logger.info(
+                    f"Model group {model_group.name} fits {plan.max_num_seqs} sequences "
+                    f"of up to {plan.max_model_len} tokens on {model_group.nodeType}."
+                )
+
     def create(self) -> None:
         if self.config.aws is None:
             raise ValueError("Only AWS is supported.")
 
+        self.check_model_groups_fit()
+
         if self.config.aws:
             self._stack.set_config(
                 "aws:region", auto.ConfigValue(value=self.cloud_config.cluster.region)
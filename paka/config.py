@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+from typing import Any, Dict, Generic, List, Literal, Optional, TypeVar
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from ruamel.yaml import YAML
@@ -163,6 +163,74 @@ class Runtime(PakaBaseModel):
     volumeMounts: Optional[List[Dict[str, Any]]] = None
 
 
+class NodeCache(PakaBaseModel):
+    """
+    Represents a cache of model files on the nodes of a model group.
+
+    Files are kept on the host disk of the node under their SHA256 hash, so a pod
+    that is rescheduled or rolled on the node does not download them again.
+    """
+
+    enabled: bool = Field(False, description="Whether the node cache is enabled.")
+    diskBudget: str = Field(
+        "100Gi",
+        description="The disk space the cache may take on each node. Least recently used files are evicted beyond it.",
+    )
+    prefetch: bool = Field(
+        False,
+        description="Whether to pull the runtime image and the model files onto each node of the model group as soon as the node joins.",
+    )
+
+    @field_validator("diskBudget", mode="before")
+    def validate_disk_budget(cls, v: str) -> str:
+        """
+        Validates the format of the diskBudget field.
+
+        Args:
+            v (str): The value of the diskBudget field.
+
+        Returns:
+            str: The input value if validation is successful.
+
+        Raises:
+            ValueError: If the format of the input value is invalid.
+        """
+        return validate_size(v, "Invalid disk budget format")
+
+
+class ModelVolume(PakaBaseModel):
+    """
+    Represents the volume that holds the model files in the pods of a model group.
+    """
+
+    medium: Literal["disk", "memory", "nvme"] = Field(
+        "disk",
+        description="Where the model files are kept. 'disk' uses the root volume of the node, 'memory' uses tmpfs and 'nvme' uses the instance store NVMe disks of the node type.",
+    )
+    sizeLimit: Optional[str] = Field(
+        None,
+        description="The size limit of the volume. For the memory medium, defaults to the size of the model in the model store plus 10%.",
+    )
+
+    @field_validator("sizeLimit", mode="before")
+    def validate_size_limit(cls, v: Optional[str]) -> Optional[str]:
+        """
+        Validates the format of the sizeLimit field.
+
+        Args:
+            v (Optional[str]): The value of the sizeLimit field.
+
+        Returns:
+            Optional[str]: The input value if validation is successful.
+
+        Raises:
+            ValueError: If the format of the input value is invalid.
+        """
+        if v is None:
+            return v
+        return validate_size(v, "Invalid size limit format")
+
+
 class Model(PakaBaseModel):
     """
     Represents a model.
@@ -177,6 +245,18 @@ class Model(PakaBaseModel):
     useModelStore: bool = Field(
         True, description="Whether to save the model to a model store, such as s3."
     )
+    nodeCache: Optional[NodeCache] = Field(
+        None,
+        description="The node cache of the model files. Only used with the model store.",
+    )
+    peerDownload: bool = Field(
+        False,
+        description="Whether new pods download the model files from running pods of the model group, with the model store as the fallback.",
+    )
+    streamingDownload: bool = Field(
+        False,
+        description="Whether the model files are downloaded next to the runtime instead of before it, so that the runtime image is pulled and started while the model downloads. The runtime waits for the verified files.",
+    )
 
 
 class Trigger(PakaBaseModel):
@@ -202,6 +282,11 @@ class CloudModelGroup(CloudNode):
     )
     runtime: Runtime = Field(..., description="The runtime for the model group.")
 
+    modelVolume: Optional[ModelVolume] = Field(
+        None,
+        description="The volume that holds the model files. Defaults to the root volume of the node.",
+    )
+
     resourceRequest: Optional[ResourceRequest] = Field(
         None,
         description="The resource request for the model group, specifying the amount of CPU and memory to request.",
@@ -241,6 +326,21 @@ class CloudModelGroup(CloudNode):
         description="Whether the model group can be accessed through a public endpoint.",
     )
 
+    @model_validator(mode="after")
+    def check_model_volume(self) -> CloudModelGroup:
+        model, model_volume = self.model, self.modelVolume
+        if not model_volume or model_volume.medium != "memory":
+            return self
+        if model and model.nodeCache and model.nodeCache.enabled:
+            raise ValueError(
+                "The memory medium cannot be used with the node cache, the model files are kept in the cache"
+            )
+        if model_volume.sizeLimit is None and not (model and model.useModelStore):
+            raise ValueError(
+                "sizeLimit must be set for the memory medium when the model store is not used"
+            )
+        return self
+
 
 class ScalingConfig(PakaBaseModel):
     minInstances: int = Field(
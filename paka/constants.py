@@ -13,5 +13,46 @@ BP_BUILDER_ENV_VAR = "BP_BUILDER"
 # The path where the model files are mounted in the container
 MODEL_MOUNT_PATH = "/data"
 
+# The image of the init container that downloads model files from the model store.
+# It ships Python, boto3 and PyYAML. See docker/model-downloader.
+MODEL_DOWNLOADER_IMAGE = "ghcr.io/jjleng/paka-model-downloader:1.0"
+
+# The environment variable for the image of the model downloader, e.g. a mirror in a private registry
+MODEL_DOWNLOADER_IMAGE_ENV_VAR = "PAKA_MODEL_DOWNLOADER_IMAGE"
+
+# The environment variable that lets the model downloader install boto3 and PyYAML from PyPI
+# when its image lacks them. Set it to 1 to opt in.
+MODEL_DOWNLOADER_PIP_INSTALL_ENV_VAR = "PAKA_MODEL_DOWNLOADER_PIP_INSTALL"
+
+# The directory on the node where model files are cached across pods
+MODEL_CACHE_HOST_PATH = "/var/lib/paka/model-cache"
+
+# The path where the node cache of model files is mounted in the container
+MODEL_CACHE_MOUNT_PATH = "/model-cache"
+
+# The directory where the kubelet keeps a directory for each pod of the node
+KUBELET_PODS_HOST_PATH = "/var/lib/kubelet/pods"
+
+# The path where the pod directories of the kubelet are mounted in the node cache agent
+KUBELET_PODS_MOUNT_PATH = "/kubelet-pods"
+
+# The port on which model group pods serve their model files to peers
+MODEL_PEER_PORT = 8900
+
 # Pulumi stack name
 PULUMI_STACK_NAME = "default"
+
+# The environment variable for the memory budget, in bytes, of the buffers used by model uploads
+UPLOAD_MEMORY_BUDGET_ENV_VAR = "PAKA_UPLOAD_MEMORY_BUDGET"
+
+# The environment variable for the max number of model files transferred at once by the process
+MAX_TRANSFERS_ENV_VAR = "PAKA_MAX_TRANSFERS"
+
+# The environment variable for the max number of parts transferred at once by the process
+MAX_PART_WORKERS_ENV_VAR = "PAKA_MAX_PART_WORKERS"
+
+# The environment variable for the file that the summary of the model transfers is written to, as JSON
+TRANSFER_SUMMARY_PATH_ENV_VAR = "PAKA_TRANSFER_SUMMARY_PATH"
+
+# The environment variable for the URL of the Prometheus Pushgateway that transfer metrics are pushed to
+PUSHGATEWAY_URL_ENV_VAR = "PAKA_PUSHGATEWAY_URL"
@@ -1,167 +1,731 @@
+"""
+Reads the metadata and tensor infos of GGUF model files.
+
+The file is memory-mapped and parsed in place. Scalar and string values are
+decoded as the header is walked. Array values, such as the hundreds of
+thousands of entries of `tokenizer.ggml.tokens` and `tokenizer.ggml.scores`,
+are only skipped over and returned as `LazyArray`s, which decode their
+elements on access. Numeric arrays are decoded in bulk with
+`memoryview.cast`, so reading a header costs a few milliseconds and no more
+memory than the values that are actually used.
+
+Headers of remote files, in the model store, on S3 or behind an HTTP server
+such as the HuggingFace Hub, are read with ranged reads. Only the header is
+fetched, in windows that grow until the header parses, so inspecting a 70GB
+model costs a few hundred KB of I/O.
+"""
+
+from __future__ import annotations
+
+import array
+import mmap
 import struct
-from collections import namedtuple
-from typing import Any, BinaryIO, Dict, List, Union
-
-Slice = namedtuple("Slice", ["value", "length"])
-
-GGUFValueType = {
-    "UINT8": 0,
-    "INT8": 1,
-    "UINT16": 2,
-    "INT16": 3,
-    "UINT32": 4,
-    "INT32": 5,
-    "FLOAT32": 6,
-    "BOOL": 7,
-    "STRING": 8,
-    "ARRAY": 9,
-    "UINT64": 10,
-    "INT64": 11,
-    "FLOAT64": 12,
+import sys
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+import requests
+from botocore.exceptions import ClientError
+
+from paka.model.http_model import fetch_range
+from paka.model.store import ModelStore
+
+GGUF_MAGIC = b"GGUF"
+
+# The alignment of the tensor data when the file does not set general.alignment
+DEFAULT_ALIGNMENT = 32
+
+# The first window read from a remote file, enough for most headers without a
+# large tokenizer
+DEFAULT_READ_AHEAD = 256 * 1024
+# Headers larger than this are rejected rather than read, they are not GGUF headers
+MAX_HEADER_SIZE = 256 * 1024 * 1024
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# Reads the bytes [start, end) of a file. Fewer bytes are returned past the end of the file.
+RangeReader = Callable[[int, int], bytes]
+
+
+class GGUFValueType(IntEnum):
+    UINT8 = 0
+    INT8 = 1
+    UINT16 = 2
+    INT16 = 3
+    UINT32 = 4
+    INT32 = 5
+    FLOAT32 = 6
+    BOOL = 7
+    STRING = 8
+    ARRAY = 9
+    UINT64 = 10
+    INT64 = 11
+    FLOAT64 = 12
+
+
+# The struct format of each fixed-size value type
+SCALAR_FORMATS: Dict[int, str] = {
+    GGUFValueType.UINT8: "B",
+    GGUFValueType.INT8: "b",
+    GGUFValueType.UINT16: "H",
+    GGUFValueType.INT16: "h",
+    GGUFValueType.UINT32: "I",
+    GGUFValueType.INT32: "i",
+    GGUFValueType.FLOAT32: "f",
+    GGUFValueType.BOOL: "?",
+    GGUFValueType.UINT64: "Q",
+    GGUFValueType.INT64: "q",
+    GGUFValueType.FLOAT64: "d",
 }
 
 
-def read_string(file: BinaryIO, version: int, little_endian: bool) -> Slice:
-    length = read_versioned_size(file, version, little_endian)
-    value = file.read(length.value).decode("utf-8")
-    return Slice(value=value, length=length.length + length.value)
+class GGMLType(IntEnum):
+    F32 = 0
+    F16 = 1
+    Q4_0 = 2
+    Q4_1 = 3
+    Q5_0 = 6
+    Q5_1 = 7
+    Q8_0 = 8
+    Q8_1 = 9
+    Q2_K = 10
+    Q3_K = 11
+    Q4_K = 12
+    Q5_K = 13
+    Q6_K = 14
+    Q8_K = 15
+    IQ2_XXS = 16
+    IQ2_XS = 17
+    IQ3_XXS = 18
+    IQ1_S = 19
+    IQ4_NL = 20
+    IQ3_S = 21
+    IQ2_S = 22
+    IQ4_XS = 23
+    I8 = 24
+    I16 = 25
+    I32 = 26
+    I64 = 27
+    F64 = 28
+    IQ1_M = 29
+    BF16 = 30
 
 
-def read_versioned_size(file: BinaryIO, version: int, little_endian: bool) -> Slice:
-    endian = "<" if little_endian else ">"
-    if version == 1:
-        length_value = struct.unpack(endian + "I", file.read(4))[0]
-        length_size = 4
-    elif version in [2, 3]:
-        length_value = struct.unpack(endian + "Q", file.read(8))[0]
-        length_size = 8
-    else:
-        raise ValueError(f"Unsupported version: {version}")
-    return Slice(value=length_value, length=length_size)
-
-
-def read_metadata_value(
-    file: BinaryIO, value_type: int, version: int, little_endian: bool
-) -> Slice:
-    endian = "<" if little_endian else ">"
-    if value_type == GGUFValueType["UINT8"]:
-        return Slice(value=struct.unpack(endian + "B", file.read(1))[0], length=1)
-    elif value_type == GGUFValueType["INT8"]:
-        return Slice(value=struct.unpack(endian + "b", file.read(1))[0], length=1)
-    elif value_type == GGUFValueType["UINT16"]:
-        return Slice(value=struct.unpack(endian + "H", file.read(2))[0], length=2)
-    elif value_type == GGUFValueType["INT16"]:
-        return Slice(value=struct.unpack(endian + "h", file.read(2))[0], length=2)
-    elif value_type == GGUFValueType["UINT32"]:
-        return Slice(value=struct.unpack(endian + "I", file.read(4))[0], length=4)
-    elif value_type == GGUFValueType["INT32"]:
-        return Slice(value=struct.unpack(endian + "i", file.read(4))[0], length=4)
-    elif value_type == GGUFValueType["FLOAT32"]:
-        return Slice(value=struct.unpack(endian + "f", file.read(4))[0], length=4)
-    elif value_type == GGUFValueType["BOOL"]:
-        return Slice(value=struct.unpack(endian + "B", file.read(1))[0] != 0, length=1)
-    elif value_type == GGUFValueType["STRING"]:
-        return read_string(file, version, little_endian)
-    elif value_type == GGUFValueType["ARRAY"]:
-        array_type = struct.unpack(endian + "I", file.read(4))[0]
-        array_length = read_versioned_size(file, version, little_endian)
-        length = 4 + array_length.length
-        array_values = []
-        for _ in range(array_length.value):
-            metadata_value = read_metadata_value(
-                file, array_type, version, little_endian
-            )
-            array_values.append(metadata_value.value)
-            length += metadata_value.length
-        return Slice(value=array_values, length=length)
-    elif value_type == GGUFValueType["UINT64"]:
-        return Slice(value=struct.unpack(endian + "Q", file.read(8))[0], length=8)
-    elif value_type == GGUFValueType["INT64"]:
-        return Slice(value=struct.unpack(endian + "q", file.read(8))[0], length=8)
-    elif value_type == GGUFValueType["FLOAT64"]:
-        return Slice(value=struct.unpack(endian + "d", file.read(8))[0], length=8)
-    else:
-        raise ValueError(f"Unsupported metadata type: {value_type}")
+# The number of elements per block and the bytes per block of each tensor type
+GGML_BLOCK_SIZES: Dict[int, Tuple[int, int]] = {
+    GGMLType.F32: (1, 4),
+    GGMLType.F16: (1, 2),
+    GGMLType.Q4_0: (32, 18),
+    GGMLType.Q4_1: (32, 20),
+    GGMLType.Q5_0: (32, 22),
+    GGMLType.Q5_1: (32, 24),
+    GGMLType.Q8_0: (32, 34),
+    GGMLType.Q8_1: (32, 36),
+    GGMLType.Q2_K: (256, 84),
+    GGMLType.Q3_K: (256, 110),
+    GGMLType.Q4_K: (256, 144),
+    GGMLType.Q5_K: (256, 176),
+    GGMLType.Q6_K: (256, 210),
+    GGMLType.Q8_K: (256, 292),
+    GGMLType.IQ2_XXS: (256, 66),
+    GGMLType.IQ2_XS: (256, 74),
+    GGMLType.IQ3_XXS: (256, 98),
+    GGMLType.IQ1_S: (256, 50),
+    GGMLType.IQ4_NL: (32, 18),
+    GGMLType.IQ3_S: (256, 110),
+    GGMLType.IQ2_S: (256, 82),
+    GGMLType.IQ4_XS: (256, 136),
+    GGMLType.I8: (1, 1),
+    GGMLType.I16: (1, 2),
+    GGMLType.I32: (1, 4),
+    GGMLType.I64: (1, 8),
+    GGMLType.F64: (1, 8),
+    GGMLType.IQ1_M: (256, 56),
+    GGMLType.BF16: (1, 2),
+}
 
 
-def gguf(local_file_path: str) -> Dict[str, Any]:
-    with open(local_file_path, "rb") as file:
-        # Read and check the magic number
-        magic_number = file.read(4)
-        if magic_number != b"GGUF":
-            raise ValueError(
-                "Not a valid gguf file: does not start with GGUF magic number"
-            )
+class GGUFTruncatedError(ValueError):
+    """
+    Raised when the buffer ends before the header does.
+
+    Attributes:
+        needed (int): The offset up to which the buffer must reach to make progress.
+    """
+
+    def __init__(self, needed: int) -> None:
+        super().__init__(f"Truncated gguf header: {needed} bytes needed")
+        self.needed = needed
+
+
+class _Cursor:
+    """
+    Reads values of a GGUF header from a buffer, moving forward.
+    """
+
+    def __init__(self, view: memoryview, version: int, little_endian: bool) -> None:
+        self.view = view
+        self.offset = 0
+        self.version = version
+        self.endian = "<" if little_endian else ">"
+        # Version 1 stores sizes as uint32, later versions as uint64
+        self.size_format = self.endian + ("I" if version == 1 else "Q")
+        self.size_length = 4 if version == 1 else 8
+
+    def take(self, length: int) -> int:
+        """
+        Moves past `length` bytes and returns the offset of the first one.
+        """
+        start = self.offset
+        end = start + length
+        if end > len(self.view):
+            raise GGUFTruncatedError(end)
+        self.offset = end
+        return start
+
+    def scalar(self, fmt: str, length: int) -> Any:
+        return struct.unpack_from(self.endian + fmt, self.view, self.take(length))[0]
 
-        # Determine the endianness and read the version
-        version = struct.unpack("<I", file.read(4))[0]
-        if version & 65535:
-            little_endian = True
+    def uint32(self) -> int:
+        return self.scalar("I", 4)
+
+    def size(self) -> int:
+        return struct.unpack_from(
+            self.size_format, self.view, self.take(self.size_length)
+        )[0]
+
+    def string(self) -> str:
+        length = self.size()
+        start = self.take(length)
+        return str(self.view[start : start + length], "utf-8")
+
+    def skip_string(self) -> None:
+        self.take(self.size())
+
+    def skip_strings(self, count: int) -> None:
+        """
+        Moves past `count` strings.
+
+        This is the hot loop of reading a header, as tokenizer arrays hold hundreds of
+        thousands of strings, so it avoids a method call per string.
+        """
+        unpack_size = struct.Struct(self.size_format).unpack_from
+        view, size_length = self.view, self.size_length
+        offset = self.offset
+        try:
+            for _ in range(count):
+                offset += size_length + unpack_size(view, offset)[0]
+        except struct.error:
+            raise GGUFTruncatedError(offset + size_length)
+        self.offset = offset
+        if offset > len(view):
+            raise GGUFTruncatedError(offset)
+
+    def string_offsets(self, count: int) -> array.array:
+        """
+        Returns the offsets of the next `count` strings.
+        """
+        unpack_size = struct.Struct(self.size_format).unpack_from
+        view, size_length = self.view, self.size_length
+        offset = self.offset
+        offsets = array.array("Q", bytes(8 * count))
+        for i in range(count):
+            offsets[i] = offset
+            offset += size_length + unpack_size(view, offset)[0]
+        self.offset = offset
+        return offsets
+
+    def strings(self, count: int) -> List[str]:
+        """
+        Decodes the next `count` strings.
+        """
+        unpack_size = struct.Struct(self.size_format).unpack_from
+        view, size_length = self.view, self.size_length
+        offset = self.offset
+        items = []
+        for _ in range(count):
+            start = offset + size_length
+            offset = start + unpack_size(view, offset)[0]
+            items.append(str(view[start:offset], "utf-8"))
+        self.offset = offset
+        return items
+
+    def value(self, value_type: int) -> Any:
+        fmt = SCALAR_FORMATS.get(value_type)
+        if fmt is not None:
+            return self.scalar(fmt, struct.calcsize(fmt))
+        if value_type == GGUFValueType.STRING:
+            return self.string()
+        if value_type == GGUFValueType.ARRAY:
+            return self.array()
+        raise ValueError(f"Unsupported metadata type: {value_type}")
+
+    def skip_value(self, value_type: int) -> None:
+        fmt = SCALAR_FORMATS.get(value_type)
+        if fmt is not None:
+            self.take(struct.calcsize(fmt))
+        elif value_type == GGUFValueType.STRING:
+            self.skip_string()
+        elif value_type == GGUFValueType.ARRAY:
+            self.array()
         else:
-            little_endian = False
-            file.seek(4, 0)  # Rewind to read the version again in big-endian
-            version = struct.unpack(">I", file.read(4))[0]
-
-        if version not in [1, 2, 3]:
-            raise ValueError(f"Not a valid gguf file: unsupported version '{version}'")
-
-        # Read the tensor count and key-value count
-        tensor_count_slice = read_versioned_size(file, version, little_endian)
-        tensor_count = tensor_count_slice.value
-
-        kv_count_slice = read_versioned_size(file, version, little_endian)
-        kv_count = kv_count_slice.value
-
-        # Initialize the metadata
-        metadata: Dict[str, Any] = {
-            "version": version,
-            "tensor_count": tensor_count,
-            "kv_count": kv_count,
-        }
-
-        for _ in range(kv_count):
-            key_result = read_string(file, version, little_endian)
-            key = key_result.value
-
-            value_type = struct.unpack("<I" if little_endian else ">I", file.read(4))[0]
-            if value_type not in GGUFValueType.values():
-                raise ValueError(f"Unsupported metadata type: {value_type}")
-
-            value_result = read_metadata_value(file, value_type, version, little_endian)
-            metadata[key] = value_result.value
-
-        tensor_infos: List[Dict[str, Union[str, int, List[int]]]] = []
-        for _ in range(tensor_count):
-            name_result = read_string(file, version, little_endian)
-            name = name_result.value
-
-            n_dims = struct.unpack("<I" if little_endian else ">I", file.read(4))[0]
-            shape: List[int] = []
-            for _ in range(n_dims):
-                shape_dim = read_versioned_size(file, version, little_endian)
-                shape.append(shape_dim.value)
-
-            dtype = struct.unpack("<I" if little_endian else ">I", file.read(4))[0]
-            offset = struct.unpack("<Q" if little_endian else ">Q", file.read(8))[0]
-
-            tensor_infos.append(
-                {
-                    "name": name,
-                    "n_dims": n_dims,
-                    "shape": shape,
-                    "dtype": dtype,
-                    "offset": offset,
-                }
+            raise ValueError(f"Unsupported metadata type: {value_type}")
+
+    def array(self) -> LazyArray:
+        item_type = self.uint32()
+        count = self.size()
+        start = self.offset
+        fmt = SCALAR_FORMATS.get(item_type)
+        if fmt is not None:
+            self.take(count * struct.calcsize(fmt))
+        elif item_type == GGUFValueType.STRING:
+            self.skip_strings(count)
+        else:
+            # Variable-size items can only be skipped one by one
+            for _ in range(count):
+                self.skip_value(item_type)
+        return LazyArray(
+            self.view[start : self.offset], item_type, count, self.version, self.endian
+        )
+
+
+class LazyArray(Sequence[Any]):
+    """
+    An array value of a GGUF file whose items are decoded on access.
+
+    Numeric arrays are views over the file. Arrays of strings and of arrays are
+    indexed on first access, by walking the length prefixes of their items.
+    """
+
+    def __init__(
+        self, view: memoryview, item_type: int, count: int, version: int, endian: str
+    ) -> None:
+        self.view = view
+        self.item_type = item_type
+        self.length = count
+        self.version = version
+        self.endian = endian
+        self._numeric: Optional[Sequence[Any]] = None
+        self._offsets: Optional[array.array] = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Any]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("array index out of range")
+        if self.item_type in SCALAR_FORMATS:
+            return self.numeric()[index]
+        return self._item(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.item_type in SCALAR_FORMATS:
+            return iter(self.numeric())
+        return (self._item(i) for i in range(self.length))
+
+    def __repr__(self) -> str:
+        return f"LazyArray({GGUFValueType(self.item_type).name}, {self.length})"
+
+    def numeric(self) -> Sequence[Any]:
+        """
+        Returns the items of a numeric array as a sequence decoded in bulk.
+
+        The sequence is a view over the file when the file has the byte order of
+        the machine, and a byte-swapped copy otherwise.
+        """
+        if self._numeric is None:
+            fmt = SCALAR_FORMATS[self.item_type]
+            native = (self.endian == "<") == (sys.byteorder == "little")
+            if native or struct.calcsize(fmt) == 1:
+                self._numeric = self.view.cast(fmt)  # type: ignore[call-overload]
+            else:
+                items = array.array(fmt, self.view.tobytes())
+                items.byteswap()
+                self._numeric = items
+        return self._numeric
+
+    def tolist(self) -> List[Any]:
+        if self.item_type in SCALAR_FORMATS:
+            numeric = self.numeric()
+            return numeric.tolist()  # type: ignore[attr-defined]
+        if self.item_type == GGUFValueType.STRING:
+            return self._cursor().strings(self.length)
+        return list(self)
+
+    def _cursor(self) -> _Cursor:
+        return _Cursor(self.view, self.version, self.endian == "<")
+
+    def _item(self, index: int) -> Any:
+        offsets = self._index()
+        cursor = self._cursor()
+        cursor.offset = offsets[index]
+        return cursor.value(self.item_type)
+
+    def _index(self) -> array.array:
+        if self._offsets is None:
+            cursor = self._cursor()
+            if self.item_type == GGUFValueType.STRING:
+                self._offsets = cursor.string_offsets(self.length)
+            else:
+                offsets = array.array("Q")
+                for _ in range(self.length):
+                    offsets.append(cursor.offset)
+                    cursor.skip_value(self.item_type)
+                self._offsets = offsets
+        return self._offsets
+
+
+@dataclass
+class TensorInfo:
+    name: str
+    shape: List[int]
+    dtype: int
+    # The offset of the tensor data from the start of the data section
+    offset: int
+
+    @property
+    def n_dims(self) -> int:
+        return len(self.shape)
+
+    @property
+    def n_elements(self) -> int:
+        n = 1
+        for dim in self.shape:
+            n *= dim
+        return n
+
+    @property
+    def n_bytes(self) -> int:
+        """
+        The size of the tensor data.
+
+        Raises:
+            ValueError: If the tensor type is unknown.
+        """
+        if self.dtype not in GGML_BLOCK_SIZES:
+            raise ValueError(f"Unknown tensor type {self.dtype} of {self.name}")
+        block_size, type_size = GGML_BLOCK_SIZES[self.dtype]
+        return self.n_elements // block_size * type_size
+
+
+@dataclass
+class GGUFHeader:
+    """
+    The header of a GGUF file.
+
+    Attributes:
+        version (int): The GGUF version.
+        little_endian (bool): Whether the file is little-endian.
+        metadata (Dict[str, Any]): The metadata key-value pairs. Array values are `LazyArray`s.
+        tensor_infos (List[TensorInfo]): The tensor infos, in file order.
+        header_size (int): The size of the header, up to the end of the tensor infos.
+        data_offset (int): The offset of the tensor data, the header size rounded up to the alignment.
+        bytes_read (int): The number of bytes read from the file to parse the header.
+    """
+
+    version: int
+    little_endian: bool
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    tensor_infos: List[TensorInfo] = field(default_factory=list)
+    header_size: int = 0
+    data_offset: int = 0
+    bytes_read: int = 0
+
+    @property
+    def alignment(self) -> int:
+        return int(self.metadata.get("general.alignment", DEFAULT_ALIGNMENT))
+
+    @property
+    def architecture(self) -> Optional[str]:
+        return self.metadata.get("general.architecture")
+
+    @property
+    def context_length(self) -> Optional[int]:
+        """The context length the model was trained with."""
+        return self.metadata.get(f"{self.architecture}.context_length")
+
+    @property
+    def tensor_bytes(self) -> int:
+        """The size of the tensor data of the file."""
+        return sum(info.n_bytes for info in self.tensor_infos)
+
+    @property
+    def quantization(self) -> Optional[str]:
+        """
+        The name of the tensor type that holds most of the tensor data, e.g. Q4_K.
+        """
+        sizes: Dict[int, int] = {}
+        for info in self.tensor_infos:
+            # Tensor types newer than this module cannot be sized
+            if info.dtype in GGML_BLOCK_SIZES:
+                sizes[info.dtype] = sizes.get(info.dtype, 0) + info.n_bytes
+        if not sizes:
+            return None
+        dtype = max(sizes, key=lambda t: sizes[t])
+        return GGMLType(dtype).name
+
+
+def read_preamble(view: memoryview) -> Tuple[int, bool]:
+    """
+    Reads the magic number and the version at the start of a GGUF file.
+
+    Returns:
+        Tuple[int, bool]: The version and whether the file is little-endian.
+    """
+    if len(view) < 8:
+        raise GGUFTruncatedError(8)
+    if bytes(view[:4]) != GGUF_MAGIC:
+        raise ValueError("Not a valid gguf file: does not start with GGUF magic number")
+
+    # The version is small, so a little-endian version has its low bytes set
+    version = struct.unpack_from("<I", view, 4)[0]
+    little_endian = bool(version & 0xFFFF)
+    if not little_endian:
+        version = struct.unpack_from(">I", view, 4)[0]
+    if version not in (1, 2, 3):
+        raise ValueError(f"Not a valid gguf file: unsupported version '{version}'")
+    return version, little_endian
+
+
+def parse_gguf(buffer: Buffer) -> GGUFHeader:
+    """
+    Parses the header of a GGUF file from a buffer that starts at the beginning of the file.
+
+    The buffer only needs to hold the header. The returned `LazyArray`s keep views
+    over the buffer, so the buffer must stay valid while they are in use.
+
+    Args:
+        buffer (Buffer): The content of the file, or a prefix of it.
+
+    Returns:
+        GGUFHeader: The header.
+
+    Raises:
+        GGUFTruncatedError: If the buffer ends before the header does.
+        ValueError: If the buffer is not a GGUF file.
+    """
+    view = memoryview(buffer).cast("B")
+    version, little_endian = read_preamble(view)
+    cursor = _Cursor(view, version, little_endian)
+    cursor.offset = 8
+
+    tensor_count = cursor.size()
+    kv_count = cursor.size()
+
+    header = GGUFHeader(version=version, little_endian=little_endian)
+    for _ in range(kv_count):
+        key = cursor.string()
+        value_type = cursor.uint32()
+        header.metadata[key] = cursor.value(value_type)
+
+    for _ in range(tensor_count):
+        name = cursor.string()
+        n_dims = cursor.uint32()
+        shape = [cursor.size() for _ in range(n_dims)]
+        dtype = cursor.uint32()
+        offset = cursor.scalar("Q", 8)
+        header.tensor_infos.append(
+            TensorInfo(name=name, shape=shape, dtype=dtype, offset=offset)
+        )
+
+    header.header_size = cursor.offset
+    alignment = header.alignment
+    header.data_offset = -(-cursor.offset // alignment) * alignment
+    return header
+
+
+def read_gguf(path: str) -> GGUFHeader:
+    """
+    Parses the header of a local GGUF file.
+
+    The file is memory-mapped, so only the pages of the header that are read are
+    loaded, and array values are decoded only when they are accessed. The mapping
+    stays open as long as the header is referenced.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        GGUFHeader: The header.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return parse_gguf(mapped)
+
+
+def read_gguf_range(
+    read_range: RangeReader,
+    read_ahead: int = DEFAULT_READ_AHEAD,
+    max_header_size: int = MAX_HEADER_SIZE,
+) -> GGUFHeader:
+    """
+    Parses the header of a GGUF file from a source of byte ranges.
+
+    The first `read_ahead` bytes are read, and the window at least doubles until it
+    holds the header, so the number of reads grows with the log of the header size.
+
+    Args:
+        read_range (RangeReader): Reads a byte range of the file.
+        read_ahead (int, optional): The size of the first window.
+        max_header_size (int, optional): The largest header that is read.
+
+    Returns:
+        GGUFHeader: The header.
+
+    Raises:
+        ValueError: If the file is not a GGUF file, or its header is larger than `max_header_size`.
+    """
+    buffer = read_range(0, read_ahead)
+    while True:
+        try:
+            header = parse_gguf(buffer)
+            header.bytes_read = len(buffer)
+            return header
+        except GGUFTruncatedError as e:
+            needed = e.needed
+
+        window = max(needed, 2 * len(buffer))
+        if window > max_header_size:
+            raise ValueError(f"gguf header larger than {max_header_size} bytes")
+        chunk = read_range(len(buffer), window)
+        if len(buffer) + len(chunk) < needed:
+            raise ValueError("Not a valid gguf file: the file ends within its header")
+        buffer += chunk
+
+
+def store_range_reader(store: ModelStore, path: str) -> RangeReader:
+    """
+    Reads byte ranges of a file in the model store.
+    """
+
+    def read_range(start: int, end: int) -> bytes:
+        with store.open_range(path, start, end - start) as stream:
+            return stream.read()
+
+    return read_range
+
+
+def s3_range_reader(s3: Any, bucket: str, key: str) -> RangeReader:
+    """
+    Reads byte ranges of an S3 object with ranged GETs.
+    """
+
+    def read_range(start: int, end: int) -> bytes:
+        try:
+            response = s3.get_object(
+                Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}"
             )
+        except ClientError as e:
+            # The range starts past the end of the file
+            if e.response["Error"]["Code"] == "InvalidRange":
+                return b""
+            raise
+        return response["Body"].read()
+
+    return read_range
 
-        return {"metadata": metadata, "tensor_infos": tensor_infos}
 
+def http_range_reader(
+    session: requests.Session, url: str, headers: Optional[Dict[str, str]] = None
+) -> RangeReader:
+    """
+    Reads byte ranges of a file served over HTTP, such as a file on the HuggingFace Hub.
+    """
 
-result = gguf("/Users/jleng/Downloads/llama-2-7b-chat.Q4_0.gguf")
-metadata, tensor_infos = result["metadata"], result["tensor_infos"]
+    def read_range(start: int, end: int) -> bytes:
+        try:
+            response = fetch_range(session, url, start, end, headers=headers)
+        except requests.HTTPError as e:
+            # The range starts past the end of the file
+            if e.response is not None and e.response.status_code == 416:
+                return b""
+            raise
+        with response:
+            return response.content
 
-for k, v in metadata.items():
-    if not k.startswith("tokenizer"):
-        print(k, v)
+    return read_range
 
-print(tensor_infos)
+
+def _encode_value(value_type: int, value: Any, endian: str, size_format: str) -> bytes:
+    fmt = SCALAR_FORMATS.get(value_type)
+    if fmt is not None:
+        return struct.pack(endian + fmt, value)
+    if value_type == GGUFValueType.STRING:
+        data = value.encode("utf-8")
+        return struct.pack(size_format, len(data)) + data
+    if value_type == GGUFValueType.ARRAY:
+        item_type, items = value
+        item_fmt = SCALAR_FORMATS.get(item_type)
+        prefix = struct.pack(endian + "I", item_type) + struct.pack(
+            size_format, len(items)
+        )
+        if item_fmt is not None:
+            return prefix + struct.pack(f"{endian}{len(items)}{item_fmt}", *items)
+        return prefix + b"".join(
+            _encode_value(item_type, item, endian, size_format) for item in items
+        )
+    raise ValueError(f"Unsupported metadata type: {value_type}")
+
+
+def encode_gguf(
+    metadata: Mapping[str, Tuple[int, Any]],
+    tensor_infos: Sequence[TensorInfo] = (),
+    version: int = 3,
+    little_endian: bool = True,
+) -> bytes:
+    """
+    Encodes a GGUF header, without tensor data.
+
+    Args:
+        metadata (Mapping[str, Tuple[int, Any]]): The metadata values keyed by name, each with its
+            value type. An array value is a tuple of the item type and the items.
+        tensor_infos (Sequence[TensorInfo], optional): The tensor infos.
+        version (int, optional): The GGUF version.
+        little_endian (bool, optional): Whether to encode the header as little-endian.
+
+    Returns:
+        bytes: The header.
+    """
+    endian = "<" if little_endian else ">"
+    size_format = endian + ("I" if version == 1 else "Q")
+    parts = [
+        GGUF_MAGIC,
+        struct.pack(endian + "I", version),
+        struct.pack(size_format, len(tensor_infos)),
+        struct.pack(size_format, len(metadata)),
+    ]
+    for key, (value_type, value) in metadata.items():
+        parts.append(_encode_value(GGUFValueType.STRING, key, endian, size_format))
+        parts.append(struct.pack(endian + "I", value_type))
+        parts.append(_encode_value(value_type, value, endian, size_format))
+    for info in tensor_infos:
+        parts.append(
+            _encode_value(GGUFValueType.STRING, info.name, endian, size_format)
+        )
+        parts.append(struct.pack(endian + "I", len(info.shape)))
+        parts.extend(struct.pack(size_format, dim) for dim in info.shape)
+        parts.append(struct.pack(endian + "IQ", info.dtype, info.offset))
+    return b"".join(parts)
@@ -4,13 +4,35 @@ import os
 import re
 from typing import List, Optional
 
-from huggingface_hub import HfFileSystem
-from huggingface_hub.utils import validate_repo_id
+import requests
+from botocore.exceptions import BotoCoreError, ClientError
+from huggingface_hub import hf_hub_url
+from huggingface_hub.utils import build_hf_headers, validate_repo_id
 
 from paka.cluster.context import Context
 from paka.cluster.utils import get_model_store
 from paka.config import CloudModelGroup
 from paka.constants import MODEL_MOUNT_PATH
+from paka.gguf import (
+    GGUFHeader,
+    http_range_reader,
+    read_gguf_range,
+    store_range_reader,
+)
+from paka.k8s.model_group.runtime.llama_cpp_estimator import (
+    RESERVED_CPUS,
+    LlamaCppCpuPlan,
+    LlamaCppPlan,
+    MiB,
+    estimate_model_memory,
+    plan_llama_cpp,
+    plan_llama_cpp_cpu,
+)
+from paka.k8s.utils import get_gpu_count
+from paka.logger import logger
+from paka.model.hf_cache import HfRepoCache
+from paka.model.http_model import create_session
+from paka.utils import cpu_to_millicores, get_instance_info
 
 
 # Heuristic to determine if the image is a llama.cpp image
@@ -52,8 +74,137 @@ def get_model_file_from_model_store(
     return None
 
 
-def get_runtime_command_llama_cpp(
+def get_gguf_header(ctx: Context, model_group: CloudModelGroup) -> Optional[GGUFHeader]:
+    """
+    Reads the header of the GGUF model file of a model group without downloading the file.
+
+    The file is looked up in the model store first, then in the HuggingFace repo of the
+    model. Only the header is fetched, with ranged reads.
+
+    Returns:
+        Optional[GGUFHeader]: The header, or None if the model group has no GGUF model file.
+    """
+    model = model_group.model
+    if not model:
+        return None
+
+    model_file = get_model_file_from_model_store(ctx, model_group)
+    if model_file:
+        if not model_file.lower().endswith(".gguf"):
+            return None
+        store = get_model_store(ctx, with_progress_bar=False)
+        return read_gguf_range(
+            store_range_reader(store, f"{model_group.name}/{model_file}")
+        )
+
+    if not model.hfRepoId:
+        return None
+    repo_cache = HfRepoCache()
+    files = [
+        file
+        for pattern in model.files
+        for file in repo_cache.glob(model.hfRepoId, pattern)
+        if file.lower().endswith(".gguf")
+    ]
+    if len(files) != 1:
+        return None
+    url = hf_hub_url(
+        repo_id=model.hfRepoId,
+        filename=files[0][len(model.hfRepoId) + 1 :],
+        revision=repo_cache.get_tree(model.hfRepoId).commit_sha,
+    )
+    return read_gguf_range(
+        http_range_reader(create_session(1), url, headers=build_hf_headers())
+    )
+
+
+def get_llama_cpp_plan(
+    ctx: Context, model_group: CloudModelGroup
+) -> Optional[LlamaCppPlan]:
+    """
+    Plans the layer offload, the context size and the parallel slots of the llama.cpp
+    server from the GGUF header of the model and the node type of the model group.
+
+    A header that cannot be read or sized, such as one with a tensor type this version
+    does not know, falls back to the default settings rather than failing the deploy.
+
+    Returns:
+        Optional[LlamaCppPlan]: The plan, or None if the model is not a GGUF file whose
+            footprint is known, or the memory of the node type is unknown.
+
+    Raises:
+        ValueError: If the model does not fit on the node type.
+    """
+    try:
+        header = get_gguf_header(ctx, model_group)
+        memory = estimate_model_memory(header) if header else None
+    except (
+        ValueError,
+        OSError,
+        requests.RequestException,
+        BotoCoreError,
+        ClientError,
+    ) as e:
+        logger.warning(
+            f"Could not size the model of model group {model_group.name}, using the default llama.cpp settings: {e}"
+        )
+        return None
+    if not memory:
+        return None
+
+    instance_info = get_instance_info(ctx.provider, ctx.region, model_group.nodeType)
+    if not instance_info or not instance_info.get("memory"):
+        logger.warning(
+            f"The memory of {model_group.nodeType} is unknown, using the default llama.cpp settings."
+        )
+        return None
+    gpu_count = get_gpu_count(ctx, model_group)
+    vram = 0
+    if gpu_count:
+        if not instance_info.get("gpu_count") or not instance_info.get("vram"):
+            logger.warning(
+                f"The VRAM of {model_group.nodeType} is unknown, using the default llama.cpp settings."
+            )
+            return None
+        # The VRAM of the GPUs given to the pod, out of all GPUs of the node
+        vram = instance_info["vram"] * MiB * gpu_count // instance_info["gpu_count"]
+    return plan_llama_cpp(memory, instance_info["memory"] * MiB, vram, gpu_count)
+
+
+def get_llama_cpp_cpu_plan(
     ctx: Context, model_group: CloudModelGroup
+) -> Optional[LlamaCppCpuPlan]:
+    """
+    Plans the threads, the NUMA strategy and the batch size of the llama.cpp server of a
+    CPU model group from its node type.
+
+    The server may use the whole CPUs of the resource request of the model group, or
+    else every vCPU of the node but RESERVED_CPUS.
+
+    Returns:
+        Optional[LlamaCppCpuPlan]: The plan, or None if the model group runs on GPUs or
+            the vCPUs of the node type are unknown.
+    """
+    if hasattr(model_group, "gpu") and model_group.gpu and model_group.gpu.enabled:
+        return None
+
+    instance_info = get_instance_info(ctx.provider, ctx.region, model_group.nodeType)
+    if not instance_info or not instance_info.get("cpu"):
+        return None
+    if model_group.resourceRequest:
+        cpus = cpu_to_millicores(model_group.resourceRequest.cpu) // 1000
+    else:
+        cpus = instance_info["cpu"] - RESERVED_CPUS
+    return plan_llama_cpp_cpu(
+        cpus, instance_info.get("threads_per_core", 1), instance_info.get("arch")
+    )
+
+
+def get_runtime_command_llama_cpp(
+    ctx: Context,
+    model_group: CloudModelGroup,
+    plan: Optional[LlamaCppPlan] = None,
+    cpu_plan: Optional[LlamaCppCpuPlan] = None,
 ) -> List[str]:
     runtime = model_group.runtime
     if runtime.command:
@@ -77,11 +228,11 @@ def get_runtime_command_llama_cpp(
         elif model_group.model and model_group.model.hfRepoId:
 
             validate_repo_id(model_group.model.hfRepoId)
-            hf_fs = HfFileSystem()
+            repo_cache = HfRepoCache()
             files = [
                 file
                 for pattern in model_group.model.files
-                for file in hf_fs.glob(f"{model_group.model.hfRepoId}/{pattern}")
+                for file in repo_cache.glob(model_group.model.hfRepoId, pattern)
             ]
 
             if len(files) > 1:
@@ -113,14 +264,14 @@ def get_runtime_command_llama_cpp(
         "--host",
         "0.0.0.0",
         "--parallel",  # Number of parallel requests to handle
-        "1",
+        str(plan.parallel) if plan else "1",
         "--cont-batching",  # Enable continuous batching
-        "--ctx-size",
-        "4096",
+        "--ctx-size",  # Shared by the parallel requests
+        str(plan.ctx_size) if plan else "4096",
         "--batch-size",  # Maximum number of tokens to decode in a batch
-        "512",
+        str(cpu_plan.batch_size) if cpu_plan else "512",
         "--ubatch-size",  # Physical batch size
-        "512",
+        str(cpu_plan.batch_size) if cpu_plan else "512",
         "--n-predict",  # Maximum number of tokens to predict.
         "-1",
         "--embedding",
@@ -128,10 +279,25 @@ def get_runtime_command_llama_cpp(
         "--metrics",  # Enable metrics
     ]
 
-    if hasattr(model_group, "gpu") and model_group.gpu and model_group.gpu.enabled:
-        # The value 999 is typically sufficient for most models, as it attempts to offload as many layers as possible to the GPU.
-        # However, for particularly large models, this may result in exceeding the GPU's memory capacity and cause errors.
-        # A more effective approach would be to conduct a series of experiments with varying values for --n-gpu-layers to find the optimal setting.
+    if cpu_plan:
+        command.extend(
+            [
+                "--threads",  # Token generation, one thread per physical core
+                str(cpu_plan.threads),
+                "--threads-batch",  # Prompt processing, one thread per vCPU
+                str(cpu_plan.threads_batch),
+            ]
+        )
+        if cpu_plan.numa:
+            command.extend(["--numa", cpu_plan.numa])
+
+    if plan:
+        # The most layers that fit in VRAM next to their KV cache
+        if plan.n_gpu_layers:
+            command.extend(["--n-gpu-layers", str(plan.n_gpu_layers)])
+    elif hasattr(model_group, "gpu") and model_group.gpu and model_group.gpu.enabled:
+        # Without the footprint of the model, offload as many layers as possible to the GPU.
+        # For particularly large models, this may exceed the GPU's memory capacity and cause errors.
         command.extend(["--n-gpu-layers", "999"])
 
     return attach_model_to_command(command)
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from paka.gguf import GGUFHeader
+
+MiB = 1024 * 1024
+
+# The context of each parallel slot of the llama.cpp server, capped by the context
+# the model was trained with
+SLOT_CONTEXT = 4096
+MAX_PARALLEL = 16
+
+# The KV cache is kept as f16
+KV_CACHE_TYPE_SIZE = 2
+
+# The share of the node memory and of the VRAM that the model may take. The rest is
+# left to the system, the kubelet and the CUDA context.
+HOST_MEMORY_FRACTION = 0.8
+VRAM_FRACTION = 0.9
+# The compute buffers of llama.cpp, on the host and on each GPU
+HOST_OVERHEAD = 512 * MiB
+GPU_OVERHEAD = 512 * MiB
+
+# The vCPUs of a node left to the system, the kubelet and the sidecars of the pod
+RESERVED_CPUS = 1
+# EC2 x86 instances with more physical cores than this span two sockets. Graviton
+# instances have a single socket.
+MAX_SOCKET_CORES = 32
+# The tokens of a prompt processed per core in one batch. A batch stalls the token
+# generation of every other slot, so few cores get small batches.
+BATCH_TOKENS_PER_CORE = 64
+MIN_BATCH_SIZE = 128
+MAX_BATCH_SIZE = 512
+
+LAYER_TENSOR = re.compile(r"^blk\.(\d+)\.")
+
+
+@dataclass
+class ModelMemory:
+    """
+    The memory footprint of a GGUF model.
+
+    Attributes:
+        layer_bytes (List[int]): The weight bytes of each repeating layer.
+        embedding_bytes (int): The weight bytes of the token embeddings, which llama.cpp keeps on the host.
+        output_bytes (int): The weight bytes of the output layer and every other tensor outside the layers.
+        kv_bytes_per_token (int): The KV cache bytes of one token in one layer.
+        train_context (int): The context length the model was trained with.
+    """
+
+    layer_bytes: List[int]
+    embedding_bytes: int
+    output_bytes: int
+    kv_bytes_per_token: int
+    train_context: int
+
+    @property
+    def n_layers(self) -> int:
+        return len(self.layer_bytes)
+
+
+@dataclass
+class LlamaCppPlan:
+    """
+    The llama.cpp server settings chosen for a model on a node type.
+
+    Attributes:
+        n_gpu_layers (int): The value of --n-gpu-layers. One more than the number of layers
+            when the output layer is offloaded as well.
+        ctx_size (int): The value of --ctx-size, shared by all slots.
+        parallel (int): The value of --parallel.
+        host_bytes (int): The host memory the server needs.
+        vram_bytes (int): The VRAM the server needs.
+    """
+
+    n_gpu_layers: int
+    ctx_size: int
+    parallel: int
+    host_bytes: int
+    vram_bytes: int
+
+    @property
+    def memory_request(self) -> str:
+        return f"{math.ceil(self.host_bytes / MiB)}Mi"
+
+
+def _max_value(value: Any) -> int:
+    # Some architectures set a per-layer array instead of a single value
+    if isinstance(value, (int, float)):
+        return int(value)
+    return max(int(v) for v in value) if len(value) else 0
+
+
+def estimate_model_memory(header: GGUFHeader) -> Optional[ModelMemory]:
+    """
+    Estimates the memory footprint of a model from its GGUF header.
+
+    Returns:
+        Optional[ModelMemory]: The footprint, or None if the header does not describe a
+            transformer whose layers and attention heads are known.
+    """
+    arch = header.architecture
+    metadata = header.metadata
+    n_layers = metadata.get(f"{arch}.block_count")
+    n_embd = metadata.get(f"{arch}.embedding_length")
+    n_head = metadata.get(f"{arch}.attention.head_count")
+    if not n_layers or not n_embd or not n_head:
+        return None
+
+    n_head = _max_value(n_head)
+    n_head_kv = _max_value(metadata.get(f"{arch}.attention.head_count_kv", n_head))
+    key_length = metadata.get(f"{arch}.attention.key_length", n_embd // n_head)
+    value_length = metadata.get(f"{arch}.attention.value_length", n_embd // n_head)
+
+    layer_bytes = [0] * n_layers
+    embedding_bytes = output_bytes = 0
+    for info in header.tensor_infos:
+        match = LAYER_TENSOR.match(info.name)
+        if match and int(match.group(1)) < n_layers:
+            layer_bytes[int(match.group(1))] += info.n_bytes
+        elif info.name.startswith("token_embd."):
+            embedding_bytes += info.n_bytes
+        else:
+            output_bytes += info.n_bytes
+
+    return ModelMemory(
+        layer_bytes=layer_bytes,
+        embedding_bytes=embedding_bytes,
+        output_bytes=output_bytes,
+        kv_bytes_per_token=n_head_kv * (key_length + value_length) * KV_CACHE_TYPE_SIZE,
+        train_context=int(header.context_length or SLOT_CONTEXT),
+    )
+
+
+def plan_llama_cpp(
+    memory: ModelMemory, host_memory: int, vram: int = 0, gpu_count: int = 0
+) -> LlamaCppPlan:
+    """
+    Chooses the layer offload, the context size and the parallel slots of the llama.cpp server.
+
+    llama.cpp offloads the last layers first and the output layer only once every
+    layer is offloaded. The KV cache of a layer lives where the layer does. The most
+    layers that fit in VRAM with a single slot are offloaded, then slots are added
+    while their KV cache fits both in VRAM and on the host.
+
+    Args:
+        memory (ModelMemory): The memory footprint of the model.
+        host_memory (int): The memory of the node, in bytes.
+        vram (int, optional): The VRAM of the GPUs given to the server, in bytes.
+        gpu_count (int, optional): The number of GPUs given to the server.
+
+    Returns:
+        LlamaCppPlan: The settings.
+
+    Raises:
+        ValueError: If the model does not fit on the node with a single slot.
+    """
+    n_layers = memory.n_layers
+    slot_context = min(memory.train_context, SLOT_CONTEXT)
+    host_budget = host_memory * HOST_MEMORY_FRACTION
+    vram_budget = vram * VRAM_FRACTION - GPU_OVERHEAD * gpu_count if gpu_count else 0
+
+    def usage(gpu_layers: int, parallel: int) -> Tuple[int, int]:
+        offloaded = min(gpu_layers, n_layers)
+        kv_per_layer = memory.kv_bytes_per_token * slot_context * parallel
+        output_on_gpu = gpu_layers > n_layers
+        gpu_bytes = (
+            sum(memory.layer_bytes[n_layers - offloaded :])
+            + offloaded * kv_per_layer
+            + (memory.output_bytes if output_on_gpu else 0)
+        )
+        host_bytes = (
+            memory.embedding_bytes
+            + sum(memory.layer_bytes[: n_layers - offloaded])
+            + (n_layers - offloaded) * kv_per_layer
+            + (0 if output_on_gpu else memory.output_bytes)
+            + HOST_OVERHEAD
+        )
+        return host_bytes, gpu_bytes
+
+    def fits(gpu_layers: int, parallel: int) -> bool:
+        host_bytes, gpu_bytes = usage(gpu_layers, parallel)
+        return host_bytes <= host_budget and (
+            gpu_layers == 0 or gpu_bytes <= vram_budget
+        )
+
+    # Offloading moves weights off the host, so a model may only fit with offload
+    gpu_layers = next(
+        (layers for layers in range(n_layers + 1, -1, -1) if fits(layers, 1)),
+        None,
+    )
+    if gpu_layers is None:
+        host_bytes, _ = usage(0, 1)
+        raise ValueError(
+            f"The model needs {math.ceil(host_bytes / MiB)}Mi of memory with a single slot, more than the node can give it."
+        )
+
+    parallel = 1
+    while parallel < MAX_PARALLEL and fits(gpu_layers, parallel + 1):
+        parallel += 1
+
+    host_bytes, gpu_bytes = usage(gpu_layers, parallel)
+    return LlamaCppPlan(
+        n_gpu_layers=gpu_layers,
+        ctx_size=slot_context * parallel,
+        parallel=parallel,
+        host_bytes=host_bytes,
+        vram_bytes=gpu_bytes if gpu_layers else 0,
+    )
+
+
+@dataclass
+class LlamaCppCpuPlan:
+    """
+    The llama.cpp server threading settings chosen for a node type.
+
+    Attributes:
+        cpu_request (int): The whole vCPUs the pod requests, so that the threads
+            are not starved by the other pods of the node.
+        threads (int): The value of --threads, one per physical core.
+        threads_batch (int): The value of --threads-batch, one per vCPU.
+        numa (Optional[str]): The value of --numa, if the cores span NUMA nodes.
+        batch_size (int): The value of --batch-size and of --ubatch-size.
+    """
+
+    cpu_request: int
+    threads: int
+    threads_batch: int
+    numa: Optional[str]
+    batch_size: int
+
+
+def plan_llama_cpp_cpu(
+    cpus: int, threads_per_core: int = 1, arch: Optional[str] = None
+) -> LlamaCppCpuPlan:
+    """
+    Chooses the threads, the NUMA strategy and the batch size of the llama.cpp server.
+
+    Token generation is bound by memory bandwidth and slows down when two threads
+    share a core, so it gets one thread per physical core. Prompt processing is bound
+    by compute and gets every vCPU. The pod requests whole cores.
+
+    Args:
+        cpus (int): The vCPUs the pod may use.
+        threads_per_core (int, optional): The hardware threads of each core.
+        arch (str, optional): The CPU architecture of the node.
+
+    Returns:
+        LlamaCppCpuPlan: The settings.
+    """
+    cpu_request = max(1, cpus)
+    if cpu_request > threads_per_core:
+        cpu_request -= cpu_request % threads_per_core
+    threads = max(1, cpu_request // threads_per_core)
+    return LlamaCppCpuPlan(
+        cpu_request=cpu_request,
+        threads=threads,
+        threads_batch=cpu_request,
+        numa="distribute" if arch != "arm64" and threads > MAX_SOCKET_CORES else None,
+        batch_size=min(
+            MAX_BATCH_SIZE, max(MIN_BATCH_SIZE, threads * BATCH_TOKENS_PER_CORE)
+        ),
+    )
@@ -1,16 +1,39 @@
 from __future__ import annotations
 
+import json
+import os
 import re
 import shlex
-from typing import List
+from typing import Dict, List, Optional
 
-from huggingface_hub.utils import validate_repo_id
+import requests
+from botocore.exceptions import BotoCoreError, ClientError
+from huggingface_hub import hf_hub_url
+from huggingface_hub.utils import build_hf_headers, validate_repo_id
 
 from paka.cluster.context import Context
 from paka.cluster.utils import get_model_store
 from paka.config import CloudModelGroup
 from paka.constants import MODEL_MOUNT_PATH
+from paka.gguf import RangeReader, http_range_reader, store_range_reader
+from paka.k8s.model_group.runtime.vllm_planner import (
+    MiB,
+    ModelFootprint,
+    VllmPlan,
+    estimate_model_footprint,
+    plan_vllm,
+    read_safetensors_header,
+)
 from paka.k8s.utils import get_gpu_count
+from paka.logger import logger
+from paka.model.hf_cache import HfRepoCache
+from paka.model.http_model import create_session
+from paka.utils import get_instance_info
+
+CONFIG_FILE = "config.json"
+# Maps each tensor to the safetensors file vLLM loads it from
+INDEX_FILE = "model.safetensors.index.json"
+MAX_CONFIG_SIZE = 16 * MiB
 
 
 # Heuristic to determine if the image is a vLLM image
@@ -18,6 +41,153 @@ def is_vllm_image(image: str) -> bool:
     return image.lower().startswith("vllm")
 
 
+def get_model_file_readers(
+    ctx: Context, model_group: CloudModelGroup, use_model_store: bool = True
+) -> Dict[str, RangeReader]:
+    """
+    Finds config.json, the safetensors files and their index of the model of a model
+    group, without downloading them.
+
+    The files are looked up in the model store first, then in the HuggingFace repo of
+    the model.
+
+    Args:
+        use_model_store (bool, optional): Whether to look in the model store. The store
+            does not exist before the cluster is provisioned.
+
+    Returns:
+        Dict[str, RangeReader]: Readers of byte ranges keyed by file name.
+    """
+    model = model_group.model
+    if not model:
+        return {}
+
+    def is_model_file(file: str) -> bool:
+        return file in (CONFIG_FILE, INDEX_FILE) or file.endswith(".safetensors")
+
+    if use_model_store and model.useModelStore:
+        store = get_model_store(ctx, with_progress_bar=False)
+        readers = {
+            os.path.basename(file): store_range_reader(store, file)
+            for file in store.glob(f"{model_group.name}/*")
+            if is_model_file(os.path.basename(file))
+        }
+        if readers:
+            return readers
+
+    if not model.hfRepoId:
+        return {}
+    repo_cache = HfRepoCache()
+    revision = repo_cache.get_tree(model.hfRepoId).commit_sha
+    session = create_session(1)
+    headers = build_hf_headers()
+    files = {
+        file[len(model.hfRepoId) + 1 :]
+        for pattern in [*model.files, CONFIG_FILE, INDEX_FILE]
+        for file in repo_cache.glob(model.hfRepoId, pattern)
+    }
+    return {
+        file: http_range_reader(
+            session,
+            hf_hub_url(repo_id=model.hfRepoId, filename=file, revision=revision),
+            headers=headers,
+        )
+        for file in sorted(files)
+        if is_model_file(file)
+    }
+
+
+def get_model_footprint(
+    ctx: Context, model_group: CloudModelGroup, use_model_store: bool = True
+) -> Optional[ModelFootprint]:
+    """
+    Estimates the memory footprint of the model of a model group from its config.json
+    and the headers of its safetensors files.
+
+    Returns:
+        Optional[ModelFootprint]: The footprint, or None if the model is not a
+            safetensors model with a config.json.
+
+    Raises:
+        ValueError: If the files cannot be parsed or the config does not describe the
+            attention of the model.
+    """
+    readers = get_model_file_readers(ctx, model_group, use_model_store)
+    weight_files = [file for file in readers if file.endswith(".safetensors")]
+    # Repos such as Mistral's ship the weights twice, as consolidated.safetensors and
+    # as shards. vLLM loads only the shards of the index.
+    if INDEX_FILE in readers:
+        index = json.loads(readers[INDEX_FILE](0, MAX_CONFIG_SIZE))
+        weight_map = set(index["weight_map"].values())
+        weight_files = [file for file in weight_files if file in weight_map]
+    safetensors_headers = [
+        read_safetensors_header(readers[file]) for file in weight_files
+    ]
+    if CONFIG_FILE not in readers or not safetensors_headers:
+        return None
+    config = json.loads(readers[CONFIG_FILE](0, MAX_CONFIG_SIZE))
+    return estimate_model_footprint(config, safetensors_headers)
+
+
+def get_vllm_plan(
+    ctx: Context, model_group: CloudModelGroup, use_model_store: bool = True
+) -> Optional[VllmPlan]:
+    """
+    Plans the context length and the concurrent sequences of vLLM from config.json, the
+    safetensors headers of the model and the node type of the model group.
+
+    A model that cannot be read or sized, such as one whose config.json names its
+    attention settings differently, falls back to vLLM's defaults rather than failing
+    the deploy.
+
+    Returns:
+        Optional[VllmPlan]: The plan, or None if the model group has no GPU, the
+            footprint of the model is unknown or the VRAM of the node type is unknown.
+
+    Raises:
+        ValueError: If the model does not fit in the VRAM of the GPUs.
+    """
+    gpu_count = get_gpu_count(ctx, model_group)
+    if not gpu_count:
+        return None
+
+    try:
+        footprint = get_model_footprint(ctx, model_group, use_model_store)
+    except (
+        ValueError,
+        KeyError,
+        OSError,
+        requests.RequestException,
+        BotoCoreError,
+        ClientError,
+    ) as e:
+        logger.warning(
+            f"Could not size the model of model group {model_group.name}, using the default vLLM settings: {e}"
+        )
+        return None
+    if not footprint:
+        return None
+
+    instance_info = get_instance_info(ctx.provider, ctx.region, model_group.nodeType)
+    if (
+        not instance_info
+        or not instance_info.get("gpu_count")
+        or not instance_info.get("vram")
+    ):
+        logger.warning(
+            f"The VRAM of {model_group.nodeType} is unknown, using the default vLLM settings."
+        )
+        return None
+    # The VRAM of the GPUs given to the pod, out of all GPUs of the node
+    vram = instance_info["vram"] * MiB * gpu_count // instance_info["gpu_count"]
+    try:
+        return plan_vllm(footprint, vram, gpu_count)
+    except ValueError as e:
+        raise ValueError(
+            f"Model group {model_group.name} does not fit on {model_group.nodeType}: {e}"
+        ) from e
+
+
 def get_runtime_command_vllm(ctx: Context, model_group: CloudModelGroup) -> List[str]:
     runtime = model_group.runtime
     if runtime.command:
@@ -54,4 +224,8 @@ def get_runtime_command_vllm(ctx: Context, model_group: CloudModelGroup) -> List
     if gpu_count > 1:
         command += ["--tensor-parallel-size", str(gpu_count)]
 
+    plan = get_vllm_plan(ctx, model_group)
+    if plan:
+        command += plan.to_args()
+
     return attach_model_to_command(command)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import math
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from paka.gguf import RangeReader
+
+MiB = 1024 * 1024
+
+# The largest safetensors header that is read
+MAX_SAFETENSORS_HEADER_SIZE = 100 * MiB
+
+TORCH_DTYPE_SIZES = {"float32": 4, "float16": 2, "bfloat16": 2}
+
+# vLLM's default share of the VRAM of each GPU
+GPU_MEMORY_UTILIZATION = 0.9
+# The activations of a forward pass and the CUDA graphs, on each GPU
+GPU_OVERHEAD = 2 * 1024 * MiB
+# vLLM allocates the KV cache in blocks of this many tokens
+BLOCK_SIZE = 16
+# The shortest context that is worth serving
+MIN_MODEL_LEN = 2048
+# The expected length of a sequence, used to size the number of concurrent sequences
+SEQUENCE_TOKENS = 2048
+MAX_NUM_SEQS = 256
+
+
+def read_safetensors_header(read_range: RangeReader) -> Dict[str, Any]:
+    """
+    Reads the JSON header of a safetensors file, without its tensor data.
+
+    Args:
+        read_range (RangeReader): Reads a byte range of the file.
+
+    Returns:
+        Dict[str, Any]: The tensor entries keyed by tensor name, and __metadata__.
+
+    Raises:
+        ValueError: If the file is not a safetensors file.
+    """
+    prefix = read_range(0, 8)
+    if len(prefix) < 8:
+        raise ValueError("Not a valid safetensors file: too short")
+    header_size = struct.unpack("<Q", prefix)[0]
+    if header_size > MAX_SAFETENSORS_HEADER_SIZE:
+        raise ValueError(
+            f"safetensors header larger than {MAX_SAFETENSORS_HEADER_SIZE} bytes"
+        )
+    header = read_range(8, 8 + header_size)
+    if len(header) < header_size:
+        raise ValueError(
+            "Not a valid safetensors file: the file ends within its header"
+        )
+    return json.loads(header)
+
+
+@dataclass
+class ModelFootprint:
+    """
+    The memory footprint of a HuggingFace transformers model.
+
+    Attributes:
+        param_bytes (int): The bytes of the weights.
+        kv_bytes_per_token (int): The KV cache bytes of one token over all layers.
+        max_position_embeddings (int): The longest context the model supports.
+    """
+
+    param_bytes: int
+    kv_bytes_per_token: int
+    max_position_embeddings: int
+
+
+def estimate_model_footprint(
+    config: Dict[str, Any], safetensors_headers: List[Dict[str, Any]]
+) -> ModelFootprint:
+    """
+    Estimates the memory footprint of a model from its config.json and the headers of
+    its safetensors files.
+
+    Raises:
+        ValueError: If the config does not describe the attention of the model.
+    """
+    # Multimodal models keep the config of the language model apart
+    text_config = config.get("text_config", config)
+    try:
+        n_layers = text_config["num_hidden_layers"]
+        n_heads = text_config["num_attention_heads"]
+        hidden_size = text_config["hidden_size"]
+    except KeyError as e:
+        raise ValueError(f"config.json does not set {e}")
+    n_kv_heads = text_config.get("num_key_value_heads") or n_heads
+    head_dim = text_config.get("head_dim") or hidden_size // n_heads
+    dtype_size = TORCH_DTYPE_SIZES.get(
+        str(text_config.get("torch_dtype", config.get("torch_dtype"))), 2
+    )
+
+    param_bytes = 0
+    for header in safetensors_headers:
+        for name, tensor in header.items():
+            if name == "__metadata__":
+                continue
+            start, end = tensor["data_offsets"]
+            param_bytes += end - start
+
+    return ModelFootprint(
+        param_bytes=param_bytes,
+        # Keys and values of every layer
+        kv_bytes_per_token=2 * n_layers * n_kv_heads * head_dim * dtype_size,
+        max_position_embeddings=int(
+            text_config.get("max_position_embeddings", MIN_MODEL_LEN)
+        ),
+    )
+
+
+@dataclass
+class VllmPlan:
+    """
+    The vLLM engine settings chosen for a model on a node type.
+
+    Attributes:
+        max_model_len (int): The value of --max-model-len.
+        gpu_memory_utilization (float): The value of --gpu-memory-utilization.
+        max_num_seqs (int): The value of --max-num-seqs.
+        kv_cache_tokens (int): The number of tokens the KV cache holds.
+    """
+
+    max_model_len: int
+    gpu_memory_utilization: float
+    max_num_seqs: int
+    kv_cache_tokens: int
+
+    def to_args(self) -> List[str]:
+        return [
+            "--max-model-len",
+            str(self.max_model_len),
+            "--gpu-memory-utilization",
+            str(self.gpu_memory_utilization),
+            "--max-num-seqs",
+            str(self.max_num_seqs),
+        ]
+
+
+def plan_vllm(footprint: ModelFootprint, vram: int, gpu_count: int) -> VllmPlan:
+    """
+    Chooses the context length and the number of concurrent sequences of vLLM.
+
+    The weights are split evenly over the GPUs by tensor parallelism. What is left
+    of the share of the VRAM vLLM may use, after the weights and the activations,
+    holds the KV cache. The context is the one the model supports, shortened if the
+    cache cannot hold a single sequence of it. Then as many sequences run at once as
+    the cache holds at SEQUENCE_TOKENS tokens each.
+
+    Args:
+        footprint (ModelFootprint): The memory footprint of the model.
+        vram (int): The VRAM of the GPUs given to vLLM, in bytes.
+        gpu_count (int): The number of GPUs given to vLLM.
+
+    Returns:
+        VllmPlan: The settings.
+
+    Raises:
+        ValueError: If the weights or a MIN_MODEL_LEN context do not fit in VRAM.
+    """
+    usable = vram * GPU_MEMORY_UTILIZATION - GPU_OVERHEAD * gpu_count
+    kv_cache_bytes = usable - footprint.param_bytes
+    if kv_cache_bytes <= 0:
+        raise ValueError(
+            f"The model weights take {math.ceil(footprint.param_bytes / MiB)}Mi, but only "
+            f"{max(0, math.floor(usable / MiB))}Mi of VRAM is usable on {gpu_count} GPU(s)."
+        )
+
+    kv_cache_tokens = int(kv_cache_bytes // footprint.kv_bytes_per_token)
+    kv_cache_tokens -= kv_cache_tokens % BLOCK_SIZE
+    max_model_len = min(footprint.max_position_embeddings, kv_cache_tokens)
+    if max_model_len < min(MIN_MODEL_LEN, footprint.max_position_embeddings):
+        raise ValueError(
+            f"The KV cache only holds {kv_cache_tokens} tokens after the model weights, fewer than {MIN_MODEL_LEN}."
+        )
+
+    max_num_seqs = kv_cache_tokens // min(SEQUENCE_TOKENS, max_model_len)
+    return VllmPlan(
+        max_model_len=max_model_len,
+        gpu_memory_utilization=GPU_MEMORY_UTILIZATION,
+        max_num_seqs=max(1, min(MAX_NUM_SEQS, max_num_seqs)),
+        kv_cache_tokens=kv_cache_tokens,
+    )
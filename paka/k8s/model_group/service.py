@@ -1,36 +1,74 @@
 from __future__ import annotations
 
+import inspect
 import json
+import math
+import os
 from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from kubernetes import client
 from kubernetes import config as k8s_config
+from kubernetes.client.exceptions import ApiException
 
 from paka.cluster.context import Context
 from paka.cluster.utils import get_model_store
-from paka.config import CloudModelGroup, T_OnDemandModelGroup
-from paka.constants import ACCESS_ALL_SA, MODEL_MOUNT_PATH
+from paka.config import CloudModelGroup, NodeCache, T_OnDemandModelGroup
+from paka.constants import (
+    ACCESS_ALL_SA,
+    KUBELET_PODS_HOST_PATH,
+    KUBELET_PODS_MOUNT_PATH,
+    MODEL_CACHE_HOST_PATH,
+    MODEL_CACHE_MOUNT_PATH,
+    MODEL_DOWNLOADER_IMAGE,
+    MODEL_DOWNLOADER_IMAGE_ENV_VAR,
+    MODEL_DOWNLOADER_PIP_INSTALL_ENV_VAR,
+    MODEL_MOUNT_PATH,
+    MODEL_PEER_PORT,
+)
 from paka.k8s.model_group.ingress import create_model_vservice
 from paka.k8s.model_group.runtime.llama_cpp import (
+    get_llama_cpp_cpu_plan,
+    get_llama_cpp_plan,
     get_runtime_command_llama_cpp,
     is_llama_cpp_image,
 )
+from paka.k8s.model_group.runtime.llama_cpp_estimator import (
+    LlamaCppCpuPlan,
+    LlamaCppPlan,
+)
 from paka.k8s.model_group.runtime.vllm import get_runtime_command_vllm, is_vllm_image
-from paka.k8s.utils import CustomResource, apply_resource, get_gpu_count
+from paka.k8s.utils import (
+    CustomResource,
+    apply_resource,
+    get_gpu_count,
+    is_ready_pod,
+)
 from paka.logger import logger
+from paka.model import downloader
 from paka.model.hf_model import HuggingFaceModel
 from paka.model.store import MODEL_PATH_PREFIX
-from paka.utils import camel_to_snake, get_instance_info, kubify_name
+from paka.utils import (
+    camel_to_snake,
+    get_instance_info,
+    kubify_name,
+    size_to_bytes,
+)
 
 
 def get_runtime_command(
-    ctx: Context, model_group: CloudModelGroup, port: int
+    ctx: Context,
+    model_group: CloudModelGroup,
+    port: int,
+    llama_cpp_plan: Optional[LlamaCppPlan] = None,
+    llama_cpp_cpu_plan: Optional[LlamaCppCpuPlan] = None,
 ) -> List[str]:
     """
     Gets the runtime command for a machine learning model group.
 
     Args:
         model_group (T_CloudModelGroup): The model group to get the runtime command for.
+        llama_cpp_plan (LlamaCppPlan, optional): The settings of the llama.cpp server.
+        llama_cpp_cpu_plan (LlamaCppCpuPlan, optional): The threading settings of the llama.cpp server.
 
     Returns:
         List[str]: The runtime command.
@@ -42,7 +80,9 @@ def get_runtime_command(
 
     # If user did not provide a command, we need to provide a default command with heuristics.
     if is_llama_cpp_image(runtime.image):
-        command = get_runtime_command_llama_cpp(ctx, model_group)
+        command = get_runtime_command_llama_cpp(
+            ctx, model_group, llama_cpp_plan, llama_cpp_cpu_plan
+        )
     elif is_vllm_image(runtime.image):
         command = get_runtime_command_vllm(ctx, model_group)
 
@@ -140,37 +180,464 @@ def create_probe(
     )
 
 
-def init_aws(ctx: Context, model_group: CloudModelGroup) -> client.V1Container:
+def get_node_cache(model_group: CloudModelGroup) -> Optional[NodeCache]:
+    """
+    Returns the node cache of a model group, or None if the model group does not use one.
+    """
+    model = model_group.model
+    if model and model.useModelStore and model.nodeCache and model.nodeCache.enabled:
+        return model.nodeCache
+    return None
+
+
+def get_downloader_command() -> List[str]:
+    """
+    Gets the command that runs the downloader source in PAKA_DOWNLOADER_SCRIPT.
+
+    An image without boto3 or PyYAML fails with a clear message, unless installing
+    them from PyPI is opted into with MODEL_DOWNLOADER_PIP_INSTALL_ENV_VAR. That
+    install slows every cold start and needs access to PyPI.
+    """
+    missing = (
+        "echo 'The model downloader image lacks boto3 or PyYAML. Use an image that ships "
+        f"them or set {MODEL_DOWNLOADER_PIP_INSTALL_ENV_VAR}=1.' >&2; exit 1"
+    )
+    if os.environ.get(MODEL_DOWNLOADER_PIP_INSTALL_ENV_VAR) == "1":
+        missing = (
+            "pip install --quiet --no-cache-dir boto3 pyyaml || { echo 'Could not "
+            "install boto3 and PyYAML from PyPI for the model downloader.' >&2; exit 1; }"
+        )
+    return [
+        "sh",
+        "-c",
+        f'python -c "import boto3, yaml" 2>/dev/null || {{ {missing}; }}; '
+        'exec python -c "$PAKA_DOWNLOADER_SCRIPT"',
+    ]
+
+
+def create_downloader_container(
+    name: str, env: List[client.V1EnvVar], volume_mounts: List[client.V1VolumeMount]
+) -> client.V1Container:
     """
-    Initializes an AWS container for downloading a model from S3.
+    Creates a container that runs the downloader in paka.model.downloader.
+
+    The source of the downloader is passed in an environment variable, so the image
+    only needs Python with boto3 and PyYAML. The image is MODEL_DOWNLOADER_IMAGE
+    unless MODEL_DOWNLOADER_IMAGE_ENV_VAR is set.
+    """
+    return client.V1Container(
+        name=name,
+        image=os.environ.get(MODEL_DOWNLOADER_IMAGE_ENV_VAR, MODEL_DOWNLOADER_IMAGE),
+        command=get_downloader_command(),
+        env=[
+            client.V1EnvVar(
+                name="PAKA_DOWNLOADER_SCRIPT", value=inspect.getsource(downloader)
+            ),
+            *env,
+        ],
+        volume_mounts=volume_mounts,
+    )
+
+
+def create_cache_env_vars(node_cache: NodeCache) -> List[client.V1EnvVar]:
+    return [
+        client.V1EnvVar(
+            name=downloader.CACHE_DIR_ENV_VAR, value=MODEL_CACHE_MOUNT_PATH
+        ),
+        client.V1EnvVar(
+            name=downloader.CACHE_BUDGET_ENV_VAR,
+            value=str(size_to_bytes(node_cache.diskBudget)),
+        ),
+    ]
+
+
+def uses_peer_download(model_group: CloudModelGroup) -> bool:
+    model = model_group.model
+    return bool(model and model.useModelStore and model.peerDownload)
+
+
+def get_peer_service_name(model_group_name: str) -> str:
+    return f"{kubify_name(model_group_name)}-peers"
+
+
+def init_model_download(
+    ctx: Context,
+    namespace: str,
+    model_group: CloudModelGroup,
+    stream: bool = False,
+    lease: bool = True,
+) -> client.V1Container:
+    """
+    Creates the init container that downloads the files of a model from S3.
+
+    The container runs the downloader in paka.model.downloader, which fetches the
+    files listed in the manifest of the model with parallel ranged GETs and
+    verifies them against the manifest. With a node cache, the files are kept in
+    the cache and the model volume gets symlinks to them. With peer download, the
+    ranges are fetched from running pods of the model group first.
 
     Args:
-        config (CloudConfig): The cloud configuration.
+        ctx (Context): The cluster context.
+        namespace (str): The namespace of the model group.
         model_group (T_CloudModelGroup): The cloud model group.
+        stream (bool, optional): Whether to create a regular container that runs next to
+            the runtime instead. It writes the manifest once the files are verified and
+            then serves the model to peers, if peer download is enabled.
+        lease (bool, optional): Whether the pod leases the cached files it links, so that
+            they are not evicted while the pod runs.
 
     Returns:
-        client.V1Container: The initialized AWS container.
+        client.V1Container: The init container.
     """
     bucket = ctx.bucket
 
-    return client.V1Container(
-        name="init-s3-model-download",
-        image="amazon/aws-cli",
-        command=[
-            "aws",
-            "s3",
-            "cp",
-            f"s3://{bucket}/{MODEL_PATH_PREFIX}/{model_group.name}/",
-            f"{MODEL_MOUNT_PATH}/",
-            "--recursive",
-        ],
-        volume_mounts=[
+    env = [
+        client.V1EnvVar(name=downloader.BUCKET_ENV_VAR, value=bucket),
+        client.V1EnvVar(
+            name=downloader.PREFIX_ENV_VAR,
+            value=f"{MODEL_PATH_PREFIX}/{model_group.name}",
+        ),
+        client.V1EnvVar(name=downloader.DEST_DIR_ENV_VAR, value=MODEL_MOUNT_PATH),
+    ]
+    volume_mounts = [
+        client.V1VolumeMount(
+            name="model-data",
+            mount_path=MODEL_MOUNT_PATH,
+        )
+    ]
+
+    node_cache = get_node_cache(model_group)
+    if node_cache:
+        env.extend(create_cache_env_vars(node_cache))
+        volume_mounts.append(
+            client.V1VolumeMount(name="model-cache", mount_path=MODEL_CACHE_MOUNT_PATH)
+        )
+        if lease:
+            env.append(
+                client.V1EnvVar(
+                    name=downloader.POD_UID_ENV_VAR,
+                    value_from=client.V1EnvVarSource(
+                        field_ref=client.V1ObjectFieldSelector(
+                            field_path="metadata.uid"
+                        )
+                    ),
+                )
+            )
+
+    if uses_peer_download(model_group):
+        env.append(
+            client.V1EnvVar(
+                name=downloader.PEERS_ENV_VAR,
+                value=f"{get_peer_service_name(model_group.name)}.{namespace}.svc.cluster.local:{MODEL_PEER_PORT}",
+            )
+        )
+
+    if not stream:
+        return create_downloader_container("init-s3-model-download", env, volume_mounts)
+
+    env.append(client.V1EnvVar(name=downloader.MODE_ENV_VAR, value="stream"))
+    if uses_peer_download(model_group):
+        env.append(
+            client.V1EnvVar(
+                name=downloader.PEER_PORT_ENV_VAR, value=str(MODEL_PEER_PORT)
+            )
+        )
+    container = create_downloader_container("model-download", env, volume_mounts)
+    if uses_peer_download(model_group):
+        container.ports = [client.V1ContainerPort(container_port=MODEL_PEER_PORT)]
+    return container
+
+
+def uses_streaming_download(model_group: CloudModelGroup) -> bool:
+    return bool(
+        model_group.model
+        and model_group.model.useModelStore
+        and model_group.model.streamingDownload
+    )
+
+
+def wait_for_model(command: List[str]) -> List[str]:
+    """
+    Wraps a runtime command so that it starts once the model files are verified.
+
+    The downloader writes the manifest of the model last, after every file is verified.
+    """
+    manifest_path = f"{MODEL_MOUNT_PATH}/{downloader.MANIFEST_FILE}"
+    script = (
+        f"while [ ! -f {manifest_path} ]; do sleep 1; done; "
+        f'echo "Model ready after $SECONDS seconds"; exec "$@"'
+    )
+    return ["sh", "-c", script, "sh", *command]
+
+
+def create_peer_container(model_group: CloudModelGroup) -> client.V1Container:
+    """
+    Creates the sidecar that serves the verified model files of a pod to its peers.
+    """
+    volume_mounts = [
+        client.V1VolumeMount(
+            name="model-data", mount_path=MODEL_MOUNT_PATH, read_only=True
+        )
+    ]
+    if get_node_cache(model_group):
+        volume_mounts.append(
             client.V1VolumeMount(
-                name="model-data",
-                mount_path=MODEL_MOUNT_PATH,
+                name="model-cache", mount_path=MODEL_CACHE_MOUNT_PATH, read_only=True
             )
+        )
+
+    container = create_downloader_container(
+        "model-peer",
+        [
+            client.V1EnvVar(name=downloader.MODE_ENV_VAR, value="serve"),
+            client.V1EnvVar(name=downloader.DEST_DIR_ENV_VAR, value=MODEL_MOUNT_PATH),
+            client.V1EnvVar(
+                name=downloader.PEER_PORT_ENV_VAR, value=str(MODEL_PEER_PORT)
+            ),
         ],
+        volume_mounts,
     )
+    container.ports = [
+        client.V1ContainerPort(container_port=MODEL_PEER_PORT, name="model-peer")
+    ]
+    return container
+
+
+def create_peer_service(
+    namespace: str, model_group: CloudModelGroup
+) -> client.V1Service:
+    """
+    Creates the headless Service through which new pods of a model group find their peers.
+
+    The Service resolves to the ready pods of the model group, which hold the
+    verified model files.
+    """
+    return client.V1Service(
+        api_version="v1",
+        kind="Service",
+        metadata=client.V1ObjectMeta(
+            name=get_peer_service_name(model_group.name),
+            namespace=namespace,
+        ),
+        spec=client.V1ServiceSpec(
+            cluster_ip="None",
+            selector={
+                "app": "model-group",
+                "model": model_group.name,
+            },
+            ports=[
+                client.V1ServicePort(
+                    name="tcp-model-peer",
+                    port=MODEL_PEER_PORT,
+                    target_port=MODEL_PEER_PORT,
+                ),
+            ],
+        ),
+    )
+
+
+def create_model_group_tolerations(
+    model_group: CloudModelGroup,
+) -> List[client.V1Toleration]:
+    return [
+        client.V1Toleration(
+            key="app",
+            value="model-group",
+            effect="NoSchedule",
+        ),
+        client.V1Toleration(
+            key="model",
+            value=model_group.name,
+            effect="NoSchedule",
+        ),
+    ]
+
+
+def get_model_volume_size(ctx: Context, model_group: CloudModelGroup) -> Optional[str]:
+    """
+    Returns the size limit of the model volume of a model group, or None if it has no limit.
+
+    A memory volume without an explicit size limit is sized after the model files in the
+    model store, with 10% headroom, rounded up to a whole MiB.
+    """
+    model_volume = model_group.modelVolume
+    if not model_volume:
+        return None
+    if model_volume.sizeLimit or model_volume.medium != "memory":
+        return model_volume.sizeLimit
+
+    store = get_model_store(ctx, with_progress_bar=False)
+    model_size = sum(
+        store.get_file_size(file) for file in store.glob(f"{model_group.name}/*")
+    )
+    if not model_size:
+        raise ValueError(
+            f"Model {model_group.name} is not in the model store, set the sizeLimit of its model volume."
+        )
+    return f"{math.ceil(model_size * 1.1 / 1024**2)}Mi"
+
+
+def create_model_volume(size_limit: Optional[str], medium: str) -> client.V1Volume:
+    """
+    Creates the volume that holds the model files.
+
+    The memory medium is a tmpfs. The nvme medium is a plain emptyDir, since the nodes of
+    the model group keep the kubelet directory on their instance store disks.
+    """
+    return client.V1Volume(
+        name="model-data",
+        empty_dir=client.V1EmptyDirVolumeSource(
+            medium="Memory" if medium == "memory" else None,
+            size_limit=size_limit,
+        ),
+    )
+
+
+def create_cache_volume() -> client.V1Volume:
+    return client.V1Volume(
+        name="model-cache",
+        host_path=client.V1HostPathVolumeSource(
+            path=MODEL_CACHE_HOST_PATH, type="DirectoryOrCreate"
+        ),
+    )
+
+
+def create_node_cache_agent(
+    ctx: Context, namespace: str, model_group: CloudModelGroup, node_cache: NodeCache
+) -> client.V1DaemonSet:
+    """
+    Creates a DaemonSet that manages the node cache on each node of a model group.
+
+    The DaemonSet keeps the cache within its disk budget by evicting the least
+    recently used files. With prefetch enabled, its pods first pull the runtime
+    image and download the model files into the cache, so a node is warm before
+    the autoscaler places a model group pod on it. A node is warm once the pod of
+    the DaemonSet on it is ready.
+
+    Args:
+        ctx (Context): The cluster context.
+        namespace (str): The namespace to create the DaemonSet in.
+        model_group (T_CloudModelGroup): The model group.
+        node_cache (NodeCache): The node cache of the model group.
+
+    Returns:
+        client.V1DaemonSet: The DaemonSet.
+    """
+    labels = {"app": "model-cache", "model": model_group.name}
+    volumes = [
+        create_cache_volume(),
+        # The evictor drops the leases of the pods that the kubelet no longer has
+        client.V1Volume(
+            name="kubelet-pods",
+            host_path=client.V1HostPathVolumeSource(
+                path=KUBELET_PODS_HOST_PATH, type="Directory"
+            ),
+        ),
+    ]
+    init_containers = []
+    if node_cache.prefetch:
+        # Pulls the runtime image onto the node. The container exits right away.
+        init_containers.append(
+            client.V1Container(
+                name="pull-runtime-image",
+                image=model_group.runtime.image,
+                command=["sh", "-c", "exit 0"],
+            )
+        )
+        # Downloads the model into the cache. The symlinks to the cached files are
+        # thrown away, so the files are not leased.
+        init_containers.append(
+            init_model_download(ctx, namespace, model_group, lease=False)
+        )
+        volumes.append(
+            client.V1Volume(
+                name="model-data",
+                empty_dir=client.V1EmptyDirVolumeSource(),
+            )
+        )
+
+    return client.V1DaemonSet(
+        api_version="apps/v1",
+        kind="DaemonSet",
+        metadata=client.V1ObjectMeta(
+            name=f"{kubify_name(model_group.name)}-cache",
+            namespace=namespace,
+        ),
+        spec=client.V1DaemonSetSpec(
+            selector=client.V1LabelSelector(match_labels=labels),
+            template=client.V1PodTemplateSpec(
+                metadata=client.V1ObjectMeta(
+                    labels=labels,
+                    annotations={"sidecar.istio.io/inject": "false"},
+                ),
+                spec=client.V1PodSpec(
+                    service_account_name=ACCESS_ALL_SA,
+                    node_selector={"app": "model-group", "model": model_group.name},
+                    tolerations=create_model_group_tolerations(model_group),
+                    volumes=volumes,
+                    init_containers=init_containers,
+                    containers=[
+                        create_downloader_container(
+                            "cache-evictor",
+                            [
+                                client.V1EnvVar(
+                                    name=downloader.MODE_ENV_VAR, value="evict"
+                                ),
+                                client.V1EnvVar(
+                                    name=downloader.PODS_DIR_ENV_VAR,
+                                    value=KUBELET_PODS_MOUNT_PATH,
+                                ),
+                                *create_cache_env_vars(node_cache),
+                            ],
+                            [
+                                client.V1VolumeMount(
+                                    name="model-cache",
+                                    mount_path=MODEL_CACHE_MOUNT_PATH,
+                                ),
+                                client.V1VolumeMount(
+                                    name="kubelet-pods",
+                                    mount_path=KUBELET_PODS_MOUNT_PATH,
+                                    read_only=True,
+                                ),
+                            ],
+                        )
+                    ],
+                ),
+            ),
+        ),
+    )
+
+
+def get_node_cache_states(namespace: str, model_group_name: str) -> Dict[str, str]:
+    """
+    Gets whether each node of a model group is warm or cold.
+
+    A node is warm when the node cache agent on it is ready, i.e. the runtime
+    image is pulled and the model files are in the cache when prefetch is enabled.
+
+    Args:
+        namespace (str): The namespace of the model group.
+        model_group_name (str): The name of the model group.
+
+    Returns:
+        Dict[str, str]: "warm" or "cold" keyed by node name.
+    """
+    v1 = client.CoreV1Api()
+    nodes = v1.list_node(label_selector=f"app=model-group,model={model_group_name}")
+    states = {
+        node.metadata.name: "cold"
+        for node in nodes.items
+        if node.metadata and node.metadata.name
+    }
+
+    pods = v1.list_namespaced_pod(
+        namespace, label_selector=f"app=model-cache,model={model_group_name}"
+    )
+    for pod in pods.items:
+        if pod.spec and pod.spec.node_name in states and pod.status:
+            if pod.status.conditions and is_ready_pod(pod):
+                states[pod.spec.node_name] = "warm"
+    return states
 
 
 def create_pod(
@@ -208,11 +675,44 @@ def create_pod(
         model_group.runtime.livenessProbe,
     )
 
+    node_cache = get_node_cache(model_group)
+    container_volume_mounts = create_volume_mounts(volume_mounts)
+    model_volume_size = get_model_volume_size(ctx, model_group)
+    model_volume_medium = (
+        model_group.modelVolume.medium if model_group.modelVolume else "disk"
+    )
+    volumes = [create_model_volume(model_volume_size, model_volume_medium)]
+    if node_cache:
+        # The model volume holds symlinks into the cache
+        container_volume_mounts.append(
+            client.V1VolumeMount(
+                name="model-cache", mount_path=MODEL_CACHE_MOUNT_PATH, read_only=True
+            )
+        )
+        volumes.append(create_cache_volume())
+
+    # The default llama.cpp command and the resource requests are sized after the model
+    # and the node
+    llama_cpp_plan = llama_cpp_cpu_plan = None
+    if (
+        is_llama_cpp_image(model_group.runtime.image)
+        and not model_group.runtime.command
+    ):
+        llama_cpp_plan = get_llama_cpp_plan(ctx, model_group)
+        llama_cpp_cpu_plan = get_llama_cpp_cpu_plan(ctx, model_group)
+    command = get_runtime_command(
+        ctx, model_group, port, llama_cpp_plan, llama_cpp_cpu_plan
+    )
+    # Without a command, the image entrypoint cannot be made to wait for the model
+    stream = uses_streaming_download(model_group) and bool(command)
+    if stream:
+        command = wait_for_model(command)
+
     container_args = {
         "name": f"{kubify_name(model_group.name)}",
         "image": model_group.runtime.image,
-        "command": get_runtime_command(ctx, model_group, port),
-        "volume_mounts": create_volume_mounts(volume_mounts),
+        "command": command,
+        "volume_mounts": container_volume_mounts,
         "env": create_env_vars(env, port),
         "ports": [client.V1ContainerPort(container_port=port)],
         "readiness_probe": create_probe(
@@ -223,14 +723,33 @@ def create_pod(
         ),
     }
 
+    if stream:
+        # The liveness probe must not restart the runtime while it waits for the model.
+        # Liveness checks start once the startup probe succeeds, up to an hour later.
+        container_args["startup_probe"] = client.V1Probe(
+            http_get=client.V1HTTPGetAction(path=live_probe_path, port=port),
+            period_seconds=5,
+            timeout_seconds=30,
+            failure_threshold=720,
+        )
+
     if model_group.resourceRequest:
         cpu_request = model_group.resourceRequest.cpu
         memory_request = model_group.resourceRequest.memory
+    elif llama_cpp_cpu_plan:
+        # Reserve the vCPUs the llama.cpp threads are sized for. No limits are set, so
+        # the pod is not Guaranteed and its cores are not pinned.
+        cpu_request = str(llama_cpp_cpu_plan.cpu_request)
+        memory_request = llama_cpp_plan.memory_request if llama_cpp_plan else f"1024Mi"
     else:
         # Set low resource requests to guarantee that the pod is scheduled.
         # This is fine as the pod will be able to use up to the node limit.
         cpu_request = f"1000m"
-        memory_request = f"1024Mi"
+        memory_request = llama_cpp_plan.memory_request if llama_cpp_plan else f"1024Mi"
+
+    if model_volume_medium == "memory" and model_volume_size:
+        # The files in a tmpfs are charged to the memory of the pod
+        memory_request = f"{(size_to_bytes(memory_request) + size_to_bytes(model_volume_size)) // 1024**2}Mi"
 
     resources = client.V1ResourceRequirements(
         requests={
@@ -255,6 +774,18 @@ def create_pod(
         if gpu_count > 1 and is_vllm_image(model_group.runtime.image):
             enable_host_ipc = True
 
+    containers = [client.V1Container(**container_args)]  # type: ignore
+    init_containers = []
+    if stream:
+        # The download container also serves the model to peers once it is done
+        containers.insert(0, init_model_download(ctx, namespace, model_group, True))
+    else:
+        if uses_peer_download(model_group):
+            containers.append(create_peer_container(model_group))
+        # Download models from s3 only when s3 is used as a model store
+        if model_group.model and model_group.model.useModelStore:
+            init_containers.append(init_model_download(ctx, namespace, model_group))
+
     return client.V1PodTemplateSpec(
         metadata=client.V1ObjectMeta(
             name=f"{kubify_name(model_group.name)}",
@@ -267,31 +798,10 @@ def create_pod(
         spec=client.V1PodSpec(
             host_ipc=enable_host_ipc,
             service_account_name=ACCESS_ALL_SA,
-            volumes=[
-                client.V1Volume(
-                    name="model-data",
-                    empty_dir=client.V1EmptyDirVolumeSource(),
-                )
-            ],
-            # Download models from s3 only when s3 is used as a model store
-            init_containers=(
-                [init_aws(ctx, model_group)]
-                if model_group.model and model_group.model.useModelStore
-                else []
-            ),
-            containers=[client.V1Container(**container_args)],  # type: ignore
-            tolerations=[
-                client.V1Toleration(
-                    key="app",
-                    value="model-group",
-                    effect="NoSchedule",
-                ),
-                client.V1Toleration(
-                    key="model",
-                    value=model_group.name,
-                    effect="NoSchedule",
-                ),
-            ],
+            volumes=volumes,
+            init_containers=init_containers,
+            containers=containers,
+            tolerations=create_model_group_tolerations(model_group),
             affinity=client.V1Affinity(
                 node_affinity=client.V1NodeAffinity(
                     required_during_scheduling_ignored_during_execution=client.V1NodeSelector(
@@ -475,6 +985,8 @@ def filter_services(namespace: str) -> List[client.V1Service]:
         and service.spec.selector
         and service.spec.selector.get("app") == "model-group"
         and service.spec.selector.get("model")
+        # Skip the headless peer services
+        and service.spec.cluster_ip != "None"
     ]
 
     return filtered_services
@@ -616,7 +1128,7 @@ def create_model_group_service(
                 name=model_group.name,
                 repo_id=model_group.model.hfRepoId,
                 files=model_group.model.files,
-                model_store=get_model_store(ctx),
+                model_store=get_model_store(ctx, resumable=True),
             )
             # If the model is not already in the model store, save it
             # That means users cannot update the model in the model store
@@ -637,12 +1149,19 @@ def create_model_group_service(
         port,
     )
 
+    node_cache = get_node_cache(model_group)
+    if node_cache:
+        apply_resource(create_node_cache_agent(ctx, namespace, model_group, node_cache))
+
     deployment = create_deployment(namespace, model_group, pod)
     apply_resource(deployment)
 
     svc = create_service(namespace, model_group, port)
     apply_resource(svc)
 
+    if uses_peer_download(model_group):
+        apply_resource(create_peer_service(namespace, model_group))
+
     if config.prometheus and config.prometheus.enabled:
         create_service_monitor(namespace, model_group)
 
@@ -687,9 +1206,31 @@ def cleanup_model_group_service_by_name(
         ),
     )
 
-    # Delete the service
+    # Delete the node cache agent of the model group, if any
+    try:
+        apps_v1_api.delete_namespaced_daemon_set(
+            name=f"{kubify_name(model_group_name)}-cache",
+            namespace=namespace,
+            body=client.V1DeleteOptions(),
+        )
+    except ApiException as e:
+        if e.status != 404:
+            raise
+
     core_v1_api = client.CoreV1Api()
 
+    # Delete the headless <group>-peers Service that pods fetch the model from, if
+    # peer download is enabled
+    try:
+        core_v1_api.delete_namespaced_service(
+            name=get_peer_service_name(model_group_name),
+            namespace=namespace,
+            body=client.V1DeleteOptions(),
+        )
+    except ApiException as e:
+        if e.status != 404:
+            raise
+
     # Delete the service
     core_v1_api.delete_namespaced_service(
         name=kubify_name(model_group_name),
@@ -225,7 +225,7 @@ def create_model_group_service(
                 name=model_group.name,
                 repo_id=model_group.model.hfRepoId,
                 files=model_group.model.files,
-                model_store=get_model_store(ctx),
+                model_store=get_model_store(ctx, resumable=True),
             )
             # If the model is not already in the model store, save it
             # That means users cannot update the model in the model store
@@ -193,6 +193,11 @@ def apply_resource(
         create_method: Callable[..., Any] = apps_v1_api.create_namespaced_deployment
         replace_method: Callable[..., Any] = apps_v1_api.replace_namespaced_deployment
         read_method: Callable[..., Any] = apps_v1_api.read_namespaced_deployment
+    elif kind == "DaemonSet":
+        apps_v1_api = client.AppsV1Api()
+        create_method = apps_v1_api.create_namespaced_daemon_set
+        replace_method = apps_v1_api.replace_namespaced_daemon_set
+        read_method = apps_v1_api.read_namespaced_daemon_set
     elif kind == "Service":
         core_v1_api = client.CoreV1Api()
         create_method = core_v1_api.create_namespaced_service
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import weakref
+from io import IOBase
+from typing import Any, Callable, List, TypeVar
+
+from paka.model.executor import get_max_transfers, get_transfer_executor
+from paka.model.store import ModelStore, RangeReader, StreamLike
+
+T = TypeVar("T")
+
+# One transfer semaphore per event loop, since a semaphore is bound to the loop it is used on
+_transfer_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
+
+def get_transfer_semaphore() -> asyncio.Semaphore:
+    """
+    Returns the semaphore that caps the file transfers of the running event loop.
+
+    Every model saved on the loop shares it, so the process transfers at most
+    `get_max_transfers()` files at once no matter how many models it saves.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _transfer_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(get_max_transfers())
+        _transfer_semaphores[loop] = semaphore
+    return semaphore
+
+
+async def run_blocking(func: Callable[..., T], *args: Any) -> T:
+    """
+    Runs a blocking call on the shared transfer executor.
+
+    Args:
+        func (Callable[..., T]): The blocking function.
+        *args (Any): The arguments of the function.
+
+    Returns:
+        T: The return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_transfer_executor(), functools.partial(func, *args)
+    )
+
+
+class AsyncModelStore:
+    """
+    An asyncio interface to a model store.
+
+    The S3 and HuggingFace clients that paka depends on are blocking, so each
+    store call runs on the shared transfer executor. The parts of a file are
+    transferred on the shared part executor. The event loop schedules the files
+    of all models, and one semaphore caps the files in flight.
+    """
+
+    def __init__(self, store: ModelStore) -> None:
+        self.store = store
+
+    async def transfer(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Runs a blocking file transfer once the transfer semaphore admits it.
+
+        Args:
+            func (Callable[..., T]): The blocking function that transfers a file.
+            *args (Any): The arguments of the function.
+
+        Returns:
+            T: The return value of the function.
+        """
+        async with get_transfer_semaphore():
+            return await run_blocking(func, *args)
+
+    async def save(self, path: str, data: bytes) -> None:
+        await run_blocking(self.store.save, path, data)
+
+    async def save_stream(
+        self, path: str, stream: StreamLike, total_size: int, sha256: str = ""
+    ) -> None:
+        await self.transfer(self.store.save_stream, path, stream, total_size, sha256)
+
+    async def save_ranges(
+        self, path: str, read_range: RangeReader, total_size: int, sha256: str = ""
+    ) -> None:
+        await self.transfer(
+            self.store.save_ranges, path, read_range, total_size, sha256
+        )
+
+    async def get_file_size(self, path: str) -> int:
+        return await run_blocking(self.store.get_file_size, path)
+
+    async def open_range(self, path: str, start: int, length: int) -> IOBase:
+        return await run_blocking(self.store.open_range, path, start, length)
+
+    async def file_exists(self, path: str, prefix_match: bool = False) -> bool:
+        return await run_blocking(self.store.file_exists, path, prefix_match)
+
+    async def delete_file(self, path: str) -> None:
+        await run_blocking(self.store.delete_file, path)
+
+    async def glob(self, path_pattern: str) -> List[str]:
+        return await run_blocking(self.store.glob, path_pattern)
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 
 from paka.logger import logger
+from paka.model.aio import AsyncModelStore, run_blocking
+from paka.model.checksum import PartLayout
 from paka.model.manifest import ModelFile, ModelManifest
+from paka.model.scheduler import TransferReport, TransferScheduler, TransferTask
 from paka.model.settings import ModelSettings
-from paka.model.store import ModelStore, StreamLike
+from paka.model.store import ModelStore, RangeReader, StreamLike
+from paka.model.telemetry import TransferSummary, TransferTelemetry, export_summary
 from paka.utils import to_yaml
 
+T = TypeVar("T")
+
 
 class BaseMLModel(ABC):
     def __init__(
@@ -19,11 +26,14 @@ class BaseMLModel(ABC):
         quantization: Optional[str],
         prompt_template_name: Optional[str],
         prompt_template_str: Optional[str],
-        # Max concurrency for saving model streams
-        concurrency: int = 1,
+        # Max number of files of this model saved at once. None leaves it to the transfer scheduler.
+        concurrency: Optional[int] = None,
+        scheduler: Optional[TransferScheduler] = None,
     ) -> None:
         self.name = name
         self.completed_files: List[Tuple[str, str]] = []
+        # The part layouts of the completed files keyed by file name
+        self.part_layouts: Dict[str, PartLayout] = {}
         self.settings = ModelSettings(
             quantization=quantization,
             prompt_template_name=prompt_template_name,
@@ -31,14 +41,19 @@ class BaseMLModel(ABC):
         )
 
         self.model_store = model_store
+        self.async_store = AsyncModelStore(model_store)
         self.concurrency = concurrency
+        self.scheduler = scheduler or TransferScheduler()
+        # The per-file and aggregate throughput of the last save
+        self.transfer_report: Optional[TransferReport] = None
+        self.transfer_summary: Optional[TransferSummary] = None
 
     def save_manifest_yml(self, manifest: Optional[ModelManifest] = None) -> None:
         if manifest is None:
             manifest = ModelManifest(
                 name=self.name,
                 files=[
-                    ModelFile(name=name, sha256=sha256)
+                    self._model_file(name, sha256)
                     for (name, sha256) in self.completed_files
                 ],
                 quantization=self.settings.quantization,
@@ -59,22 +74,99 @@ class BaseMLModel(ABC):
         model_store.save(file_path, manifest_yml.encode("utf-8"))
         logger.info(f"manifest.yml file saved to {file_path}")
 
-    @abstractmethod
     def save(self) -> None:
+        """
+        Saves the model to the model store. Blocks until all files are saved.
+
+        Must not be called from a running event loop. Await `asave` there instead.
+        """
+        asyncio.run(self.asave())
+
+    @abstractmethod
+    async def asave(self) -> None:
         pass
 
+    async def asave_files(
+        self,
+        save_file: Callable[[T], None],
+        items: List[T],
+        sizes: Optional[List[int]] = None,
+    ) -> None:
+        """
+        Saves the files of the model with the transfer scheduler and then writes the manifest.
+
+        The files of all models share the transfer limit of the event loop. A file
+        that fails is logged and left out of the manifest.
+
+        Args:
+            save_file (Callable[[T], None]): Saves a single file. It blocks and runs on the shared transfer executor.
+            items (List[T]): The files to save, as accepted by `save_file`.
+            sizes (List[int], optional): The size of each file, used to order the files. 0 if unknown.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency) if self.concurrency else None
+
+        def save(item: T) -> Callable[[], Awaitable[None]]:
+            async def run() -> None:
+                if semaphore is None:
+                    await self.async_store.transfer(save_file, item)
+                    return
+                async with semaphore:
+                    await self.async_store.transfer(save_file, item)
+
+            return run
+
+        self.transfer_report = await self.scheduler.run(
+            [
+                TransferTask(name=str(item), size=size, run=save(item))
+                for item, size in zip(items, sizes or [0] * len(items))
+            ]
+        )
+        if self.transfer_report.files:
+            logger.info(
+                f"Saved {len(self.transfer_report.files) - len(self.transfer_report.failed)} file(s) of "
+                f"{self.name} ({self.transfer_report.total_bytes / 1e6:.1f} MB) in "
+                f"{self.transfer_report.seconds:.1f}s at {self.transfer_report.mbps:.1f} MB/s."
+            )
+
+        await run_blocking(self.finish)
+
     def save_single_stream(
         self, path: str, stream: StreamLike, total_size: int, sha256: str = ""
     ) -> None:
         self.model_store.save_stream(path, stream, total_size, sha256)
+        self._complete_file(path, sha256)
+
+    def save_single_ranges(
+        self, path: str, read_range: RangeReader, total_size: int, sha256: str = ""
+    ) -> None:
+        self.model_store.save_ranges(path, read_range, total_size, sha256)
+        self._complete_file(path, sha256)
+
+    def _complete_file(self, path: str, sha256: str) -> None:
         fname = os.path.basename(path)
         self.completed_files.append((fname, sha256))
 
+        part_layout = self.model_store.get_part_layout(path)
+        if isinstance(part_layout, PartLayout):
+            self.part_layouts[fname] = part_layout
+
+    def _model_file(self, name: str, sha256: str) -> ModelFile:
+        part_layout = self.part_layouts.get(name)
+        if part_layout is None:
+            return ModelFile(name=name, sha256=sha256)
+        return ModelFile(
+            name=name,
+            sha256=sha256,
+            part_size=part_layout.part_size,
+            parts=part_layout.parts,
+        )
+
     def finish(self) -> None:
-        self.try_close_progress_bar()
+        self.try_close_telemetry()
         self.save_manifest_yml()
 
-    def try_close_progress_bar(self) -> None:
-        pb = getattr(self.model_store, "progress_bar", None)
-        if pb:
-            pb.close_progress_bar()
+    def try_close_telemetry(self) -> None:
+        telemetry = getattr(self.model_store, "telemetry", None)
+        if isinstance(telemetry, TransferTelemetry):
+            self.transfer_summary = telemetry.close()
+            export_summary(self.transfer_summary, f"paka-model-{self.name}")
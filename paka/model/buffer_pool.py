@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import concurrent.futures
+import io
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Union
+
+from paka.constants import UPLOAD_MEMORY_BUDGET_ENV_VAR
+
+# The default memory budget of the buffers shared by all uploads of the process
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+
+class BufferPool:
+    """
+    A pool of reusable fixed-size buffers bounded by a memory budget.
+
+    Buffers are handed out by `acquire` and returned by `release`. A released
+    buffer is reused by the next request of the same size. When the budget is
+    used up, `acquire` blocks until another buffer is released, so uploads wait
+    for memory instead of growing it.
+    """
+
+    _shared: Optional[BufferPool] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, budget: int = DEFAULT_MEMORY_BUDGET) -> None:
+        self.budget = budget
+        self.allocated = 0
+        self.free_buffers: Dict[int, List[bytearray]] = {}
+        self.condition = threading.Condition()
+
+    @classmethod
+    def shared(cls) -> BufferPool:
+        """
+        Returns the pool shared by all uploads of the process.
+
+        The budget is read from the PAKA_UPLOAD_MEMORY_BUDGET environment variable, in bytes.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                budget = int(
+                    os.environ.get(UPLOAD_MEMORY_BUDGET_ENV_VAR, DEFAULT_MEMORY_BUDGET)
+                )
+                cls._shared = cls(budget)
+            return cls._shared
+
+    def acquire(self, size: int) -> bytearray:
+        """
+        Takes a buffer of the given size from the pool, waiting for memory if needed.
+
+        A buffer larger than the whole budget is still handed out when no other
+        buffer is in use, so that a single upload always makes progress.
+
+        Args:
+            size (int): The size of the buffer.
+
+        Returns:
+            bytearray: The buffer. Its content is undefined.
+        """
+        with self.condition:
+            while True:
+                buffer = self._try_acquire(size)
+                if buffer is not None:
+                    return buffer
+                self.condition.wait()
+
+    def try_acquire(self, size: int) -> Optional[bytearray]:
+        """
+        Takes a buffer of the given size from the pool without waiting.
+
+        Returns:
+            Optional[bytearray]: The buffer, or None if the budget is used up.
+        """
+        with self.condition:
+            return self._try_acquire(size)
+
+    def release(self, buffer: bytearray) -> None:
+        """
+        Returns a buffer to the pool.
+        """
+        with self.condition:
+            self.free_buffers.setdefault(len(buffer), []).append(buffer)
+            self.condition.notify_all()
+
+    def release_when_done(
+        self, buffer: bytearray, *futures: concurrent.futures.Future
+    ) -> None:
+        """
+        Returns a buffer to the pool once all the given futures are done.
+
+        Args:
+            buffer (bytearray): The buffer.
+            futures (concurrent.futures.Future): The tasks that use the buffer.
+        """
+        lock = threading.Lock()
+        remaining = [len(futures)]
+
+        def done(future: concurrent.futures.Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            self.release(buffer)
+
+        for future in futures:
+            future.add_done_callback(done)
+
+    def _try_acquire(self, size: int) -> Optional[bytearray]:
+        free_buffers = self.free_buffers.get(size)
+        if free_buffers:
+            return free_buffers.pop()
+
+        # Give up idle buffers of other sizes before waiting for memory
+        while self.allocated + size > self.budget and self._drop_free_buffer():
+            pass
+
+        if self.allocated + size <= self.budget or self.allocated == 0:
+            self.allocated += size
+            return bytearray(size)
+        return None
+
+    def _drop_free_buffer(self) -> bool:
+        for size, free_buffers in self.free_buffers.items():
+            if free_buffers:
+                free_buffers.pop()
+                self.allocated -= size
+                return True
+        return False
+
+
+class IterReader(io.RawIOBase):
+    """
+    A readable stream over an iterator of byte chunks.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self.chunks = chunks
+        self.pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:  # type: ignore[override]
+        while not self.pending:
+            chunk = next(self.chunks, b"")
+            if not chunk:
+                return 0
+            self.pending = memoryview(chunk)
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+class BufferReader(io.RawIOBase):
+    """
+    A seekable readable stream over a buffer, without copying the buffer.
+    """
+
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview]) -> None:
+        self.view = memoryview(buffer)
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:  # type: ignore[override]
+        size = max(0, min(len(buffer), len(self.view) - self.position))
+        buffer[:size] = self.view[self.position : self.position + size]
+        self.position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+
+def fill_buffer(stream: io.RawIOBase, buffer: memoryview) -> int:
+    """
+    Reads from a stream into a buffer until the buffer is full or the stream ends.
+
+    Args:
+        stream (io.RawIOBase): A stream that supports `readinto`.
+        buffer (memoryview): The buffer to fill.
+
+    Returns:
+        int: The number of bytes read. Less than the size of the buffer only if the stream ended.
+    """
+    filled = 0
+    while filled < len(buffer):
+        n = stream.readinto(buffer[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import base64
+import concurrent.futures
+import hashlib
+from dataclasses import dataclass
+from typing import List, Union
+
+
+@dataclass
+class PartLayout:
+    """
+    The layout of the parts a model file was uploaded in.
+
+    Attributes:
+        part_size (int): The size of every part except the last one.
+        parts (List[str]): The hex SHA256 hash of each part, in part order.
+    """
+
+    part_size: int
+    parts: List[str]
+
+
+def to_s3_checksum(sha256: str) -> str:
+    """
+    Converts a hex SHA256 hash to the base64 form that S3 uses for checksums.
+    """
+    return base64.b64encode(bytes.fromhex(sha256)).decode("ascii")
+
+
+def from_s3_checksum(checksum: str) -> str:
+    """
+    Converts a base64 S3 checksum to a hex SHA256 hash.
+    """
+    return base64.b64decode(checksum).hex()
+
+
+class OrderedHasher:
+    """
+    Computes the SHA256 hash of a file on a dedicated thread.
+
+    Chunks are hashed in the order they are passed to `update`, so the caller
+    can hand over a chunk and keep reading the next one. hashlib releases the GIL
+    while hashing large chunks, so hashing overlaps with reads and uploads.
+
+    The whole-file hash is still a serial pass over every byte, and the upload
+    workers hash each part a second time for its S3 checksum. The whole-file hash
+    cannot be derived from the part hashes. It is what the HuggingFace LFS hash
+    is checked against, and it is the key of the content index and the node cache.
+    An S3 composite checksum, a hash of the part hashes, could replace neither.
+    The serial pass only bounds the upload once hashing is slower than the network.
+    """
+
+    def __init__(self) -> None:
+        self.sha256 = hashlib.sha256()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def update(self, data: Union[bytes, memoryview]) -> concurrent.futures.Future:
+        """
+        Queues a chunk to be hashed.
+
+        Args:
+            data (bytes | memoryview): The chunk. It must not change until the returned future is done.
+
+        Returns:
+            concurrent.futures.Future: Done once the chunk is hashed.
+        """
+        return self.executor.submit(self.sha256.update, data)
+
+    def hexdigest(self) -> str:
+        """
+        Waits for the queued chunks and returns the SHA256 hash of all of them.
+        """
+        self.executor.shutdown(wait=True)
+        return self.sha256.hexdigest()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
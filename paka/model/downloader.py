@@ -0,0 +1,894 @@
+"""
+Downloads the files of a model from S3 into a local directory.
+
+This module runs as the init container of model group pods, so it only depends
+on the standard library, boto3 and PyYAML. Its source is passed to the
+container as is, it must not import anything from paka.
+
+The files listed in the manifest.yml of the model are fetched with parallel
+ranged GETs. Every file is preallocated and each range is written at its
+offset as it streams in, so no range is buffered in memory. Ranges that match
+the part layout recorded in the manifest are verified against their part
+hashes as they are written. Files without a part layout are hashed once they
+are complete. A summary of the download is printed as a JSON line.
+
+With a node cache directory, verified files are kept on the node under their
+SHA256 hash and the model directory only holds symlinks to them, so a pod that
+lands on a node which already has the model skips the download. The same
+script run in evict mode keeps the cache within its disk budget by removing
+the least recently used files. Each pod leases the files it links, so that its
+runtime never restarts onto dangling links. A lease lasts as long as the
+kubelet keeps the directory of the pod.
+
+In serve mode, the script serves byte ranges of a downloaded model to peers,
+so that new pods of a model group can fetch the model from running pods
+instead of all fetching it from S3. Every range from a peer is checked against
+the part hashes of the manifest and fetched from S3 if it does not match.
+
+In stream mode, the script runs as a regular container next to the runtime
+instead of as an init container, so that the runtime image is pulled and
+started while the model downloads. The progress of each file is published to
+.paka-progress.json and manifest.yml is written only once every file is
+verified, which is what the runtime waits for. The script then keeps serving
+the model to peers.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import http.server
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import boto3
+import yaml
+from botocore.client import Config
+
+# Environment variables read by `main`
+BUCKET_ENV_VAR = "PAKA_MODEL_BUCKET"
+PREFIX_ENV_VAR = "PAKA_MODEL_PREFIX"
+DEST_DIR_ENV_VAR = "PAKA_MODEL_DEST_DIR"
+MAX_WORKERS_ENV_VAR = "PAKA_DOWNLOAD_WORKERS"
+PART_SIZE_ENV_VAR = "PAKA_DOWNLOAD_PART_SIZE"
+SUMMARY_PATH_ENV_VAR = "PAKA_TRANSFER_SUMMARY_PATH"
+CACHE_DIR_ENV_VAR = "PAKA_MODEL_CACHE_DIR"
+CACHE_BUDGET_ENV_VAR = "PAKA_MODEL_CACHE_BUDGET"
+# The host and port of the headless Service of the peers
+PEERS_ENV_VAR = "PAKA_MODEL_PEERS"
+PEER_PORT_ENV_VAR = "PAKA_PEER_PORT"
+# "download", "evict" or "serve"
+MODE_ENV_VAR = "PAKA_DOWNLOADER_MODE"
+# The UID of the pod, which leases the cached files it links
+POD_UID_ENV_VAR = "PAKA_POD_UID"
+# The directory where the kubelet keeps a directory for each pod of the node, by UID
+PODS_DIR_ENV_VAR = "PAKA_KUBELET_PODS_DIR"
+
+DEFAULT_MAX_WORKERS = 32
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+
+# Size of the reads from a response body
+READ_SIZE = 1024 * 1024
+
+# Attempts of a range before the download fails
+MAX_ATTEMPTS = 3
+
+DEFAULT_PEER_PORT = 8900
+# Seconds to wait on a peer before falling back to S3
+PEER_TIMEOUT = 30
+PEER_SHIFT = uuid.uuid4().int % 1024
+
+MANIFEST_FILE = "manifest.yml"
+
+# The progress of a download, published next to the model files
+PROGRESS_FILE = ".paka-progress.json"
+# Seconds between two updates of the progress file
+PROGRESS_INTERVAL = 0.5
+
+# Layout of the node cache. Blobs are keyed by SHA256 hash, as in the content
+# index of the model store.
+CACHE_BLOB_DIR = "blobs/sha256"
+CACHE_TMP_DIR = "tmp"
+# The hashes of the files linked by each pod, in a file named after the pod UID
+CACHE_LEASE_DIR = "leases"
+
+# Seconds after which an unchanged temporary file of the cache is an abandoned download
+CACHE_TMP_TTL = 3600
+
+# Seconds between two eviction passes
+EVICT_INTERVAL = 60
+
+
+@dataclass
+class FileReport:
+    name: str
+    size: int
+    seconds: float = 0.0
+    retries: int = 0
+    # Whether the file was verified part by part, as a whole or found in the node cache,
+    # or "none" if the manifest has no hash of it
+    verified_by: str = "sha256"
+
+    @property
+    def mbps(self) -> float:
+        return self.size / self.seconds / 1e6 if self.seconds > 0 else 0.0
+
+
+@dataclass
+class DownloadReport:
+    bytes: int = 0
+    # The bytes served by peers instead of S3
+    peer_bytes: int = 0
+    seconds: float = 0.0
+    # The breakdown of `seconds`: reading the manifest and sizing the files,
+    # fetching the ranges, and hashing the files without a part layout
+    manifest_seconds: float = 0.0
+    transfer_seconds: float = 0.0
+    verify_seconds: float = 0.0
+    files: List[FileReport] = field(default_factory=list)
+
+    @property
+    def mbps(self) -> float:
+        return self.bytes / self.seconds / 1e6 if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["mbps"] = self.mbps
+        for file, report in zip(data["files"], self.files):
+            file["mbps"] = report.mbps
+        return data
+
+
+class FileDownload:
+    """
+    The state of the download of a single file.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        key: str,
+        dest_path: str,
+        size: int,
+        entry: Dict[str, Any],
+        cache_dir: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.key = key
+        self.dest_path = dest_path
+        self.size = size
+        self.sha256: str = entry["sha256"]
+        self.part_size: Optional[int] = entry.get("part_size")
+        self.parts: Optional[List[str]] = entry.get("parts")
+        # Use the part layout only if it covers the file exactly
+        if (
+            not self.part_size
+            or not self.parts
+            or len(self.parts) != -(-size // self.part_size)
+        ):
+            self.part_size = None
+            self.parts = None
+        self.cache_dir = cache_dir
+        # The file that the ranges are written to
+        self.path = (
+            os.path.join(cache_dir, CACHE_TMP_DIR, f"{self.sha256}.{uuid.uuid4().hex}")
+            if cache_dir
+            else dest_path
+        )
+        self.fd = -1
+        self.remaining = 0
+        self.retries = 0
+        self.started_at = 0.0
+        # All bytes before the watermark are written
+        self.watermark = 0
+        # The end of each written range after the watermark, keyed by its start
+        self.written: Dict[int, int] = {}
+        self.verified = False
+
+    def complete_range(self, start: int, end: int) -> None:
+        self.written[start] = end
+        while self.watermark in self.written:
+            self.watermark = self.written.pop(self.watermark)
+
+    def ranges(self, default_part_size: int) -> List[Tuple[int, int, Optional[str]]]:
+        """
+        Returns the ranges to fetch as (start, end, expected SHA256 hash or None).
+        """
+        if self.parts is not None and self.part_size is not None:
+            return [
+                (start, min(start + self.part_size, self.size), self.parts[i])
+                for i, start in enumerate(range(0, self.size, self.part_size))
+            ]
+        return [
+            (start, min(start + default_part_size, self.size), None)
+            for start in range(0, self.size, default_part_size)
+        ]
+
+
+class ProgressWriter:
+    """
+    Publishes the progress of a download to a JSON file.
+
+    For each file, the file records its size, its watermark, below which all
+    bytes are written, and whether it is verified. The file is replaced
+    atomically at most every PROGRESS_INTERVAL seconds.
+    """
+
+    def __init__(self, path: str, downloads: List[FileDownload]) -> None:
+        self.path = path
+        self.downloads = downloads
+        self.written_at = 0.0
+
+    def write(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self.written_at < PROGRESS_INTERVAL:
+            return
+        self.written_at = now
+        progress = {
+            "bytes": sum(d.watermark for d in self.downloads),
+            "total": sum(d.size for d in self.downloads),
+            "files": {
+                d.name: {
+                    "size": d.size,
+                    "watermark": d.watermark,
+                    "verified": d.verified,
+                }
+                for d in self.downloads
+            },
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, self.path)
+
+
+def blob_path(cache_dir: str, sha256: str) -> str:
+    return os.path.join(cache_dir, CACHE_BLOB_DIR, sha256)
+
+
+def link_file(target: str, link_path: str) -> None:
+    """
+    Points `link_path` at `target`, replacing whatever is at `link_path`.
+    """
+    tmp_path = f"{link_path}.{uuid.uuid4().hex}"
+    os.symlink(target, tmp_path)
+    os.replace(tmp_path, link_path)
+
+
+def lookup_cache(cache_dir: str, sha256: str, size: int) -> Optional[str]:
+    """
+    Returns the cached file with the given hash and size, marking it as recently used.
+    """
+    path = blob_path(cache_dir, sha256)
+    try:
+        if os.stat(path).st_size != size:
+            return None
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def write_lease(cache_dir: str, pod_uid: str, hashes: Iterable[str]) -> None:
+    """
+    Leases the cached files with the given hashes to a pod, so that they are not evicted
+    while the pod links them.
+    """
+    lease_dir = os.path.join(cache_dir, CACHE_LEASE_DIR)
+    os.makedirs(lease_dir, exist_ok=True)
+    tmp_path = os.path.join(lease_dir, f".{pod_uid}.{uuid.uuid4().hex}")
+    with open(tmp_path, "w") as f:
+        json.dump(sorted(set(hashes)), f)
+    os.replace(tmp_path, os.path.join(lease_dir, pod_uid))
+
+
+def read_leases(cache_dir: str, pods_dir: Optional[str] = None) -> Set[str]:
+    """
+    Returns the hashes of the cached files leased by pods.
+
+    Args:
+        cache_dir (str): The cache directory.
+        pods_dir (str, optional): The directory of the pods of the node. The leases of pods
+            that no longer have a directory there are removed. Without it, every lease holds.
+
+    Returns:
+        Set[str]: The leased hashes.
+    """
+    lease_dir = os.path.join(cache_dir, CACHE_LEASE_DIR)
+    leased: Set[str] = set()
+    for name in os.listdir(lease_dir) if os.path.isdir(lease_dir) else []:
+        # Leases being written
+        if name.startswith("."):
+            continue
+        path = os.path.join(lease_dir, name)
+        if pods_dir is not None and not os.path.isdir(os.path.join(pods_dir, name)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                leased.update(json.load(f))
+        except (FileNotFoundError, ValueError):
+            pass
+    return leased
+
+
+def evict_cache(
+    cache_dir: str,
+    budget: int,
+    keep: Tuple[str, ...] = (),
+    pods_dir: Optional[str] = None,
+) -> List[str]:
+    """
+    Removes the least recently used files of a node cache until it fits its budget.
+
+    Files leased by a pod are never removed, the pod links them and its runtime
+    may restart at any time.
+
+    Args:
+        cache_dir (str): The cache directory.
+        budget (int): The disk budget of the cache, in bytes.
+        keep (Tuple[str, ...], optional): The hashes of the files that must not be removed.
+        pods_dir (str, optional): The directory of the pods of the node, to expire the leases
+            of the pods that are gone.
+
+    Returns:
+        List[str]: The hashes of the removed files.
+    """
+    keep_hashes = set(keep) | read_leases(cache_dir, pods_dir)
+    now = time.time()
+    tmp_dir = os.path.join(cache_dir, CACHE_TMP_DIR)
+    for name in os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else []:
+        path = os.path.join(tmp_dir, name)
+        try:
+            stat = os.stat(path)
+            if now - stat.st_mtime > CACHE_TMP_TTL:
+                os.remove(path)
+            else:
+                # Space held by downloads in progress counts against the budget
+                budget -= stat.st_blocks * 512
+        except FileNotFoundError:
+            pass
+
+    blob_dir = os.path.join(cache_dir, CACHE_BLOB_DIR)
+    blobs = []
+    for name in os.listdir(blob_dir) if os.path.isdir(blob_dir) else []:
+        try:
+            stat = os.stat(os.path.join(blob_dir, name))
+        except FileNotFoundError:
+            continue
+        blobs.append((stat.st_mtime, stat.st_size, name))
+
+    total = sum(size for _, size, _ in blobs)
+    evicted = []
+    for _, size, name in sorted(blobs):
+        if total <= budget:
+            break
+        if name in keep_hashes:
+            continue
+        try:
+            os.remove(os.path.join(blob_dir, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+        evicted.append(name)
+        print(f"Evicted {name} ({size / 1e6:.1f} MB) from the node cache", flush=True)
+    return evicted
+
+
+def run_evictor(
+    cache_dir: str,
+    budget: int,
+    interval: int = EVICT_INTERVAL,
+    pods_dir: Optional[str] = None,
+) -> None:
+    while True:
+        evict_cache(cache_dir, budget, pods_dir=pods_dir)
+        time.sleep(interval)
+
+
+def read_manifest(s3: Any, bucket: str, prefix: str) -> Dict[str, Any]:
+    response = s3.get_object(Bucket=bucket, Key=f"{prefix}/{MANIFEST_FILE}")
+    return yaml.safe_load(response["Body"].read())
+
+
+def preallocate(fd: int, size: int) -> None:
+    if size == 0:
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        os.ftruncate(fd, size)
+
+
+def write_range(
+    download: FileDownload,
+    chunks: Iterable[bytes],
+    start: int,
+    end: int,
+    expected_sha256: Optional[str],
+) -> None:
+    """
+    Writes the chunks of the bytes [start, end) of a file at their offset.
+
+    Raises:
+        Exception: If the range is short or does not match its part hash.
+    """
+    sha256 = hashlib.sha256()
+    offset = start
+    for chunk in chunks:
+        view = memoryview(chunk)
+        while view:
+            written = os.pwrite(download.fd, view, offset)
+            offset += written
+            view = view[written:]
+        if expected_sha256 is not None:
+            sha256.update(chunk)
+
+    if offset != end:
+        raise Exception(
+            f"Expected {end - start} bytes for range {start}-{end} of {download.key}, got {offset - start}"
+        )
+    if expected_sha256 is not None and sha256.hexdigest() != expected_sha256:
+        raise Exception(
+            f"SHA256 hash of range {start}-{end} of {download.key} does not match the manifest"
+        )
+
+
+def fetch_range_from_peer(
+    peer: str,
+    download: FileDownload,
+    start: int,
+    end: int,
+    expected_sha256: str,
+) -> bool:
+    """
+    Fetches the bytes [start, end) of a file from a peer and writes them at their offset.
+
+    Returns:
+        bool: Whether the peer served the range and the range matches its part hash.
+    """
+    request = urllib.request.Request(
+        f"http://{peer}/{urllib.parse.quote(download.name)}",
+        headers={"Range": f"bytes={start}-{end - 1}"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=PEER_TIMEOUT) as response:
+            if response.status != 206:
+                return False
+            chunks = iter(lambda: response.read(READ_SIZE), b"")
+            write_range(download, chunks, start, end, expected_sha256)
+        return True
+    except Exception:
+        return False
+
+
+def fetch_range(
+    s3: Any,
+    bucket: str,
+    download: FileDownload,
+    start: int,
+    end: int,
+    expected_sha256: Optional[str],
+    peers: Sequence[str] = (),
+) -> Tuple[int, bool]:
+    """
+    Fetches the bytes [start, end) of a file and writes them at their offset.
+
+    Ranges with a part hash are fetched from a peer first. S3 is the fallback
+    for ranges that no peer serves correctly.
+
+    Returns:
+        Tuple[int, bool]: The number of retried attempts, and whether a peer served the range.
+
+    Raises:
+        Exception: If the range is short or does not match its part hash after all attempts.
+    """
+    if peers and expected_sha256 is not None:
+        # Spread the ranges of a file over the peers, starting at a different peer in each pod
+        peer = peers[(start // (end - start or 1) + PEER_SHIFT) % len(peers)]
+        if fetch_range_from_peer(peer, download, start, end, expected_sha256):
+            return 0, True
+
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            response = s3.get_object(
+                Bucket=bucket, Key=download.key, Range=f"bytes={start}-{end - 1}"
+            )
+            write_range(
+                download,
+                response["Body"].iter_chunks(READ_SIZE),
+                start,
+                end,
+                expected_sha256,
+            )
+            return attempt, False
+        except Exception:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+    return MAX_ATTEMPTS - 1, False
+
+
+def resolve_peers(address: str) -> List[str]:
+    """
+    Resolves the peers behind a headless Service.
+
+    Args:
+        address (str): The host and port of the Service.
+
+    Returns:
+        List[str]: The host and port of each ready peer. Empty if the Service cannot be resolved.
+    """
+    host, port = address.rsplit(":", 1)
+    try:
+        infos = socket.getaddrinfo(host, int(port), proto=socket.IPPROTO_TCP)
+    except OSError:
+        return []
+    return sorted({f"{info[4][0]}:{port}" for info in infos})
+
+
+class PeerRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves byte ranges of the verified model files to peers.
+    """
+
+    # Set by `serve_model`
+    model_dir = ""
+    file_names: Set[str] = set()
+
+    def do_GET(self) -> None:
+        name = urllib.parse.unquote(self.path.lstrip("/"))
+        match = re.match(r"^bytes=(\d+)-(\d+)$", self.headers.get("Range", ""))
+        if name not in self.file_names or not match:
+            self.send_error(404 if name not in self.file_names else 416)
+            return
+
+        with open(os.path.join(self.model_dir, name), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            start, last = int(match.group(1)), min(int(match.group(2)), size - 1)
+            if start > last:
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{last}/{size}")
+            self.send_header("Content-Length", str(last - start + 1))
+            self.end_headers()
+            self.wfile.flush()
+            self.connection.sendfile(f, start, last - start + 1)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def serve_model(model_dir: str, port: int) -> http.server.ThreadingHTTPServer:
+    """
+    Creates a server of the files of a downloaded model to its peers.
+
+    Only the files listed in the manifest of the model directory are served. The
+    manifest is written after all files are verified.
+    """
+    with open(os.path.join(model_dir, MANIFEST_FILE)) as f:
+        manifest = yaml.safe_load(f)
+
+    handler = type(
+        "ModelRequestHandler",
+        (PeerRequestHandler,),
+        {
+            "model_dir": model_dir,
+            "file_names": {entry["name"] for entry in manifest["files"]},
+        },
+    )
+    return http.server.ThreadingHTTPServer(("", port), handler)
+
+
+def hash_file(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def download_model(
+    s3: Any,
+    bucket: str,
+    prefix: str,
+    dest_dir: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    part_size: int = DEFAULT_PART_SIZE,
+    cache_dir: Optional[str] = None,
+    cache_budget: Optional[int] = None,
+    peers: Sequence[str] = (),
+    progress: bool = False,
+    pod_uid: Optional[str] = None,
+) -> DownloadReport:
+    """
+    Downloads the files listed in the manifest of a model and the manifest itself.
+
+    With a cache directory, files are looked up in and downloaded into the node
+    cache, and `dest_dir` gets symlinks to the cached files.
+
+    Args:
+        s3: The S3 client.
+        bucket (str): The bucket of the model store.
+        prefix (str): The key prefix of the model, e.g. models/<model name>.
+        dest_dir (str): The directory to write the files to.
+        max_workers (int, optional): The number of ranges fetched at once over all files.
+        part_size (int, optional): The size of the ranges of files without a part layout.
+        cache_dir (str, optional): The node cache directory.
+        cache_budget (int, optional): The disk budget of the node cache, in bytes. Least recently
+            used files are evicted to make room for the download.
+        peers (Sequence[str], optional): The host and port of the peers that serve the model.
+            Only the ranges that can be checked against a part hash are fetched from peers.
+        progress (bool, optional): Whether to publish the progress of the download to
+            PROGRESS_FILE in `dest_dir`. The manifest is written to `dest_dir` only after all
+            files are verified, so it marks the end of the download.
+        pod_uid (str, optional): The UID of the pod, which leases the cached files it links.
+
+    Returns:
+        DownloadReport: The timing of the download.
+
+    Raises:
+        Exception: If a file cannot be fetched or does not match the manifest.
+    """
+    started_at = time.monotonic()
+    manifest = read_manifest(s3, bucket, prefix)
+    os.makedirs(dest_dir, exist_ok=True)
+
+    # Files without a hash, such as config.json, cannot be keyed in the cache and are
+    # written to `dest_dir` directly
+    cache_keys = [entry["sha256"] for entry in manifest["files"] if entry["sha256"]]
+    if cache_dir:
+        os.makedirs(os.path.join(cache_dir, CACHE_BLOB_DIR), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, CACHE_TMP_DIR), exist_ok=True)
+        # Leased before the files are looked up, so none is evicted once it is found
+        if pod_uid:
+            write_lease(cache_dir, pod_uid, cache_keys)
+
+    report = DownloadReport()
+    files: Dict[str, FileReport] = {}
+    downloads = []
+    for entry in manifest["files"]:
+        key = f"{prefix}/{entry['name']}"
+        size = s3.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        dest_path = os.path.join(dest_dir, entry["name"])
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+        file_cache_dir = cache_dir if entry["sha256"] else None
+        cached_path = (
+            lookup_cache(file_cache_dir, entry["sha256"], size)
+            if file_cache_dir
+            else None
+        )
+        if cached_path is not None:
+            link_file(cached_path, dest_path)
+            files[entry["name"]] = FileReport(
+                name=entry["name"], size=size, verified_by="cache"
+            )
+            print(f"Found {entry['name']} in the node cache", flush=True)
+            continue
+        downloads.append(
+            FileDownload(entry["name"], key, dest_path, size, entry, file_cache_dir)
+        )
+    # Start the largest files first so that they do not finish last on their own
+    downloads.sort(key=lambda d: d.size, reverse=True)
+
+    if cache_dir and cache_budget is not None and downloads:
+        evict_cache(
+            cache_dir,
+            cache_budget - sum(d.size for d in downloads if d.cache_dir),
+            keep=tuple(cache_keys),
+        )
+
+    report.manifest_seconds = time.monotonic() - started_at
+    progress_writer = (
+        ProgressWriter(os.path.join(dest_dir, PROGRESS_FILE), downloads)
+        if progress
+        else None
+    )
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures: Dict[concurrent.futures.Future, Tuple[FileDownload, int, int]] = {}
+        for download in downloads:
+            download.fd = os.open(
+                download.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644
+            )
+            preallocate(download.fd, download.size)
+            download.started_at = time.monotonic()
+            ranges = download.ranges(part_size)
+            download.remaining = len(ranges)
+            for start, end, expected_sha256 in ranges:
+                future = executor.submit(
+                    fetch_range,
+                    s3,
+                    bucket,
+                    download,
+                    start,
+                    end,
+                    expected_sha256,
+                    peers,
+                )
+                futures[future] = (download, start, end)
+
+        for download in downloads:
+            if download.remaining == 0:
+                files[download.name] = finish_file(download)
+
+        hashes: Dict[concurrent.futures.Future, FileDownload] = {}
+        for future in concurrent.futures.as_completed(futures):
+            download, start, end = futures[future]
+            retries, from_peer = future.result()
+            download.retries += retries
+            if from_peer:
+                report.peer_bytes += end - start
+            download.complete_range(start, end)
+            if progress_writer is not None:
+                progress_writer.write()
+            download.remaining -= 1
+            if download.remaining > 0:
+                continue
+            os.fsync(download.fd)
+            # Files without an LFS hash, such as config.json, have no hash to check
+            if download.parts is not None or not download.sha256:
+                files[download.name] = finish_file(download)
+            else:
+                hashes[executor.submit(hash_file, download.path)] = download
+
+        report.transfer_seconds = (
+            time.monotonic() - started_at - report.manifest_seconds
+        )
+        for future in concurrent.futures.as_completed(hashes):
+            download = hashes[future]
+            if future.result() != download.sha256:
+                raise Exception(
+                    f"SHA256 hash of {download.key} does not match the manifest"
+                )
+            files[download.name] = finish_file(download)
+    finally:
+        executor.shutdown(wait=True)
+        for download in downloads:
+            if download.fd >= 0:
+                os.close(download.fd)
+                download.fd = -1
+            # Drop the partial downloads of a failed run from the cache
+            if download.cache_dir and os.path.exists(download.path):
+                os.remove(download.path)
+
+    if progress_writer is not None:
+        progress_writer.write(force=True)
+
+    # Written last and atomically, peers and runtimes wait for it
+    tmp_path = os.path.join(dest_dir, f".{MANIFEST_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        yaml.safe_dump(manifest, f)
+    os.replace(tmp_path, os.path.join(dest_dir, MANIFEST_FILE))
+
+    report.files = [files[entry["name"]] for entry in manifest["files"]]
+    report.bytes = sum(download.size for download in downloads)
+    report.seconds = time.monotonic() - started_at
+    report.verify_seconds = max(
+        0.0, report.seconds - report.manifest_seconds - report.transfer_seconds
+    )
+    return report
+
+
+def finish_file(download: FileDownload) -> FileReport:
+    download.verified = True
+    if (
+        download.size == 0
+        and download.sha256
+        and download.sha256 != hashlib.sha256().hexdigest()
+    ):
+        raise Exception(f"SHA256 hash of {download.key} does not match the manifest")
+    if download.cache_dir:
+        # Only verified files enter the cache
+        cached_path = blob_path(download.cache_dir, download.sha256)
+        os.replace(download.path, cached_path)
+        link_file(cached_path, download.dest_path)
+    report = FileReport(
+        name=download.name,
+        size=download.size,
+        seconds=time.monotonic() - download.started_at,
+        retries=download.retries,
+        verified_by=(
+            "parts"
+            if download.parts is not None
+            else "sha256" if download.sha256 else "none"
+        ),
+    )
+    print(
+        f"Downloaded {report.name} ({report.size / 1e6:.1f} MB) in {report.seconds:.1f}s "
+        f"at {report.mbps:.1f} MB/s",
+        flush=True,
+    )
+    return report
+
+
+def main() -> None:
+    cache_dir = os.environ.get(CACHE_DIR_ENV_VAR)
+    cache_budget = (
+        int(os.environ[CACHE_BUDGET_ENV_VAR])
+        if CACHE_BUDGET_ENV_VAR in os.environ
+        else None
+    )
+    mode = os.environ.get(MODE_ENV_VAR)
+    if mode == "evict":
+        assert cache_dir and cache_budget is not None
+        run_evictor(cache_dir, cache_budget, pods_dir=os.environ.get(PODS_DIR_ENV_VAR))
+        return
+    if mode == "serve":
+        port = int(os.environ.get(PEER_PORT_ENV_VAR, DEFAULT_PEER_PORT))
+        serve_model(os.environ[DEST_DIR_ENV_VAR], port).serve_forever()
+        return
+
+    # In stream mode, the downloader runs next to the runtime, which waits for the
+    # manifest. A restarted container finds the manifest and skips the download.
+    stream = mode == "stream"
+    dest_dir = os.environ[DEST_DIR_ENV_VAR]
+    if not (stream and os.path.exists(os.path.join(dest_dir, MANIFEST_FILE))):
+        download(dest_dir, cache_dir, cache_budget, progress=stream)
+    if not stream:
+        return
+
+    if PEER_PORT_ENV_VAR in os.environ:
+        serve_model(dest_dir, int(os.environ[PEER_PORT_ENV_VAR])).serve_forever()
+    else:
+        threading.Event().wait()
+
+
+def download(
+    dest_dir: str,
+    cache_dir: Optional[str],
+    cache_budget: Optional[int],
+    progress: bool,
+) -> None:
+    max_workers = int(os.environ.get(MAX_WORKERS_ENV_VAR, DEFAULT_MAX_WORKERS))
+    s3 = boto3.client(
+        "s3",
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=max_workers,
+            retries={"max_attempts": 5, "mode": "adaptive"},
+        ),
+    )
+    report = download_model(
+        s3,
+        os.environ[BUCKET_ENV_VAR],
+        os.environ[PREFIX_ENV_VAR],
+        dest_dir,
+        max_workers,
+        int(os.environ.get(PART_SIZE_ENV_VAR, DEFAULT_PART_SIZE)),
+        cache_dir,
+        cache_budget,
+        resolve_peers(os.environ[PEERS_ENV_VAR]) if PEERS_ENV_VAR in os.environ else [],
+        progress,
+        os.environ.get(POD_UID_ENV_VAR),
+    )
+    summary = json.dumps(report.to_dict())
+    print(summary, flush=True)
+
+    summary_path = os.environ.get(SUMMARY_PATH_ENV_VAR)
+    if summary_path:
+        with open(summary_path, "w") as f:
+            f.write(summary)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Model download failed: {e}", file=sys.stderr, flush=True)
+        sys.exit(1)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import threading
+from typing import Iterable, Optional
+
+from paka.constants import MAX_PART_WORKERS_ENV_VAR, MAX_TRANSFERS_ENV_VAR
+
+DEFAULT_MAX_TRANSFERS = 8
+DEFAULT_MAX_PART_WORKERS = 64
+
+_lock = threading.Lock()
+_transfer_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_part_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def get_max_transfers() -> int:
+    """
+    Returns the max number of model files the process transfers at once.
+    """
+    return int(os.environ.get(MAX_TRANSFERS_ENV_VAR, DEFAULT_MAX_TRANSFERS))
+
+
+def get_max_part_workers() -> int:
+    """
+    Returns the max number of parts the process transfers at once, over all files.
+    """
+    return int(os.environ.get(MAX_PART_WORKERS_ENV_VAR, DEFAULT_MAX_PART_WORKERS))
+
+
+def get_transfer_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Returns the executor shared by the blocking file-level calls of the process.
+
+    A file-level call waits for its parts, so it never runs on the part executor.
+    """
+    global _transfer_executor
+    with _lock:
+        if _transfer_executor is None:
+            # Room for the transfers plus the short store calls around them
+            _transfer_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=get_max_transfers() + 4,
+                thread_name_prefix="paka-transfer",
+            )
+        return _transfer_executor
+
+
+def get_part_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Returns the executor shared by the part transfers of all files of the process.
+
+    Each file still caps its own parts in flight. The size of this executor caps
+    the parts in flight of the whole process.
+    """
+    global _part_executor
+    with _lock:
+        if _part_executor is None:
+            _part_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=get_max_part_workers(), thread_name_prefix="paka-part"
+            )
+        return _part_executor
+
+
+def cancel_and_wait(futures: Iterable[concurrent.futures.Future]) -> None:
+    """
+    Cancels the futures that have not started and waits for the running ones.
+
+    Args:
+        futures (Iterable[concurrent.futures.Future]): The futures.
+    """
+    futures = list(futures)
+    for future in futures:
+        future.cancel()
+    concurrent.futures.wait(futures)
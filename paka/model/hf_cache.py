@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from huggingface_hub import HfApi
+from pydantic import BaseModel
+
+from paka.utils import get_project_data_dir
+
+DEFAULT_REVISION = "main"
+
+# Seconds for which the tree of a branch or tag is trusted without asking the Hub.
+# Trees of commit shas never change and are trusted forever.
+BRANCH_TREE_TTL = 60 * 60
+
+
+class HfTreeFile(BaseModel):
+    size: int
+    # The SHA256 hash of an LFS file. None for files kept in git.
+    lfs_sha256: Optional[str] = None
+
+
+class HfRepoTree(BaseModel):
+    """
+    The cached file tree of a HuggingFace repo at a revision.
+
+    Attributes:
+        repo_id (str): The repo ID.
+        revision (str): The revision the tree was requested for, a branch, a tag or a commit sha.
+        commit_sha (str): The commit the revision pointed at when the tree was listed.
+        checked_at (float): When the commit of the revision was last checked, in seconds since the epoch.
+        files (Dict[str, HfTreeFile]): The files of the repo keyed by their path in the repo.
+    """
+
+    repo_id: str
+    revision: str
+    commit_sha: str
+    checked_at: float
+    files: Dict[str, HfTreeFile] = {}
+
+
+def get_hf_cache_dir() -> str:
+    return os.path.join(get_project_data_dir(), "hf_cache")
+
+
+def is_commit_sha(revision: str) -> bool:
+    return re.fullmatch(r"[0-9a-f]{40}", revision) is not None
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translates a glob pattern over repo paths to a regular expression.
+
+    `*` and `?` do not cross directories, `**` does.
+    """
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1 :]:
+            end = pattern.index("]", i + 1)
+            regex += "[" + pattern[i + 1 : end].replace("!", "^", 1) + "]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+class HfRepoCache:
+    """
+    An on-disk cache of the file trees of HuggingFace repos.
+
+    Each repo is listed once per revision, and every file pattern and file stat
+    is resolved from that listing. A tree requested by commit sha is immutable
+    and never refetched. A tree requested by branch or tag is trusted for
+    `ttl` seconds. After that, one call checks the commit the revision points
+    at, and the tree is only listed again if the commit moved.
+    """
+
+    def __init__(
+        self,
+        api: Optional[HfApi] = None,
+        cache_dir: Optional[str] = None,
+        ttl: float = BRANCH_TREE_TTL,
+    ) -> None:
+        self.api = api or HfApi()
+        self.cache_dir = cache_dir or get_hf_cache_dir()
+        self.ttl = ttl
+        # Trees loaded by this instance, keyed by repo ID and revision
+        self.trees: Dict[str, HfRepoTree] = {}
+
+    def glob(
+        self, repo_id: str, pattern: str, revision: Optional[str] = None
+    ) -> List[str]:
+        """
+        Lists the files of a repo that match a glob pattern.
+
+        Args:
+            repo_id (str): The repo ID.
+            pattern (str): The glob pattern, relative to the repo root.
+            revision (str, optional): The branch, tag or commit sha. Defaults to main.
+
+        Returns:
+            List[str]: The matching files as "<repo_id>/<path>", the same form HfFileSystem.glob returns.
+        """
+        tree = self.get_tree(repo_id, revision)
+        regex = re.compile(glob_to_regex(pattern))
+        return sorted(
+            f"{repo_id}/{path}" for path in tree.files if regex.fullmatch(path)
+        )
+
+    def stat(
+        self, repo_id: str, path: str, revision: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Returns the stat of a file in the form HfFileSystem.stat returns it.
+
+        Args:
+            repo_id (str): The repo ID.
+            path (str): The file as "<repo_id>/<path>", as returned by `glob`.
+            revision (str, optional): The branch, tag or commit sha. Defaults to main.
+
+        Returns:
+            Dict[str, Any]: The name, size, type and LFS info of the file.
+
+        Raises:
+            FileNotFoundError: If the repo has no such file.
+        """
+        path_in_repo = (
+            path[len(repo_id) + 1 :] if path.startswith(f"{repo_id}/") else path
+        )
+        file = self.get_tree(repo_id, revision).files.get(path_in_repo)
+        if file is None:
+            raise FileNotFoundError(path)
+        return {
+            "name": path,
+            "size": file.size,
+            "type": "file",
+            "lfs": (
+                {"sha256": file.lfs_sha256, "size": file.size}
+                if file.lfs_sha256
+                else None
+            ),
+        }
+
+    def get_tree(self, repo_id: str, revision: Optional[str] = None) -> HfRepoTree:
+        """
+        Returns the file tree of a repo, from the cache when it is still valid.
+        """
+        revision = revision or DEFAULT_REVISION
+        key = f"{repo_id}@{revision}"
+        tree = self.trees.get(key) or self._load(repo_id, revision)
+
+        if tree is not None and (
+            is_commit_sha(revision) or time.time() - tree.checked_at < self.ttl
+        ):
+            self.trees[key] = tree
+            return tree
+
+        commit_sha = (
+            revision
+            if is_commit_sha(revision)
+            else self.api.repo_info(repo_id, revision=revision).sha
+        )
+        if tree is None or tree.commit_sha != commit_sha:
+            files = {
+                entry.path: HfTreeFile(
+                    size=entry.size,
+                    lfs_sha256=entry.lfs.sha256 if entry.lfs else None,
+                )
+                for entry in self.api.list_repo_tree(
+                    repo_id, recursive=True, revision=commit_sha
+                )
+                # Folders have no size
+                if hasattr(entry, "size")
+            }
+            tree = HfRepoTree(
+                repo_id=repo_id,
+                revision=revision,
+                commit_sha=commit_sha or "",
+                checked_at=time.time(),
+                files=files,
+            )
+        else:
+            tree.checked_at = time.time()
+
+        self._write(tree)
+        self.trees[key] = tree
+        return tree
+
+    def _file_path(self, repo_id: str, revision: str) -> str:
+        name = hashlib.sha256(f"{repo_id}@{revision}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _load(self, repo_id: str, revision: str) -> Optional[HfRepoTree]:
+        try:
+            with open(self._file_path(repo_id, revision), "r") as f:
+                tree = HfRepoTree.model_validate_json(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if tree.repo_id != repo_id or tree.revision != revision:
+            return None
+        return tree
+
+    def _write(self, tree: HfRepoTree) -> None:
+        file_path = self._file_path(tree.repo_id, tree.revision)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file_path = f"{file_path}.tmp"
+        with open(tmp_file_path, "w") as f:
+            f.write(tree.model_dump_json())
+        # Replace atomically so that a crash never leaves a truncated cache entry
+        os.replace(tmp_file_path, file_path)
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-import concurrent.futures
+import functools
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from huggingface_hub import HfFileSystem
-from huggingface_hub.utils import validate_repo_id
+import requests
+from huggingface_hub import HfFileSystem, hf_hub_url
+from huggingface_hub.utils import build_hf_headers, validate_repo_id
 
 from paka.logger import logger
+from paka.model.aio import run_blocking
 from paka.model.base_model import BaseMLModel
+from paka.model.hf_cache import HfRepoCache
+from paka.model.http_model import create_session, fetch_range
 from paka.model.store import ModelStore
 
 
@@ -22,6 +26,8 @@ class HuggingFaceModel(BaseMLModel):
         quantization: Optional[str] = None,
         prompt_template_name: Optional[str] = None,
         prompt_template_str: Optional[str] = None,
+        # Max number of pooled connections for fetching byte ranges of LFS files
+        max_connections: int = 8,
     ) -> None:
         super().__init__(
             name=name,
@@ -33,15 +39,31 @@ class HuggingFaceModel(BaseMLModel):
         validate_repo_id(repo_id)
         self.repo_id: str = repo_id
         self.fs = HfFileSystem()
+        self.repo_cache = HfRepoCache()
         self._files = files
+        self.session = create_session(max_connections)
 
-    def save(self) -> None:
+    async def asave(self) -> None:
         """
         Saves the model to a model store.
         """
+        files = await run_blocking(self._match_files)
+        # Served from the cached tree of the repo, without calls to the Hub
+        file_infos = [self.repo_cache.stat(self.repo_id, file) for file in files]
+        infos = dict(zip(files, file_infos))
+        await self.asave_files(
+            lambda file: self._save_single_file(file, infos[file]),
+            files,
+            [file_info["size"] for file_info in file_infos],
+        )
+
+    def _match_files(self) -> List[str]:
+        """
+        Expands the file patterns of the model to the files of the HuggingFace repo.
+        """
         files: List[str] = []
         for file in self._files:
-            match_files = self.fs.glob(f"{self.repo_id}/{file}")
+            match_files = self.repo_cache.glob(self.repo_id, file)
 
             if not match_files:
                 logger.warn(
@@ -49,25 +71,23 @@ class HuggingFaceModel(BaseMLModel):
                 )
 
             files.extend(match_files)
+        return files
 
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.concurrency
-        ) as executor:
-            futures = [executor.submit(self._save_single_file, file) for file in files]
-            concurrent.futures.wait(futures)
-            self.finish()
-
-    def _save_single_file(self, hf_file_path: str) -> None:
+    def _save_single_file(
+        self, hf_file_path: str, file_info: Optional[Dict[str, Any]] = None
+    ) -> None:
         """
         Saves a HuggingFace model file to the specified model store.
 
         Args:
             hf_file_path (str): The path to the HuggingFace model file.
+            file_info (Dict[str, Any], optional): The stat of the file, if already known.
 
         Returns:
             None
         """
-        file_info: Dict[str, Any] = self.fs.stat(hf_file_path)
+        if file_info is None:
+            file_info = self.repo_cache.stat(self.repo_id, hf_file_path)
         total_size = file_info["size"]
         sha256 = (
             file_info["lfs"]["sha256"]
@@ -76,5 +96,47 @@ class HuggingFaceModel(BaseMLModel):
         )
 
         fname = os.path.basename(hf_file_path)
-        with self.fs.open(hf_file_path, "rb") as hf_file:
-            self.save_single_stream(f"{self.name}/{fname}", hf_file, total_size, sha256)
+        if not sha256 or total_size == 0:
+            # Small files kept in git are read as a single stream
+            with self.fs.open(hf_file_path, "rb") as hf_file:
+                self.save_single_stream(
+                    f"{self.name}/{fname}", hf_file, total_size, sha256
+                )
+            return
+
+        # LFS files are fetched as concurrent byte ranges, one per upload part
+        url, headers = self._resolve_download_url(hf_file_path)
+        self.save_single_ranges(
+            f"{self.name}/{fname}",
+            functools.partial(fetch_range, self.session, url, headers=headers),
+            total_size,
+            sha256,
+        )
+
+    def _resolve_download_url(self, hf_file_path: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Resolves the URL that serves the bytes of a HuggingFace file.
+
+        The Hub redirects LFS downloads to a CDN. The redirect is followed once
+        here so that each range goes straight to the CDN. The URL is pinned to the
+        commit of the cached tree, so every range reads the same content.
+
+        Args:
+            hf_file_path (str): The path to the HuggingFace model file.
+
+        Returns:
+            Tuple[str, Dict[str, str]]: The URL and the headers to fetch it with.
+        """
+        url = hf_hub_url(
+            repo_id=self.repo_id,
+            filename=hf_file_path[len(self.repo_id) + 1 :],
+            revision=self.repo_cache.get_tree(self.repo_id).commit_sha,
+            endpoint=self.fs.endpoint,
+        )
+        headers = build_hf_headers(token=self.fs.token)
+        response = self.session.head(url, headers=headers, allow_redirects=True)
+        response.raise_for_status()
+        if response.url == url:
+            return url, headers
+        # The CDN URL is signed. It must not carry the Hub credentials.
+        return response.url, {}
@@ -1,14 +1,62 @@
 from __future__ import annotations
 
-import concurrent.futures
-from typing import List, Optional
+import functools
+from typing import Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from paka.model.base_model import BaseMLModel
 from paka.model.store import ModelStore
 
 
+def create_session(max_connections: int) -> requests.Session:
+    """
+    Creates a session that keeps up to `max_connections` connections per host.
+
+    Workers that cannot get a connection wait for one instead of opening extra ones.
+    """
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=max_connections, pool_block=True
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_range(
+    session: requests.Session,
+    url: str,
+    start: int,
+    end: int,
+    headers: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """
+    Fetches the bytes [start, end) of a file over a pooled connection.
+
+    Args:
+        session (requests.Session): The session to fetch with.
+        url (str): The URL of the file.
+        start (int): The first byte of the range.
+        end (int): The byte after the last byte of the range.
+        headers (Dict[str, str], optional): Extra request headers.
+
+    Returns:
+        requests.Response: The streaming response for the range.
+    """
+    response = session.get(
+        url,
+        headers={**(headers or {}), "Range": f"bytes={start}-{end - 1}"},
+        stream=True,
+    )
+    response.raise_for_status()
+    if response.status_code != 206:
+        response.close()
+        raise Exception(f"Server did not return a partial response for {url}")
+    return response
+
+
 class HttpSourceModel(BaseMLModel):
     def __init__(
         self,
@@ -18,6 +66,8 @@ class HttpSourceModel(BaseMLModel):
         quantization: Optional[str] = None,
         prompt_template_name: Optional[str] = None,
         prompt_template_str: Optional[str] = None,
+        # Max number of pooled connections for fetching byte ranges of a file
+        max_connections: int = 8,
     ) -> None:
         super().__init__(
             name=name,
@@ -27,21 +77,45 @@ class HttpSourceModel(BaseMLModel):
             prompt_template_str=prompt_template_str,
         )
         self.urls = urls
+        self.session = create_session(max_connections)
 
-    def save(self) -> None:
+    async def asave(self) -> None:
         """
         Save the model to a model store.
         """
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.concurrency
-        ) as executor:
-            futures = [executor.submit(self._save_single_url, url) for url in self.urls]
-            concurrent.futures.wait(futures)
-            self.finish()
+        await self.asave_files(self._save_single_url, self.urls)
 
     def _save_single_url(self, url: str) -> None:
+        """
+        Saves a file from a URL to the model store.
+
+        If the server supports byte ranges, the file is fetched as concurrent ranges.
+        Otherwise, it is fetched as a single stream.
+
+        Args:
+            url (str): The URL of the file.
+
+        Returns:
+            None
+        """
         with requests.get(url, stream=True) as response:
             response.raise_for_status()
             total_size = int(response.headers.get("content-length", 0))
             fname = url.split("/")[-1]
-            self.save_single_stream(f"{self.name}/{fname}", response, total_size)
+            accepts_ranges = (
+                response.headers.get("accept-ranges", "") == "bytes" and total_size > 0
+            )
+            if not accepts_ranges:
+                self.save_single_stream(f"{self.name}/{fname}", response, total_size)
+                return
+            # Fetch the ranges from the final URL to skip redirects
+            range_url = response.url
+
+        self.save_single_ranges(
+            f"{self.name}/{fname}",
+            functools.partial(self._fetch_range, range_url),
+            total_size,
+        )
+
+    def _fetch_range(self, url: str, start: int, end: int) -> requests.Response:
+        return fetch_range(self.session, url, start, end)
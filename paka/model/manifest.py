@@ -6,8 +6,21 @@ from pydantic import BaseModel
 
 
 class ModelFile(BaseModel):
+    """
+    A model file listed in a manifest.
+
+    Attributes:
+        name (str): The file name.
+        sha256 (str): The SHA256 hash of the file.
+        part_size (Optional[int]): The size of every part except the last one, if the file was stored in parts.
+        parts (Optional[List[str]]): The SHA256 hash of each part, in part order. Lets a download verify
+            the parts of a file in parallel.
+    """
+
     name: str
     sha256: str
+    part_size: Optional[int] = None
+    parts: Optional[List[str]] = None
 
 
 class ModelManifest(BaseModel):
@@ -17,6 +30,8 @@ class ModelManifest(BaseModel):
     Attributes:
         name (str): The name of the model.
         files (List[ModelFile]): A list of model file where each model file contains a file name and a hash.
+            The hash also keys the content index of the model store, so files shared between model groups
+            resolve to the same stored content.
         quantization (Optional[str]): The quantization method (GPTQ, AWQ, GGUF_Q4_0, etc) the model uses.
         prompt_template_name (Optional[str]): The prompt template name (chatml, llama-2, gemma, etc) the model uses. This field is optional.
         prompt_template_str (Optional[str]): The prompt template string the model uses. This field is optional.
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+from paka.logger import logger
+
+GiB = 1024 * 1024 * 1024
+
+# Files up to this size (configs, tokenizers, *.json) run in their own lane
+SMALL_FILE_SIZE = 16 * 1024 * 1024
+SMALL_FILE_CONCURRENCY = 4
+
+# The total size of the large files transferred at once
+DEFAULT_MAX_BYTES_IN_FLIGHT = 8 * GiB
+
+
+@dataclass
+class TransferTask:
+    """
+    A file to transfer.
+
+    Attributes:
+        name (str): The name of the file, used in reports.
+        size (int): The size of the file. 0 if unknown.
+        run (Callable[[], Awaitable[None]]): Transfers the file.
+    """
+
+    name: str
+    size: int
+    run: Callable[[], Awaitable[None]]
+
+
+@dataclass
+class FileTransferStats:
+    """
+    The outcome of a file transfer.
+
+    Attributes:
+        name (str): The name of the file.
+        size (int): The size of the file.
+        seconds (float): The wall-clock duration of the transfer.
+        error (Optional[str]): The error of a failed transfer.
+    """
+
+    name: str
+    size: int
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def mbps(self) -> float:
+        """The achieved throughput in MB/s."""
+        return self.size / self.seconds / 1e6 if self.seconds > 0 else 0.0
+
+
+@dataclass
+class TransferReport:
+    """
+    The outcome of a scheduled batch of transfers.
+
+    Attributes:
+        files (List[FileTransferStats]): The outcome of each file, in completion order.
+        seconds (float): The wall-clock duration of the batch.
+    """
+
+    files: List[FileTransferStats] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(f.size for f in self.files if f.error is None)
+
+    @property
+    def mbps(self) -> float:
+        """The aggregate throughput of the batch in MB/s."""
+        return self.total_bytes / self.seconds / 1e6 if self.seconds > 0 else 0.0
+
+    @property
+    def failed(self) -> List[FileTransferStats]:
+        return [f for f in self.files if f.error is not None]
+
+
+class TransferScheduler:
+    """
+    Runs the files of a batch from one queue.
+
+    Large files start largest first, so the longest transfer is never the last
+    to start, and they run together as long as their total size stays within
+    `max_bytes_in_flight`. When the next largest file does not fit, the largest
+    pending file that fits starts instead. A file larger than the cap runs once
+    nothing else is in flight. Small files run in their own lane next to the large
+    ones, so configs and tokenizers never wait behind the shards.
+    """
+
+    def __init__(
+        self,
+        max_bytes_in_flight: int = DEFAULT_MAX_BYTES_IN_FLIGHT,
+        small_file_size: int = SMALL_FILE_SIZE,
+        small_file_concurrency: int = SMALL_FILE_CONCURRENCY,
+    ) -> None:
+        self.max_bytes_in_flight = max_bytes_in_flight
+        self.small_file_size = small_file_size
+        self.small_file_concurrency = small_file_concurrency
+
+    async def run(self, tasks: List[TransferTask]) -> TransferReport:
+        """
+        Transfers a batch of files.
+
+        A failed file is recorded in the report and does not stop the others.
+
+        Args:
+            tasks (List[TransferTask]): The files to transfer.
+
+        Returns:
+            TransferReport: The per-file and aggregate throughput of the batch.
+        """
+        report = TransferReport()
+        started_at = time.monotonic()
+
+        # Files of unknown size are treated as large
+        small = [t for t in tasks if 0 < t.size <= self.small_file_size]
+        large = [t for t in tasks if not 0 < t.size <= self.small_file_size]
+
+        await asyncio.gather(
+            self._run_small(small, report), self._run_large(large, report)
+        )
+
+        report.seconds = time.monotonic() - started_at
+        return report
+
+    async def _run_small(
+        self, tasks: List[TransferTask], report: TransferReport
+    ) -> None:
+        semaphore = asyncio.Semaphore(self.small_file_concurrency)
+
+        async def run(task: TransferTask) -> None:
+            async with semaphore:
+                await self._run_task(task, report)
+
+        await asyncio.gather(*(run(task) for task in tasks))
+
+    async def _run_large(
+        self, tasks: List[TransferTask], report: TransferReport
+    ) -> None:
+        pending = sorted(tasks, key=lambda task: task.size, reverse=True)
+        condition = asyncio.Condition()
+        in_flight = [0]
+
+        def next_task() -> Optional[TransferTask]:
+            for task in pending:
+                if in_flight[0] + task.size <= self.max_bytes_in_flight:
+                    return task
+            return pending[0] if in_flight[0] == 0 else None
+
+        async def run(task: TransferTask) -> None:
+            try:
+                await self._run_task(task, report)
+            finally:
+                async with condition:
+                    in_flight[0] -= task.size
+                    condition.notify_all()
+
+        running = []
+        while pending:
+            async with condition:
+                await condition.wait_for(lambda: next_task() is not None)
+                task = next_task()
+                assert task is not None
+                pending.remove(task)
+                in_flight[0] += task.size
+            running.append(asyncio.ensure_future(run(task)))
+
+        await asyncio.gather(*running)
+
+    async def _run_task(self, task: TransferTask, report: TransferReport) -> None:
+        started_at = time.monotonic()
+        error = None
+        try:
+            await task.run()
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        stats = FileTransferStats(
+            name=task.name,
+            size=task.size,
+            seconds=time.monotonic() - started_at,
+            error=error,
+        )
+        report.files.append(stats)
+        if error is not None:
+            logger.error(f"Failed to transfer {task.name}: {error}")
+        else:
+            logger.info(
+                f"Transferred {task.name} ({task.size / 1e6:.1f} MB) in {stats.seconds:.1f}s at {stats.mbps:.1f} MB/s."
+            )
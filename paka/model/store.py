@@ -1,26 +1,76 @@
 from __future__ import annotations
 
 import concurrent.futures
+import errno
 import functools
 import hashlib
+import io
+import json
+import os
+import queue
 import re
+import stat
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import deque
 from io import IOBase
-from typing import Any, Callable, Dict, List, TypeVar, Union, cast
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
 import boto3
 import requests
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from typing_extensions import TypeAlias
 
 from paka.logger import logger
-from paka.model.progress_bar import NullProgressBar, ProgressBar
+from paka.model.buffer_pool import BufferPool, BufferReader, IterReader, fill_buffer
+from paka.model.checksum import (
+    OrderedHasher,
+    PartLayout,
+    from_s3_checksum,
+    to_s3_checksum,
+)
+from paka.model.executor import (
+    cancel_and_wait,
+    get_max_part_workers,
+    get_part_executor,
+)
+from paka.model.telemetry import TransferTelemetry
+from paka.model.tuning import AimdConcurrency, TransferStats, choose_part_size
+from paka.model.upload_journal import JournalPart, UploadJournal, get_journal_dir
 
 MODEL_PATH_PREFIX = "models"
 
+# Seconds for which a listing of the S3 bucket is reused
+LISTING_CACHE_TTL = 60
+
+# Size of the parts read by `iter_parts` when the part layout of a file is unknown
+DEFAULT_READ_PART_SIZE = 8 * 1024 * 1024
+
+# Prefix of the content index. Each entry is keyed by a SHA256 hash and points
+# at a stored model file with that content.
+BLOB_PATH_PREFIX = "blobs/sha256"
+
 StreamLike: TypeAlias = Union[requests.Response, IOBase]
 
+# A callable that returns a stream over the bytes [start, end) of a file
+RangeReader: TypeAlias = Callable[[int, int], StreamLike]
+
 T = TypeVar("T", bound=Callable[..., Any])
 
 
@@ -37,6 +87,119 @@ def resolve_path(func: T) -> T:
     return cast(T, wrapper)
 
 
+def literal_prefix(pattern: str) -> str:
+    """
+    Returns the longest literal prefix of a regular expression.
+
+    Every string that the pattern matches with `re.match` starts with the prefix.
+
+    Args:
+        pattern (str): The regular expression.
+
+    Returns:
+        str: The literal prefix. Empty if the pattern starts with a special character.
+
+    Example:
+        >>> literal_prefix("models/llama/.*\\.gguf")
+        'models/llama/'
+        >>> literal_prefix("models/llama/*")
+        'models/llama'
+    """
+    # An alternation anywhere can make the prefix optional
+    if re.search(r"(?<!\\)\|", pattern):
+        return ""
+
+    prefix: List[str] = []
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            # Only escaped punctuation is literal, e.g. "\\." but not "\\d"
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            char, i = pattern[i + 1], i + 2
+        elif pattern[i] in ".^$*+?{}[]()":
+            break
+        else:
+            char, i = pattern[i], i + 1
+
+        # A quantifier can make the character optional
+        if i < len(pattern) and pattern[i] in "*?{":
+            break
+        prefix.append(char)
+        if i < len(pattern) and pattern[i] == "+":
+            break
+    return "".join(prefix)
+
+
+def iter_stream(stream: StreamLike, chunk_size: int) -> Iterator[bytes]:
+    """
+    Iterates over a stream in chunks.
+
+    Args:
+        stream (StreamLike): The response object or the file stream object.
+        chunk_size (int): The size of the chunks.
+
+    Returns:
+        Iterator[bytes]: The chunks of the stream.
+    """
+    if isinstance(stream, requests.Response):
+        return stream.iter_content(chunk_size=chunk_size)
+
+    response_io = cast(IOBase, stream)
+    return iter(lambda: response_io.read(chunk_size), b"")
+
+
+def as_reader(stream: StreamLike) -> io.RawIOBase:
+    """
+    Returns a view of a stream that can be read into a buffer with `readinto`.
+
+    Args:
+        stream (StreamLike): The response object or the file stream object.
+
+    Returns:
+        io.RawIOBase: The readable stream.
+    """
+    if isinstance(stream, requests.Response):
+        # Bytes without a content encoding can be read from the raw response
+        if stream.headers.get("content-encoding", "identity") == "identity":
+            return cast(io.RawIOBase, stream.raw)
+        return IterReader(stream.iter_content(chunk_size=1024 * 1024))
+
+    # Raw streams that only implement `read` inherit a `readinto` that raises
+    readinto = getattr(type(stream), "readinto", None)
+    if readinto is not None and readinto is not io.RawIOBase.readinto:
+        return cast(io.RawIOBase, stream)
+
+    response_io = cast(IOBase, stream)
+    return IterReader(iter(lambda: response_io.read(1024 * 1024), b""))
+
+
+def read_stream(stream: StreamLike, size: int) -> bytes:
+    """
+    Reads up to `size` bytes from a stream.
+
+    Args:
+        stream (StreamLike): The response object or the file stream object.
+        size (int): The number of bytes to read.
+
+    Returns:
+        bytes: The bytes read. Fewer than `size` bytes are returned only if the stream ends early.
+    """
+    if isinstance(stream, requests.Response):
+        return b"".join(stream.iter_content(chunk_size=1024 * 1024))[:size]
+
+    response_io = cast(IOBase, stream)
+    buffers = []
+    remaining = size
+    while remaining > 0:
+        data = response_io.read(remaining)
+        if not data:
+            break
+        buffers.append(data)
+        remaining -= len(data)
+    return b"".join(buffers)
+
+
 class ModelStore(ABC):
     @abstractmethod
     def save_stream(
@@ -48,10 +211,98 @@ class ModelStore(ABC):
     ) -> None:
         pass
 
+    def save_ranges(
+        self,
+        path: str,
+        read_range: RangeReader,
+        total_size: int,
+        sha256: str = "",
+    ) -> None:
+        """
+        Saves a file whose content can be fetched by byte range.
+
+        Stores that cannot consume ranges in parallel read the whole file as
+        a single range and save it as a stream.
+
+        Args:
+            path (str): The path of the file in the store.
+            read_range (RangeReader): Returns a stream over the bytes [start, end) of the file.
+            total_size (int): The size of the file.
+            sha256 (str, optional): The expected SHA256 hash of the file.
+        """
+        with read_range(0, total_size) as stream:
+            self.save_stream(path, stream, total_size, sha256)
+
+    def get_part_layout(self, path: str) -> Optional[PartLayout]:
+        """
+        Returns the part layout of a file saved by this store.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            Optional[PartLayout]: The part size and the SHA256 hash of each part, or None if the store does not know them.
+        """
+        return None
+
     @abstractmethod
     def save(self, path: str, data: bytes) -> None:
         pass
 
+    @abstractmethod
+    def get_file_size(self, path: str) -> int:
+        pass
+
+    @abstractmethod
+    def open_range(self, path: str, start: int, length: int) -> IOBase:
+        """
+        Opens a stream over a byte range of a stored file.
+
+        The stream is read from the store as it is consumed, so reading a range
+        never holds more than the read buffer in memory.
+
+        Args:
+            path (str): The path of the file in the store.
+            start (int): The first byte of the range.
+            length (int): The number of bytes in the range. Bytes past the end of the file are not returned.
+
+        Returns:
+            IOBase: A readable stream over the range. Close it when done.
+        """
+        pass
+
+    def iter_parts(
+        self, path: str, part_size: Optional[int] = None
+    ) -> Iterator[Tuple[int, bytes]]:
+        """
+        Reads a stored file part by part.
+
+        Only one part is held in memory at a time, so a file can be verified or
+        copied elsewhere without downloading it first.
+
+        Args:
+            path (str): The path of the file in the store.
+            part_size (int, optional): The size of the parts. Defaults to the part size the file was
+                saved with, if the store knows it, and DEFAULT_READ_PART_SIZE otherwise.
+
+        Yields:
+            Tuple[int, bytes]: The offset and the bytes of each part, in order.
+        """
+        if part_size is None:
+            part_layout = self.get_part_layout(path)
+            part_size = part_layout.part_size if part_layout else DEFAULT_READ_PART_SIZE
+
+        total_size = self.get_file_size(path)
+        for start in range(0, total_size, part_size):
+            length = min(part_size, total_size - start)
+            with self.open_range(path, start, length) as stream:
+                data = read_stream(stream, length)
+            if len(data) != length:
+                raise Exception(
+                    f"Expected {length} bytes at offset {start} of {path}, got {len(data)}"
+                )
+            yield start, data
+
     @abstractmethod
     def file_exists(self, path: str, prefix_match: bool = False) -> bool:
         pass
@@ -73,7 +324,10 @@ class S3ModelStore(ModelStore):
     from an S3 bucket.
     """
 
-    progress_bar: Union[ProgressBar, NullProgressBar]
+    # Listings shared by all stores of the process, keyed by bucket and prefix.
+    # A deploy creates several stores, but should list each prefix at most once.
+    _listing_cache: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+    _listing_cache_lock = threading.Lock()
 
     def __init__(
         self,
@@ -81,23 +335,46 @@ class S3ModelStore(ModelStore):
         s3_chunk_size: int = 8 * 1024 * 1024,
         s3_max_concurrency: int = 20,
         with_progress_bar: bool = True,
+        # Keep a local journal of uploaded parts so that interrupted uploads can be resumed
+        resumable: bool = False,
+        journal_dir: Optional[str] = None,
+        # Copy files whose SHA256 hash is already stored instead of uploading them again
+        content_addressed: bool = False,
+        # Scale the part size with the file size and tune the parts in flight up to
+        # s3_max_concurrency from the measured part latency
+        adaptive: bool = False,
+        # The pool of part buffers. Defaults to the pool shared by all uploads of the process.
+        buffer_pool: Optional[BufferPool] = None,
     ) -> None:
         # s3 bucket
         self.s3_bucket = s3_bucket
         self.s3_chunk_size = s3_chunk_size
         self.s3_max_concurrency = s3_max_concurrency
-        self.s3 = boto3.client("s3", config=Config(signature_version="s3v4"))
+        # One pooled connection for each part worker of the process
+        self.s3 = boto3.client(
+            "s3",
+            config=Config(
+                signature_version="s3v4", max_pool_connections=get_max_part_workers()
+            ),
+        )
         self.with_progress_bar = with_progress_bar
+        self.journal_dir = (journal_dir or get_journal_dir()) if resumable else None
+        # Journals of the uploads in progress, keyed by S3 file name
+        self.journals: Dict[str, UploadJournal] = {}
+        self.content_addressed = content_addressed
+        self.adaptive = adaptive
+        self.buffer_pool = buffer_pool or BufferPool.shared()
+        self.part_layouts: Dict[str, PartLayout] = {}
+        # The parameters and throughput of the uploads, keyed by S3 file name
+        self.transfer_stats: Dict[str, TransferStats] = {}
 
-        if with_progress_bar:
-            self.progress_bar = ProgressBar("Saving model(s) to S3")
-        else:
-            self.progress_bar = NullProgressBar()
+        self.telemetry = TransferTelemetry("Saving model(s) to S3", with_progress_bar)
 
     @resolve_path
     def save(self, path: str, data: bytes) -> None:
         s3 = boto3.resource("s3")
         s3.Object(self.s3_bucket, path).put(Body=data)
+        self._invalidate_listings(path)
 
     @resolve_path
     def save_stream(
@@ -117,19 +394,83 @@ class S3ModelStore(ModelStore):
         Raises:
             Exception: If the SHA256 hash of the downloaded file does not match the expected value.
         """
-        self.progress_bar.create_progress_bar(0)
+        self._save_verified(
+            path,
+            total_size,
+            sha256,
+            lambda: self._upload_to_s3(stream, path, total_size),
+        )
+
+    @resolve_path
+    def save_ranges(
+        self,
+        path: str,
+        read_range: RangeReader,
+        total_size: int,
+        sha256: str = "",
+    ) -> None:
+        """
+        Saves a file by fetching its byte ranges in parallel.
+
+        Every multipart upload part is fetched as its own range, so downloading
+        and uploading overlap across up to `s3_max_concurrency` streams. Files that
+        fit in a single part are saved as a stream.
+
+        Args:
+            path (str): The path of the file in the S3 bucket.
+            read_range (RangeReader): Returns a stream over the bytes [start, end) of the file.
+            total_size (int): The size of the file.
+            sha256 (str, optional): The expected SHA256 hash of the file.
+
+        Raises:
+            Exception: If the SHA256 hash of the saved file does not match the expected value.
+        """
+        if total_size <= choose_part_size(
+            total_size, self.s3_chunk_size, self.adaptive
+        ):
+            super().save_ranges(path, read_range, total_size, sha256)
+            return
+
+        self._save_verified(
+            path,
+            total_size,
+            sha256,
+            lambda: self._upload_ranges_to_s3(read_range, total_size, path),
+        )
+
+    def _save_verified(
+        self,
+        path: str,
+        total_size: int,
+        sha256: str,
+        upload: Callable[[], str],
+    ) -> None:
+        """
+        Runs an upload unless the file already exists and verifies its SHA256 hash.
+
+        Args:
+            path (str): The path of the file in the S3 bucket.
+            total_size (int): The size of the file.
+            sha256 (str): The expected SHA256 hash of the file. Empty to skip the check.
+            upload (Callable[[], str]): Uploads the file and returns its SHA256 hash.
 
-        self.progress_bar.update_progress_bar(path, total_size)
+        Raises:
+            Exception: If the SHA256 hash of the uploaded file does not match the expected value.
+        """
+        self.telemetry.start_file(path, total_size)
 
         try:
             if self.file_exists(path):
-                self.progress_bar.advance_progress_bar(path, total_size)
+                self.telemetry.finish_file(path, "skipped")
                 return
 
-            sha256_value = self._upload_to_s3(stream, path)
-            if sha256 and sha256 != sha256_value:
-                self.progress_bar.close_progress_bar()
+            if sha256 and self._copy_blob(sha256, total_size, path):
+                self._invalidate_listings(path)
+                self.telemetry.finish_file(path, "copied")
+                return
 
+            sha256_value = upload()
+            if sha256 and sha256 != sha256_value:
                 message = f"SHA256 hash of the downloaded file does not match the expected value for {path}"
                 # Log the error message so that users know why the file was deleted
                 logger.error(message)
@@ -137,17 +478,141 @@ class S3ModelStore(ModelStore):
 
                 raise Exception(message)
 
-            if not self.with_progress_bar:
-                logger.info(f"Model file {path} is saved successfully.")
-            self.progress_bar.advance_progress_bar(path, total_size)
-        except Exception:
-            self.progress_bar.close_progress_bar()
+            self._invalidate_listings(path)
+            self._index_blob(
+                sha256_value, total_size, path, self.part_layouts.get(path)
+            )
+
+            self.telemetry.finish_file(path, "uploaded")
+        except Exception as e:
+            self.telemetry.fail_file(path, str(e))
+            raise
+
+    def _find_blob(self, sha256: str, total_size: int) -> Optional[Dict[str, Any]]:
+        """
+        Finds a stored model file by its SHA256 hash.
+
+        Args:
+            sha256 (str): The SHA256 hash of the file.
+            total_size (int): The size of the file.
+
+        Returns:
+            Optional[Dict[str, Any]]: The index entry of a stored file with the given hash and size,
+                or None if there is none or the file changed since it was indexed. The entry holds the
+                key of the file, its ETag and its part layout, if known.
+        """
+        try:
+            response = self.s3.get_object(
+                Bucket=self.s3_bucket, Key=f"{BLOB_PATH_PREFIX}/{sha256}"
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ["404", "NoSuchKey"]:
+                return None
+            raise
+
+        entry = json.loads(response["Body"].read())
+        try:
+            head = self.s3.head_object(Bucket=self.s3_bucket, Key=entry["key"])
+        except ClientError as e:
+            # The file that the entry points at was deleted
+            if e.response["Error"]["Code"] == "404":
+                return None
+            raise
+
+        # The key was overwritten since it was indexed, possibly with other bytes of the
+        # same size. Entries without an ETag predate the check and cannot be trusted.
+        if head["ContentLength"] != total_size or head["ETag"] != entry.get("etag"):
+            return None
+        return entry
+
+    def _copy_blob(self, sha256: str, total_size: int, s3_file_name: str) -> bool:
+        """
+        Copies a stored file with the given SHA256 hash to a new key on the server side.
+
+        Args:
+            sha256 (str): The SHA256 hash of the file.
+            total_size (int): The size of the file.
+            s3_file_name (str): The name of the file in S3.
+
+        Returns:
+            bool: True if the file was copied, False if no unchanged stored file has the hash.
+        """
+        if not self.content_addressed:
+            return False
+
+        entry = self._find_blob(sha256, total_size)
+        if entry is None:
+            return False
+        source_key = entry["key"]
+
+        try:
+            # Managed copy, which switches to a multipart copy for large files
+            self.s3.copy(
+                CopySource={"Bucket": self.s3_bucket, "Key": source_key},
+                Bucket=self.s3_bucket,
+                Key=s3_file_name,
+                # Fails if the source is overwritten after it was checked
+                ExtraArgs={
+                    "ChecksumAlgorithm": "SHA256",
+                    "CopySourceIfMatch": entry["etag"],
+                },
+                Config=TransferConfig(
+                    multipart_chunksize=self.s3_chunk_size,
+                    max_concurrency=self.s3_max_concurrency,
+                ),
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ["412", "PreconditionFailed"]:
+                return False
             raise
+        # The copy has the same content, so the parts of the source still verify it
+        if "parts" in entry:
+            self.part_layouts[s3_file_name] = PartLayout(
+                part_size=entry["part_size"], parts=entry["parts"]
+            )
+        return True
+
+    def _index_blob(
+        self,
+        sha256: str,
+        total_size: int,
+        s3_file_name: str,
+        part_layout: Optional[PartLayout] = None,
+    ) -> None:
+        """
+        Records a stored model file in the content index.
+
+        Args:
+            sha256 (str): The SHA256 hash of the file.
+            total_size (int): The size of the file.
+            s3_file_name (str): The name of the file in S3.
+            part_layout (PartLayout, optional): The part layout of the file.
+        """
+        if not self.content_addressed:
+            return
+
+        # The ETag tells whether the key still holds these bytes when the entry is used
+        head = self.s3.head_object(Bucket=self.s3_bucket, Key=s3_file_name)
+        entry: Dict[str, Any] = {
+            "key": s3_file_name,
+            "size": total_size,
+            "etag": head["ETag"],
+        }
+        if part_layout is not None:
+            entry["part_size"] = part_layout.part_size
+            entry["parts"] = part_layout.parts
+
+        self.s3.put_object(
+            Bucket=self.s3_bucket,
+            Key=f"{BLOB_PATH_PREFIX}/{sha256}",
+            Body=json.dumps(entry).encode("utf-8"),
+        )
 
     def _upload_to_s3(
         self,
         stream: StreamLike,
         s3_file_name: str,
+        total_size: int = 0,
     ) -> str:
         """
         Uploads a single file to S3.
@@ -155,167 +620,1114 @@ class S3ModelStore(ModelStore):
         Args:
             response (requests.Response | FileStream): The response object from the file download or the file stream object.
             s3_file_name (str): The name of the file in S3.
+            total_size (int, optional): The size of the file, used to choose the part size. 0 if unknown.
 
         Returns:
             str: The SHA256 hash of the uploaded file.
         """
         upload_id = None
         upload_completed = False
+        hasher = OrderedHasher()
         try:
-            self.progress_bar.set_postfix_str(s3_file_name)
-
-            sha256 = hashlib.sha256()
             processed_size = 0
             parts = []
 
-            upload = self.s3.create_multipart_upload(
-                Bucket=self.s3_bucket, Key=s3_file_name
-            )
-            upload_id = upload["UploadId"]
+            part_size = choose_part_size(total_size, self.s3_chunk_size, self.adaptive)
+            concurrency = self._create_concurrency()
+            started_at = time.monotonic()
+
+            upload_id = self._create_multipart_upload(s3_file_name, part_size)
+
+            reader = as_reader(stream)
 
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=self.s3_max_concurrency
-            ) as executor:
-                futures: List[concurrent.futures.Future] = []
+            executor = get_part_executor()
+            futures: List[concurrent.futures.Future] = []
+            try:
                 part_number = 1
 
-                if isinstance(stream, requests.Response):
-                    chunks = stream.iter_content(chunk_size=self.s3_chunk_size)
-                else:
-                    response_io = cast(IOBase, stream)
-                    chunks = iter(lambda: response_io.read(self.s3_chunk_size), b"")
-
-                for chunk in chunks:
-                    sha256.update(chunk)
-                    while len(futures) >= self.s3_max_concurrency:
-                        done, _ = concurrent.futures.wait(
-                            futures, return_when=concurrent.futures.FIRST_COMPLETED
-                        )
-                        for future in done:
-                            parts.append(future.result())
-                            futures.remove(future)
-
-                    future = executor.submit(
-                        self._upload_part,
-                        s3_file_name,
-                        upload_id,
-                        part_number,
-                        chunk,
-                    )
+                while True:
+                    # Blocks until the memory budget allows another part
+                    buffer = self.buffer_pool.acquire(part_size)
+                    submitted = False
+                    try:
+                        size = fill_buffer(reader, memoryview(buffer))
+                        if size > 0:
+                            while len(futures) >= concurrency.limit:
+                                done, _ = concurrent.futures.wait(
+                                    futures,
+                                    return_when=concurrent.futures.FIRST_COMPLETED,
+                                )
+                                for future in done:
+                                    parts.append(future.result())
+                                    futures.remove(future)
+
+                            future = executor.submit(
+                                self._upload_part,
+                                s3_file_name,
+                                upload_id,
+                                part_number,
+                                memoryview(buffer)[:size],
+                                concurrency,
+                            )
+                            # The whole-file hash is computed on its own thread, the hash of
+                            # each part by the upload worker
+                            self.buffer_pool.release_when_done(
+                                buffer,
+                                future,
+                                hasher.update(memoryview(buffer)[:size]),
+                            )
+                            submitted = True
+                    finally:
+                        if not submitted:
+                            self.buffer_pool.release(buffer)
+
+                    if size == 0:
+                        break
                     futures.append(future)
                     part_number += 1
-                    processed_size += len(chunk)
-                    self.progress_bar.advance_progress_bar(s3_file_name, processed_size)
+                    processed_size += size
+                    self.telemetry.advance(s3_file_name, processed_size)
+                    if size < part_size:
+                        break
 
                 for future in concurrent.futures.as_completed(futures):
                     parts.append(future.result())
+            finally:
+                # Parts of a failed upload must not outlive it. Their bytes are read
+                # already, so they are finished for a resumed upload to skip.
+                concurrent.futures.wait(futures)
 
             parts.sort(key=lambda part: part["PartNumber"])
-            self.s3.complete_multipart_upload(
-                Bucket=self.s3_bucket,
-                Key=s3_file_name,
-                UploadId=upload_id,
-                MultipartUpload={"Parts": parts},
-            )
+            self._complete_multipart_upload(s3_file_name, upload_id, part_size, parts)
             upload_completed = True
+            self._record_transfer(
+                s3_file_name, part_size, concurrency, processed_size, started_at
+            )
 
-            sha256_value = sha256.hexdigest()
+            sha256_value = hasher.hexdigest()
             return sha256_value
 
         except Exception as e:
             raise e
 
         finally:
-            if upload_id is not None and not upload_completed:
+            hasher.close()
+            if upload_id is not None:
+                self._end_multipart_upload(s3_file_name, upload_id, upload_completed)
+
+    def _create_multipart_upload(self, s3_file_name: str, part_size: int) -> str:
+        """
+        Creates a multipart upload, or resumes a journaled one when the store is resumable.
+
+        A journaled upload is resumed only if it still exists in S3 and uses the
+        current part size. Journaled parts that S3 does not list are uploaded again.
+
+        Args:
+            s3_file_name (str): The name of the file in S3.
+            part_size (int): The part size of the upload.
+
+        Returns:
+            str: The upload ID of the multipart upload.
+        """
+        if self.journal_dir is None:
+            upload = self.s3.create_multipart_upload(
+                Bucket=self.s3_bucket, Key=s3_file_name, ChecksumAlgorithm="SHA256"
+            )
+            return upload["UploadId"]
+
+        journal = UploadJournal.load(self.journal_dir, self.s3_bucket, s3_file_name)
+        if journal is not None:
+            upload_id = journal.entry.upload_id
+            stored_parts = (
+                self._list_parts(s3_file_name, upload_id)
+                if journal.entry.part_size == part_size
+                else None
+            )
+            if stored_parts is not None:
+                journal.retain_parts(
+                    {
+                        n
+                        for n, part in journal.entry.parts.items()
+                        if stored_parts.get(n) == (part.etag, part.size)
+                    }
+                )
+                self.journals[s3_file_name] = journal
+                logger.info(
+                    f"Resuming upload of {s3_file_name} with {len(journal.entry.parts)} part(s) already uploaded."
+                )
+                return upload_id
+
+            try:
                 self.s3.abort_multipart_upload(
                     Bucket=self.s3_bucket, Key=s3_file_name, UploadId=upload_id
                 )
+            except ClientError:
+                pass  # The upload is gone already
 
-    def _upload_part(
+        upload = self.s3.create_multipart_upload(
+            Bucket=self.s3_bucket, Key=s3_file_name, ChecksumAlgorithm="SHA256"
+        )
+        self.journals[s3_file_name] = UploadJournal.create(
+            self.journal_dir,
+            self.s3_bucket,
+            s3_file_name,
+            upload["UploadId"],
+            part_size,
+        )
+        return upload["UploadId"]
+
+    def _complete_multipart_upload(
         self,
         s3_file_name: str,
         upload_id: str,
-        part_number: int,
-        chunk: bytes,
-    ) -> Dict[str, Any]:
+        part_size: int,
+        parts: List[Dict[str, Any]],
+    ) -> None:
         """
-        Uploads a part of a file to S3.
+        Completes a multipart upload and records its part layout.
 
         Args:
             s3_file_name (str): The name of the file in S3.
             upload_id (str): The upload ID of the multipart upload.
-            part_number (int): The part number of the chunk being uploaded.
-            chunk (bytes): The chunk of data to upload.
-
-        Returns:
-            dict: A dictionary containing the part number and the ETag of the uploaded part.
+            part_size (int): The part size of the upload.
+            parts (List[Dict[str, Any]]): The uploaded parts in part order.
         """
-        part = self.s3.upload_part(
-            Body=chunk,
+        self.s3.complete_multipart_upload(
             Bucket=self.s3_bucket,
             Key=s3_file_name,
             UploadId=upload_id,
-            PartNumber=part_number,
+            MultipartUpload={"Parts": parts},  # type: ignore[typeddict-item]
+        )
+        self.part_layouts[s3_file_name] = PartLayout(
+            part_size=part_size,
+            parts=[from_s3_checksum(part["ChecksumSHA256"]) for part in parts],
         )
-        return {"PartNumber": part_number, "ETag": part["ETag"]}
 
-    @resolve_path
-    def file_exists(self, path: str, prefix_match: bool = False) -> bool:
+    def _create_concurrency(self) -> AimdConcurrency:
         """
-        Checks if a file exists in the S3 bucket.
-
-        Args:
-            path (str): The path of the file in the S3 bucket.
-            prefix_match (bool, optional): If True, checks if any file with the given path prefix exists.
-                Defaults to False.
+        Creates the controller of the parts in flight for an upload.
 
-        Returns:
-            bool: True if the file exists, False otherwise.
+        Adaptive uploads start with a few parts in flight and grow up to
+        `s3_max_concurrency`. Other uploads always keep `s3_max_concurrency` parts in flight.
         """
-        if prefix_match:
-            s3 = boto3.resource("s3")
-            bucket = s3.Bucket(self.s3_bucket)
-            return any(bucket.objects.filter(Prefix=path))
+        if self.adaptive:
+            return AimdConcurrency(
+                limit=min(4, self.s3_max_concurrency),
+                max_limit=self.s3_max_concurrency,
+            )
+        return AimdConcurrency(
+            limit=self.s3_max_concurrency,
+            min_limit=self.s3_max_concurrency,
+            max_limit=self.s3_max_concurrency,
+        )
 
-        try:
-            self.s3.head_object(Bucket=self.s3_bucket, Key=path)
-            return True
-        except ClientError as e:
-            if e.response["Error"]["Code"] == "404":
-                return False
-            else:
-                raise  # some other error occurred
+    def _record_transfer(
+        self,
+        s3_file_name: str,
+        part_size: int,
+        concurrency: AimdConcurrency,
+        total_bytes: int,
+        started_at: float,
+    ) -> None:
+        stats = TransferStats(
+            part_size=part_size,
+            max_concurrency=concurrency.peak_limit,
+            total_bytes=total_bytes,
+            seconds=time.monotonic() - started_at,
+        )
+        self.transfer_stats[s3_file_name] = stats
+        if self.adaptive:
+            logger.info(
+                f"Uploaded {s3_file_name} with {part_size // (1024 * 1024)} MiB parts and "
+                f"up to {stats.max_concurrency} parts in flight at {stats.mbps:.1f} MB/s."
+            )
 
-    @resolve_path
-    def delete_file(self, path: str) -> None:
+    def _list_parts(
+        self, s3_file_name: str, upload_id: str
+    ) -> Optional[Dict[int, Tuple[str, int]]]:
         """
-        Deletes the specified file from the S3 bucket.
+        Lists the parts stored in S3 for a multipart upload.
 
         Args:
-            path (str): The path of the file to be deleted.
+            s3_file_name (str): The name of the file in S3.
+            upload_id (str): The upload ID of the multipart upload.
 
         Returns:
-            None
+            Optional[Dict[int, Tuple[str, int]]]: The ETag and size of the stored parts keyed by
+                part number, or None if the upload does not exist.
         """
-        if self.file_exists(path):
-            self.s3.delete_object(Bucket=self.s3_bucket, Key=path)
-            logger.info(f"{path} deleted.")
-        else:
-            logger.info(f"{path} not found.")
+        paginator = self.s3.get_paginator("list_parts")
+        stored_parts: Dict[int, Tuple[str, int]] = {}
+        try:
+            for page in paginator.paginate(
+                Bucket=self.s3_bucket, Key=s3_file_name, UploadId=upload_id
+            ):
+                for part in page.get("Parts", []):
+                    stored_parts[part["PartNumber"]] = (part["ETag"], part["Size"])
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "NoSuchUpload":
+                return None
+            raise
+        return stored_parts
 
-    @resolve_path
-    def glob(self, path_pattern: str) -> List[str]:
+    def _end_multipart_upload(
+        self, s3_file_name: str, upload_id: str, upload_completed: bool
+    ) -> None:
         """
-        Lists all files in the S3 bucket that match the specified pattern.
+        Cleans up after a multipart upload.
 
-        Args:
+        An incomplete upload is aborted unless it is journaled, in which case it is
+        kept for a later run to resume.
+        """
+        journal = self.journals.pop(s3_file_name, None)
+        if upload_completed:
+            if journal is not None:
+                journal.remove()
+        elif journal is None:
+            self.s3.abort_multipart_upload(
+                Bucket=self.s3_bucket, Key=s3_file_name, UploadId=upload_id
+            )
+
+    def _upload_ranges_to_s3(
+        self,
+        read_range: RangeReader,
+        total_size: int,
+        s3_file_name: str,
+    ) -> str:
+        """
+        Uploads a single file to S3, fetching each part as a separate byte range.
+
+        Parts are fetched, hashed and uploaded concurrently. The whole-file SHA256
+        hash is computed over the parts in order, so at most `s3_max_concurrency`
+        parts are held in memory at a time.
+
+        Args:
+            read_range (RangeReader): Returns a stream over the bytes [start, end) of the file.
+            total_size (int): The size of the file.
+            s3_file_name (str): The name of the file in S3.
+
+        Returns:
+            str: The SHA256 hash of the uploaded file.
+        """
+        upload_id = None
+        upload_completed = False
+        hasher = OrderedHasher()
+        try:
+            processed_size = 0
+            parts = []
+
+            part_size = choose_part_size(total_size, self.s3_chunk_size, self.adaptive)
+            concurrency = self._create_concurrency()
+            started_at = time.monotonic()
+
+            upload_id = self._create_multipart_upload(s3_file_name, part_size)
+
+            ranges = [
+                (start, min(start + part_size, total_size))
+                for start in range(0, total_size, part_size)
+            ]
+
+            # The parts in flight with their buffers, in part order so that the
+            # hash is updated in order
+            in_flight: Deque[Tuple[concurrent.futures.Future, bytearray, int]] = deque()
+            executor = get_part_executor()
+            next_range = 0
+            try:
+                while next_range < len(ranges) or in_flight:
+                    while (
+                        next_range < len(ranges) and len(in_flight) < concurrency.limit
+                    ):
+                        # Never wait for memory while holding parts that only
+                        # this loop can release
+                        buffer = (
+                            self.buffer_pool.try_acquire(part_size)
+                            if in_flight
+                            else self.buffer_pool.acquire(part_size)
+                        )
+                        if buffer is None:
+                            break
+
+                        start, end = ranges[next_range]
+                        future = executor.submit(
+                            self._upload_range,
+                            s3_file_name,
+                            upload_id,
+                            next_range + 1,
+                            read_range,
+                            start,
+                            end,
+                            buffer,
+                            concurrency,
+                        )
+                        in_flight.append((future, buffer, end - start))
+                        next_range += 1
+
+                    future, buffer, size = in_flight.popleft()
+                    try:
+                        parts.append(future.result())
+                    except BaseException:
+                        self.buffer_pool.release(buffer)
+                        raise
+                    self.buffer_pool.release_when_done(
+                        buffer, hasher.update(memoryview(buffer)[:size])
+                    )
+                    processed_size += size
+                    self.telemetry.advance(s3_file_name, processed_size)
+            finally:
+                # Wait for the running parts before their buffers are freed
+                cancel_and_wait(future for future, _, _ in in_flight)
+                for _, buffer, _ in in_flight:
+                    self.buffer_pool.release(buffer)
+
+            self._complete_multipart_upload(s3_file_name, upload_id, part_size, parts)
+            upload_completed = True
+            self._record_transfer(
+                s3_file_name, part_size, concurrency, processed_size, started_at
+            )
+
+            return hasher.hexdigest()
+
+        finally:
+            hasher.close()
+            if upload_id is not None:
+                self._end_multipart_upload(s3_file_name, upload_id, upload_completed)
+
+    def _upload_range(
+        self,
+        s3_file_name: str,
+        upload_id: str,
+        part_number: int,
+        read_range: RangeReader,
+        start: int,
+        end: int,
+        buffer: bytearray,
+        concurrency: Optional[AimdConcurrency] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fetches a byte range of a file and uploads it as a part to S3.
+
+        Args:
+            s3_file_name (str): The name of the file in S3.
+            upload_id (str): The upload ID of the multipart upload.
+            part_number (int): The part number of the range being uploaded.
+            read_range (RangeReader): Returns a stream over the bytes [start, end) of the file.
+            start (int): The first byte of the range.
+            end (int): The byte after the last byte of the range.
+            buffer (bytearray): The buffer to read the range into. It is at least as large as the range.
+            concurrency (AimdConcurrency, optional): Records the latency of the part.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the part number and the ETag of the uploaded part.
+        """
+        started_at = time.monotonic()
+        view = memoryview(buffer)[: end - start]
+        with read_range(start, end) as stream:
+            size = fill_buffer(as_reader(stream), view)
+
+        if size != end - start:
+            raise Exception(
+                f"Expected {end - start} bytes for range {start}-{end} of {s3_file_name}, got {size}"
+            )
+
+        part = self._upload_part(s3_file_name, upload_id, part_number, view)
+        if concurrency is not None:
+            # The latency of a range covers both the download and the upload
+            concurrency.record(size, time.monotonic() - started_at)
+        return part
+
+    def _upload_part(
+        self,
+        s3_file_name: str,
+        upload_id: str,
+        part_number: int,
+        chunk: Union[bytes, bytearray, memoryview],
+        concurrency: Optional[AimdConcurrency] = None,
+    ) -> Dict[str, Any]:
+        """
+        Uploads a part of a file to S3.
+
+        The SHA256 hash of the part is computed by the calling worker and sent as
+        the part checksum, so S3 rejects a part that is corrupted in transit.
+
+        Args:
+            s3_file_name (str): The name of the file in S3.
+            upload_id (str): The upload ID of the multipart upload.
+            part_number (int): The part number of the chunk being uploaded.
+            chunk (bytes | bytearray | memoryview): The chunk of data to upload. It is sent without a copy.
+            concurrency (AimdConcurrency, optional): Records the latency of the part.
+
+        Returns:
+            dict: A dictionary containing the part number, the ETag and the checksum of the uploaded part.
+        """
+        sha256 = hashlib.sha256(chunk).hexdigest()
+        journal = self.journals.get(s3_file_name)
+        if journal is not None:
+            journaled_part = journal.get_part(part_number)
+            # Skip the parts that a previous run already uploaded with the same content
+            if (
+                journaled_part is not None
+                and journaled_part.sha256 == sha256
+                and journaled_part.size == len(chunk)
+            ):
+                return {
+                    "PartNumber": part_number,
+                    "ETag": journaled_part.etag,
+                    "ChecksumSHA256": to_s3_checksum(sha256),
+                }
+
+        started_at = time.monotonic()
+        part = self.s3.upload_part(
+            Body=cast(IO[bytes], BufferReader(chunk)),
+            Bucket=self.s3_bucket,
+            Key=s3_file_name,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            ChecksumSHA256=to_s3_checksum(sha256),
+        )
+        if concurrency is not None:
+            concurrency.record(len(chunk), time.monotonic() - started_at)
+        self.telemetry.add_retries(
+            s3_file_name, part.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        )
+
+        if journal is not None:
+            journal.record_part(
+                part_number,
+                JournalPart(etag=part["ETag"], size=len(chunk), sha256=sha256),
+            )
+        return {
+            "PartNumber": part_number,
+            "ETag": part["ETag"],
+            "ChecksumSHA256": to_s3_checksum(sha256),
+        }
+
+    @resolve_path
+    def get_part_layout(self, path: str) -> Optional[PartLayout]:
+        return self.part_layouts.get(path)
+
+    @resolve_path
+    def file_exists(self, path: str, prefix_match: bool = False) -> bool:
+        """
+        Checks if a file exists in the S3 bucket.
+
+        Args:
+            path (str): The path of the file in the S3 bucket.
+            prefix_match (bool, optional): If True, checks if any file with the given path prefix exists.
+                Defaults to False.
+
+        Returns:
+            bool: True if the file exists, False otherwise.
+        """
+        if prefix_match:
+            s3 = boto3.resource("s3")
+            bucket = s3.Bucket(self.s3_bucket)
+            return any(bucket.objects.filter(Prefix=path))
+
+        try:
+            self.s3.head_object(Bucket=self.s3_bucket, Key=path)
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "404":
+                return False
+            else:
+                raise  # some other error occurred
+
+    @resolve_path
+    def get_file_size(self, path: str) -> int:
+        """
+        Returns the size of a file in the S3 bucket.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            int: The size of the file in bytes.
+        """
+        head = self.s3.head_object(Bucket=self.s3_bucket, Key=path)
+        return head["ContentLength"]
+
+    @resolve_path
+    def open_range(self, path: str, start: int, length: int) -> IOBase:
+        """
+        Opens a stream over a byte range of a file in the S3 bucket.
+
+        Args:
+            path (str): The path of the file.
+            start (int): The first byte of the range.
+            length (int): The number of bytes in the range.
+
+        Returns:
+            IOBase: The streaming body of a ranged GET.
+        """
+        _check_range(start, length)
+        if length == 0:
+            return io.BytesIO()
+
+        try:
+            response = self.s3.get_object(
+                Bucket=self.s3_bucket,
+                Key=path,
+                Range=f"bytes={start}-{start + length - 1}",
+            )
+        except ClientError as e:
+            # The range starts past the end of the file
+            if e.response["Error"]["Code"] == "InvalidRange":
+                return io.BytesIO()
+            raise
+        return response["Body"]
+
+    @resolve_path
+    def delete_file(self, path: str) -> None:
+        """
+        Deletes the specified file from the S3 bucket.
+
+        Args:
+            path (str): The path of the file to be deleted.
+
+        Returns:
+            None
+        """
+        if self.file_exists(path):
+            self.s3.delete_object(Bucket=self.s3_bucket, Key=path)
+            self._invalidate_listings(path)
+            self.part_layouts.pop(path, None)
+            logger.info(f"{path} deleted.")
+        else:
+            logger.info(f"{path} not found.")
+
+    @resolve_path
+    def glob(self, path_pattern: str) -> List[str]:
+        """
+        Lists all files in the S3 bucket that match the specified pattern.
+
+        Only the keys under the longest literal prefix of the pattern are listed.
+
+        Args:
             path_pattern (str): The pattern to match.
 
         Returns:
             List[str]: A list of file paths that match the pattern.
         """
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(self.s3_bucket)
+        pattern = re.compile(path_pattern)
+        return [
+            key
+            for key in self._list_keys(literal_prefix(path_pattern))
+            if pattern.match(key)
+        ]
+
+    def _list_keys(self, prefix: str) -> List[str]:
+        """
+        Lists all keys under a prefix, reusing a recent listing of the prefix or of a parent prefix.
+
+        Args:
+            prefix (str): The prefix of the keys.
+
+        Returns:
+            List[str]: The keys under the prefix.
+        """
+        now = time.monotonic()
+        with S3ModelStore._listing_cache_lock:
+            for (bucket, cached_prefix), (listed_at, keys) in list(
+                S3ModelStore._listing_cache.items()
+            ):
+                if now - listed_at > LISTING_CACHE_TTL:
+                    del S3ModelStore._listing_cache[(bucket, cached_prefix)]
+                elif bucket == self.s3_bucket and prefix.startswith(cached_prefix):
+                    return [key for key in keys if key.startswith(prefix)]
+
+        paginator = self.s3.get_paginator("list_objects_v2")
+        keys = [
+            obj["Key"]
+            for page in paginator.paginate(Bucket=self.s3_bucket, Prefix=prefix)
+            for obj in page.get("Contents", [])
+        ]
+
+        with S3ModelStore._listing_cache_lock:
+            S3ModelStore._listing_cache[(self.s3_bucket, prefix)] = (now, keys)
+        return keys
+
+    def _invalidate_listings(self, key: str) -> None:
+        """
+        Drops the cached listings that a change to the given key makes stale.
+        """
+        with S3ModelStore._listing_cache_lock:
+            for bucket, cached_prefix in list(S3ModelStore._listing_cache):
+                if bucket == self.s3_bucket and key.startswith(cached_prefix):
+                    del S3ModelStore._listing_cache[(bucket, cached_prefix)]
+
+    @staticmethod
+    def clear_listing_cache() -> None:
+        with S3ModelStore._listing_cache_lock:
+            S3ModelStore._listing_cache.clear()
+
+
+class LocalModelStore(ModelStore):
+    """
+    A store for storing models in a local directory.
+
+    The directory uses the same layout as the S3 bucket of S3ModelStore, so it can
+    be a shared NFS or hostPath cache. Files are written to a temporary file first
+    and only appear under their path once they are complete and verified.
+    """
 
+    def __init__(
+        self,
+        root_dir: str,
+        chunk_size: int = 8 * 1024 * 1024,
+        # Max number of chunks read ahead of the disk writes
+        write_queue_size: int = 8,
+        max_concurrency: int = 8,
+        with_progress_bar: bool = True,
+    ) -> None:
+        self.root_dir = root_dir
+        self.chunk_size = chunk_size
+        self.write_queue_size = write_queue_size
+        self.max_concurrency = max_concurrency
+        self.with_progress_bar = with_progress_bar
+
+        self.telemetry = TransferTelemetry(
+            "Saving model(s) to local store", with_progress_bar
+        )
+
+    def _local_path(self, path: str) -> str:
+        return os.path.join(self.root_dir, *path.split("/"))
+
+    @staticmethod
+    def _temp_path(local_path: str) -> str:
+        dir_name, file_name = os.path.split(local_path)
+        return os.path.join(dir_name, f".{file_name}.tmp")
+
+    @resolve_path
+    def save(self, path: str, data: bytes) -> None:
+        local_path = self._local_path(path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        temp_path = self._temp_path(local_path)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, local_path)
+
+    @resolve_path
+    def save_stream(
+        self,
+        path: str,
+        stream: StreamLike,
+        total_size: int,
+        sha256: str = "",
+    ) -> None:
+        """
+        Saves a stream to a file in the local directory.
+
+        Streams backed by a regular file are copied in the kernel with
+        `copy_file_range` or `sendfile`. Other streams are written to a
+        preallocated file by a write-behind thread while the next chunks are read.
+
+        Args:
+            path (str): The path of the file in the store.
+            stream (StreamLike): The response object or the file stream object.
+            total_size (int): The size of the file.
+            sha256 (str, optional): The expected SHA256 hash of the file.
+
+        Raises:
+            Exception: If the SHA256 hash of the saved file does not match the expected value.
+        """
+        src_fd = _regular_file_fd(stream)
+
+        def write(f: io.BufferedWriter) -> str:
+            if src_fd is not None:
+                copied = _zero_copy(
+                    src_fd, f.fileno(), cast(IOBase, stream).tell(), total_size
+                )
+                if copied != total_size:
+                    raise Exception(
+                        f"Expected {total_size} bytes for {path}, copied {copied}"
+                    )
+                # The copy never passes through user space, so the hash is only
+                # computed when there is a value to check it against.
+                return _hash_file(f.name) if sha256 else ""
+            return self._write_behind(f, iter_stream(stream, self.chunk_size), path)
+
+        self._save_verified(path, total_size, sha256, write)
+
+    @resolve_path
+    def save_ranges(
+        self,
+        path: str,
+        read_range: RangeReader,
+        total_size: int,
+        sha256: str = "",
+    ) -> None:
+        """
+        Saves a file by fetching its byte ranges in parallel and writing each range at its offset.
+
+        Args:
+            path (str): The path of the file in the store.
+            read_range (RangeReader): Returns a stream over the bytes [start, end) of the file.
+            total_size (int): The size of the file.
+            sha256 (str, optional): The expected SHA256 hash of the file.
+
+        Raises:
+            Exception: If the SHA256 hash of the saved file does not match the expected value.
+        """
+        if total_size <= self.chunk_size:
+            super().save_ranges(path, read_range, total_size, sha256)
+            return
+
+        def write(f: io.BufferedWriter) -> str:
+            fd = f.fileno()
+
+            def write_range(start: int, end: int) -> bytes:
+                with read_range(start, end) as stream:
+                    chunk = read_stream(stream, end - start)
+                if len(chunk) != end - start:
+                    raise Exception(
+                        f"Expected {end - start} bytes for range {start}-{end} of {path}, got {len(chunk)}"
+                    )
+                os.pwrite(fd, chunk, start)
+                return chunk
+
+            sha256_hash = hashlib.sha256()
+            ranges = [
+                (start, min(start + self.chunk_size, total_size))
+                for start in range(0, total_size, self.chunk_size)
+            ]
+            executor = get_part_executor()
+            # Futures are kept in range order so that the hash is updated in order
+            futures: Deque[concurrent.futures.Future] = deque()
+            next_range = 0
+            processed_size = 0
+            try:
+                while next_range < len(ranges) or futures:
+                    while (
+                        next_range < len(ranges) and len(futures) < self.max_concurrency
+                    ):
+                        futures.append(
+                            executor.submit(write_range, *ranges[next_range])
+                        )
+                        next_range += 1
+
+                    chunk = futures.popleft().result()
+                    sha256_hash.update(chunk)
+                    processed_size += len(chunk)
+                    self.telemetry.advance(path, processed_size)
+            finally:
+                # The file is closed after this, so no range may still be writing
+                cancel_and_wait(futures)
+            return sha256_hash.hexdigest()
+
+        self._save_verified(path, total_size, sha256, write)
+
+    def _save_verified(
+        self,
+        path: str,
+        total_size: int,
+        sha256: str,
+        write: Callable[[io.BufferedWriter], str],
+    ) -> None:
+        """
+        Writes a file unless it already exists and verifies its SHA256 hash.
+
+        Args:
+            path (str): The path of the file in the store.
+            total_size (int): The size of the file.
+            sha256 (str): The expected SHA256 hash of the file. Empty to skip the check.
+            write (Callable[[io.BufferedWriter], str]): Writes the file content to a
+                preallocated file and returns its SHA256 hash.
+
+        Raises:
+            Exception: If the SHA256 hash of the written file does not match the expected value.
+        """
+        self.telemetry.start_file(path, total_size)
+
+        try:
+            if self.file_exists(path):
+                self.telemetry.finish_file(path, "skipped")
+                return
+
+            local_path = self._local_path(path)
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            temp_path = self._temp_path(local_path)
+            try:
+                with open(temp_path, "wb") as f:
+                    _preallocate(f.fileno(), total_size)
+                    sha256_value = write(f)
+
+                if sha256 and sha256 != sha256_value:
+                    message = f"SHA256 hash of the downloaded file does not match the expected value for {path}"
+                    logger.error(message)
+                    raise Exception(message)
+
+                os.replace(temp_path, local_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+            self.telemetry.finish_file(path, "uploaded")
+        except Exception as e:
+            self.telemetry.fail_file(path, str(e))
+            raise
+
+    def _write_behind(
+        self, f: io.BufferedWriter, chunks: Iterator[bytes], path: str
+    ) -> str:
+        """
+        Writes chunks to a file on a separate thread while the next chunks are read and hashed.
+
+        Args:
+            f (io.BufferedWriter): The file to write to.
+            chunks (Iterator[bytes]): The chunks to write.
+            path (str): The path of the file in the store.
+
+        Returns:
+            str: The SHA256 hash of the written chunks.
+        """
+        chunk_queue: queue.Queue[Optional[bytes]] = queue.Queue(
+            maxsize=self.write_queue_size
+        )
+        errors: List[Exception] = []
+
+        def writer() -> None:
+            while True:
+                chunk = chunk_queue.get()
+                if chunk is None:
+                    return
+                if errors:
+                    # Keep draining so that the reader never blocks on a full queue
+                    continue
+                try:
+                    f.write(chunk)
+                except Exception as e:
+                    errors.append(e)
+
+        writer_thread = threading.Thread(target=writer, daemon=True)
+        writer_thread.start()
+
+        sha256 = hashlib.sha256()
+        processed_size = 0
+        try:
+            for chunk in chunks:
+                if errors:
+                    break
+                sha256.update(chunk)
+                chunk_queue.put(chunk)
+                processed_size += len(chunk)
+                self.telemetry.advance(path, processed_size)
+        finally:
+            chunk_queue.put(None)
+            writer_thread.join()
+
+        if errors:
+            raise errors[0]
+        # Drop the preallocated tail if the stream was shorter than announced
+        f.flush()
+        f.truncate(processed_size)
+        return sha256.hexdigest()
+
+    def _iter_keys(self) -> Iterator[str]:
+        for dir_path, _, file_names in os.walk(self.root_dir):
+            rel_dir = os.path.relpath(dir_path, self.root_dir)
+            for file_name in file_names:
+                # Skip the files that are still being written
+                if file_name.startswith(".") and file_name.endswith(".tmp"):
+                    continue
+                rel_path = (
+                    file_name
+                    if rel_dir == os.curdir
+                    else os.path.join(rel_dir, file_name)
+                )
+                yield rel_path.replace(os.sep, "/")
+
+    @resolve_path
+    def file_exists(self, path: str, prefix_match: bool = False) -> bool:
+        """
+        Checks if a file exists in the local directory.
+
+        Args:
+            path (str): The path of the file in the store.
+            prefix_match (bool, optional): If True, checks if any file with the given path prefix exists.
+                Defaults to False.
+
+        Returns:
+            bool: True if the file exists, False otherwise.
+        """
+        if prefix_match:
+            return any(key.startswith(path) for key in self._iter_keys())
+
+        return os.path.isfile(self._local_path(path))
+
+    @resolve_path
+    def get_file_size(self, path: str) -> int:
+        return os.path.getsize(self._local_path(path))
+
+    @resolve_path
+    def open_range(self, path: str, start: int, length: int) -> IOBase:
+        """
+        Opens a stream over a byte range of a file in the local directory.
+
+        Args:
+            path (str): The path of the file.
+            start (int): The first byte of the range.
+            length (int): The number of bytes in the range.
+
+        Returns:
+            IOBase: A stream that reads the range with positional reads.
+        """
+        _check_range(start, length)
+        return FileRangeReader(self._local_path(path), start, length)
+
+    @resolve_path
+    def delete_file(self, path: str) -> None:
+        """
+        Deletes the specified file from the local directory.
+
+        Args:
+            path (str): The path of the file to be deleted.
+
+        Returns:
+            None
+        """
+        if self.file_exists(path):
+            os.remove(self._local_path(path))
+            logger.info(f"{path} deleted.")
+        else:
+            logger.info(f"{path} not found.")
+
+    @resolve_path
+    def glob(self, path_pattern: str) -> List[str]:
+        """
+        Lists all files in the local directory that match the specified pattern.
+
+        Args:
+            path_pattern (str): The pattern to match.
+
+        Returns:
+            List[str]: A list of file paths that match the pattern.
+        """
         pattern = re.compile(path_pattern)
-        return [obj.key for obj in bucket.objects.all() if pattern.match(obj.key)]
+        return sorted(key for key in self._iter_keys() if pattern.match(key))
+
+
+class FileRangeReader(io.RawIOBase):
+    """
+    A readable stream over a byte range of a local file.
+
+    Reads are positional, so ranges of the same file can be read concurrently.
+    """
+
+    def __init__(self, file_path: str, start: int, length: int) -> None:
+        self.fd = os.open(file_path, os.O_RDONLY)
+        self.position = start
+        self.end = start + length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:  # type: ignore[override]
+        size = max(0, min(len(buffer), self.end - self.position))
+        if size == 0:
+            return 0
+        if hasattr(os, "preadv"):
+            n = os.preadv(self.fd, [memoryview(buffer)[:size]], self.position)
+        else:
+            data = os.pread(self.fd, size, self.position)
+            n = len(data)
+            buffer[:n] = data
+        self.position += n
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            os.close(self.fd)
+        super().close()
+
+
+def _check_range(start: int, length: int) -> None:
+    if start < 0 or length < 0:
+        raise ValueError(f"Invalid byte range: start={start}, length={length}")
+
+
+def _regular_file_fd(stream: StreamLike) -> Optional[int]:
+    """
+    Returns the file descriptor of a stream if it is backed by a regular file.
+    """
+    if isinstance(stream, requests.Response):
+        return None
+    try:
+        fd = cast(IOBase, stream).fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    return fd if stat.S_ISREG(os.fstat(fd).st_mode) else None
+
+
+def _preallocate(fd: int, size: int) -> None:
+    """
+    Reserves the disk blocks of a file up front so that writes do not fragment it.
+    """
+    if size <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        # Not every file system supports fallocate, e.g. some NFS versions
+        if e.errno not in (errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL):
+            raise
+
+
+def _zero_copy(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    """
+    Copies bytes between two files without passing them through user space.
+
+    Uses `copy_file_range` where available and falls back to `sendfile`, then to
+    plain reads and writes.
+
+    Args:
+        src_fd (int): The source file descriptor.
+        dst_fd (int): The destination file descriptor.
+        offset (int): The offset in the source file to copy from.
+        count (int): The number of bytes to copy.
+
+    Returns:
+        int: The number of bytes copied.
+    """
+    copied = 0
+    use_copy_file_range = hasattr(os, "copy_file_range")
+    use_sendfile = hasattr(os, "sendfile")
+    while copied < count:
+        try:
+            if use_copy_file_range:
+                n = os.copy_file_range(  # type: ignore[attr-defined]
+                    src_fd, dst_fd, count - copied, offset + copied, copied
+                )
+            elif use_sendfile:
+                os.lseek(dst_fd, copied, os.SEEK_SET)
+                n = os.sendfile(dst_fd, src_fd, offset + copied, count - copied)
+            else:
+                data = os.pread(
+                    src_fd, min(count - copied, 8 * 1024 * 1024), offset + copied
+                )
+                n = os.pwrite(dst_fd, data, copied)
+        except OSError as e:
+            if not (use_copy_file_range or use_sendfile) or e.errno not in (
+                errno.EXDEV,
+                errno.ENOSYS,
+                errno.EINVAL,
+                errno.EOPNOTSUPP,
+            ):
+                raise
+            # Fall back to the next method for this pair of files
+            if use_copy_file_range:
+                use_copy_file_range = False
+            else:
+                use_sendfile = False
+            continue
+        if n == 0:
+            break
+        copied += n
+    return copied
+
+
+def _hash_file(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+from tqdm import tqdm
+
+from paka.constants import PUSHGATEWAY_URL_ENV_VAR, TRANSFER_SUMMARY_PATH_ENV_VAR
+from paka.logger import logger
+
+# Seconds between two renders of the progress bar
+RENDER_INTERVAL = 0.5
+
+
+class FileTelemetry:
+    """
+    The live counters of a file transfer.
+
+    `bytes_done` has a single writer, the thread that drives the transfer, so it
+    is a plain attribute. Retries are counted by the part workers, each in its
+    own slot, and summed on read. No counter update takes a lock.
+    """
+
+    def __init__(self, name: str, total_size: int) -> None:
+        self.name = name
+        self.total_size = total_size
+        self.bytes_done = 0
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.status = "running"
+        self.error: Optional[str] = None
+        self._retries: Dict[int, int] = {}
+
+    @property
+    def retries(self) -> int:
+        return sum(list(self._retries.values()))
+
+    def add_retries(self, count: int) -> None:
+        thread_id = threading.get_ident()
+        self._retries[thread_id] = self._retries.get(thread_id, 0) + count
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+@dataclass
+class FileSummary:
+    name: str
+    size: int
+    bytes: int
+    seconds: float
+    mbps: float
+    retries: int
+    # uploaded, copied, skipped or failed
+    status: str
+    error: Optional[str] = None
+
+
+@dataclass
+class TransferSummary:
+    """
+    The structured outcome of the transfers of a store.
+
+    Attributes:
+        bytes (int): The bytes moved over the network or disk. Skipped and copied files do not count.
+        seconds (float): The wall-clock time from the first file started to the last file finished.
+        mbps (float): The aggregate throughput in MB/s.
+        retries (int): The retried requests over all files.
+        files (List[FileSummary]): The outcome of each file.
+    """
+
+    bytes: int = 0
+    seconds: float = 0.0
+    mbps: float = 0.0
+    retries: int = 0
+    files: List[FileSummary] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the summary in the Prometheus text exposition format.
+        """
+        lines = [
+            "# TYPE paka_transfer_bytes gauge",
+            f"paka_transfer_bytes {self.bytes}",
+            "# TYPE paka_transfer_seconds gauge",
+            f"paka_transfer_seconds {self.seconds:.3f}",
+            "# TYPE paka_transfer_retries gauge",
+            f"paka_transfer_retries {self.retries}",
+            "# TYPE paka_transfer_file_seconds gauge",
+        ]
+        for f in self.files:
+            name = f.name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(
+                f'paka_transfer_file_seconds{{file="{name}",status="{f.status}"}} {f.seconds:.3f}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+def push_to_gateway(summary: TransferSummary, gateway_url: str, job: str) -> None:
+    """
+    Pushes a transfer summary to a Prometheus Pushgateway.
+
+    Args:
+        summary (TransferSummary): The summary to push.
+        gateway_url (str): The base URL of the Pushgateway.
+        job (str): The job to group the metrics under.
+    """
+    response = requests.put(
+        f"{gateway_url.rstrip('/')}/metrics/job/{job}",
+        data=summary.to_prometheus().encode("utf-8"),
+        headers={"Content-Type": "text/plain; version=0.0.4"},
+        timeout=10,
+    )
+    response.raise_for_status()
+
+
+def export_summary(summary: TransferSummary, job: str) -> None:
+    """
+    Exports a transfer summary to the destinations configured by the environment.
+
+    The summary is written as JSON to the file named by PAKA_TRANSFER_SUMMARY_PATH
+    and pushed to the Pushgateway at PAKA_PUSHGATEWAY_URL. Failures are logged, a
+    transfer never fails because its metrics could not be exported.
+
+    Args:
+        summary (TransferSummary): The summary to export.
+        job (str): The job to group the pushed metrics under.
+    """
+    summary_path = os.environ.get(TRANSFER_SUMMARY_PATH_ENV_VAR)
+    if summary_path:
+        try:
+            with open(summary_path, "w") as f:
+                f.write(summary.to_json())
+        except OSError as e:
+            logger.warn(f"Failed to write the transfer summary to {summary_path}: {e}")
+
+    gateway_url = os.environ.get(PUSHGATEWAY_URL_ENV_VAR)
+    if gateway_url:
+        try:
+            push_to_gateway(summary, gateway_url, job)
+        except requests.RequestException as e:
+            logger.warn(f"Failed to push the transfer metrics to {gateway_url}: {e}")
+
+
+class TransferTelemetry:
+    """
+    Collects the progress of the file transfers of a store.
+
+    Transfer threads only write their own counters. A background thread
+    renders the progress bar every RENDER_INTERVAL seconds from a snapshot of
+    the counters, so the upload loop never waits on the terminal.
+    """
+
+    def __init__(
+        self, message: str = "Downloading", show_progress: bool = True
+    ) -> None:
+        self.message = message
+        self.show_progress = show_progress
+        self.files: Dict[str, FileTelemetry] = {}
+        # Guards the start and the end of the renderer, never the counters
+        self.lock = threading.Lock()
+        self.renderer: Optional[threading.Thread] = None
+        self.stop_rendering = threading.Event()
+
+    def start_file(self, name: str, total_size: int) -> None:
+        self.files[name] = FileTelemetry(name, total_size)
+        if self.show_progress:
+            self._start_renderer()
+
+    def advance(self, name: str, bytes_done: int) -> None:
+        """
+        Records the bytes of a file transferred so far. Called from the hot path.
+        """
+        file = self.files.get(name)
+        if file is not None:
+            file.bytes_done = bytes_done
+
+    def add_retries(self, name: str, count: int) -> None:
+        file = self.files.get(name)
+        if file is not None and count:
+            file.add_retries(count)
+
+    def finish_file(self, name: str, status: str = "uploaded") -> None:
+        file = self.files.get(name)
+        if file is None:
+            return
+        file.status = status
+        file.finished_at = time.monotonic()
+        if status == "uploaded":
+            file.bytes_done = file.total_size
+        # Without a progress bar, the log is the only record of the finished files
+        if not self.show_progress:
+            if status == "uploaded":
+                logger.info(f"Model file {name} is saved successfully.")
+            else:
+                logger.info(f"Model file {name} is {status}.")
+
+    def fail_file(self, name: str, error: str) -> None:
+        file = self.files.get(name)
+        if file is None:
+            return
+        file.status = "failed"
+        file.error = error
+        file.finished_at = time.monotonic()
+
+    def summary(self) -> TransferSummary:
+        """
+        Returns the structured summary of the transfers so far.
+        """
+        files = list(self.files.values())
+        if not files:
+            return TransferSummary()
+
+        moved = [f for f in files if f.status in ("running", "uploaded", "failed")]
+        total_bytes = sum(f.bytes_done for f in moved)
+        seconds = max((f.finished_at or time.monotonic()) for f in files) - min(
+            f.started_at for f in files
+        )
+        return TransferSummary(
+            bytes=total_bytes,
+            seconds=seconds,
+            mbps=total_bytes / seconds / 1e6 if seconds > 0 else 0.0,
+            retries=sum(f.retries for f in files),
+            files=[
+                FileSummary(
+                    name=f.name,
+                    size=f.total_size,
+                    bytes=f.bytes_done,
+                    seconds=f.seconds,
+                    mbps=f.bytes_done / f.seconds / 1e6 if f.seconds > 0 else 0.0,
+                    retries=f.retries,
+                    status=f.status,
+                    error=f.error,
+                )
+                for f in files
+            ],
+        )
+
+    def close(self) -> TransferSummary:
+        """
+        Stops the renderer and logs the summary of the transfers.
+
+        Returns:
+            TransferSummary: The summary.
+        """
+        with self.lock:
+            renderer = self.renderer
+            self.renderer = None
+        if renderer is not None:
+            self.stop_rendering.set()
+            renderer.join()
+            self.stop_rendering.clear()
+
+        summary = self.summary()
+        if summary.files:
+            logger.info(
+                f"{self.message}: {len(summary.files)} file(s), {summary.bytes / 1e6:.1f} MB in "
+                f"{summary.seconds:.1f}s at {summary.mbps:.1f} MB/s, {summary.retries} retries."
+            )
+        return summary
+
+    def _start_renderer(self) -> None:
+        with self.lock:
+            if self.renderer is not None:
+                return
+            self.renderer = threading.Thread(target=self._render, daemon=True)
+            self.renderer.start()
+
+    def _render(self) -> None:
+        bar = tqdm(total=0, unit="B", unit_scale=True, desc=self.message)
+        try:
+            while True:
+                stopping = self.stop_rendering.wait(RENDER_INTERVAL)
+                files = list(self.files.values())
+                bar.total = sum(f.total_size for f in files)
+                bar.update(sum(f.bytes_done for f in files) - bar.n)
+                running = [f.name for f in files if f.status == "running"]
+                bar.set_postfix_str(running[-1] if running else "", refresh=False)
+                bar.refresh()
+                if stopping:
+                    return
+        finally:
+            bar.close()
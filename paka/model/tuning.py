@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import math
+import statistics
+import threading
+from dataclasses import dataclass, field
+from typing import List
+
+MiB = 1024 * 1024
+
+# S3 multipart upload limits
+S3_MAX_PARTS = 10000
+S3_MIN_PART_SIZE = 5 * MiB
+S3_MAX_PART_SIZE = 5 * 1024 * MiB
+
+# Number of parts that adaptive part sizing aims for. Fewer, larger parts cut
+# the per-request overhead; enough parts are left to keep many streams busy.
+ADAPTIVE_TARGET_PARTS = 1000
+ADAPTIVE_MAX_PART_SIZE = 64 * MiB
+
+
+def choose_part_size(total_size: int, part_size: int, adaptive: bool = False) -> int:
+    """
+    Chooses the part size of a multipart upload.
+
+    The part size is never smaller than `part_size` and always large enough to fit
+    the file in S3_MAX_PARTS parts. In adaptive mode, large files get larger parts
+    so that the upload has about ADAPTIVE_TARGET_PARTS parts.
+
+    Args:
+        total_size (int): The size of the file.
+        part_size (int): The configured part size.
+        adaptive (bool, optional): Whether to scale the part size with the file size.
+
+    Returns:
+        int: The part size, rounded up to a whole MiB when it had to grow.
+    """
+    size = part_size
+    if adaptive:
+        size = max(
+            size, min(ADAPTIVE_MAX_PART_SIZE, total_size // ADAPTIVE_TARGET_PARTS)
+        )
+
+    min_size = math.ceil(total_size / S3_MAX_PARTS)
+    size = max(size, min_size)
+    if size != part_size:
+        size = math.ceil(size / MiB) * MiB
+    return min(size, S3_MAX_PART_SIZE)
+
+
+@dataclass
+class TransferStats:
+    """
+    The parameters and the outcome of a transfer.
+
+    Attributes:
+        part_size (int): The part size of the transfer.
+        max_concurrency (int): The highest number of parts in flight.
+        total_bytes (int): The number of bytes transferred.
+        seconds (float): The wall-clock duration of the transfer.
+    """
+
+    part_size: int
+    max_concurrency: int = 0
+    total_bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def mbps(self) -> float:
+        """The achieved throughput in MB/s."""
+        return self.total_bytes / self.seconds / 1e6 if self.seconds > 0 else 0.0
+
+
+@dataclass
+class AimdConcurrency:
+    """
+    Adjusts the number of parts in flight from the measured per-part latency.
+
+    The limit grows by one after every window of parts whose latency stays close to
+    the best latency seen so far (additive increase). When the latency of a window
+    exceeds `backoff_ratio` times the best latency, the link is congested and the
+    limit is halved (multiplicative decrease).
+
+    Attributes:
+        limit (int): The current number of parts allowed in flight.
+        min_limit (int): The lower bound of the limit.
+        max_limit (int): The upper bound of the limit.
+        backoff_ratio (float): The latency ratio that counts as congestion.
+    """
+
+    limit: int
+    min_limit: int = 1
+    max_limit: int = 64
+    backoff_ratio: float = 2.0
+    peak_limit: int = 0
+    _best_seconds_per_byte: float = math.inf
+    _window: List[float] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        self.limit = max(self.min_limit, min(self.limit, self.max_limit))
+        self.peak_limit = self.limit
+
+    def record(self, size: int, seconds: float) -> None:
+        """
+        Records the latency of a completed part.
+
+        Args:
+            size (int): The size of the part.
+            seconds (float): The time it took to transfer the part.
+        """
+        if size <= 0:
+            return
+
+        with self._lock:
+            self._window.append(seconds / size)
+            if len(self._window) < self.limit:
+                return
+
+            latency = statistics.median(self._window)
+            self._window = []
+            self._best_seconds_per_byte = min(self._best_seconds_per_byte, latency)
+
+            if latency > self._best_seconds_per_byte * self.backoff_ratio:
+                self.limit = max(self.min_limit, self.limit // 2)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1)
+            self.peak_limit = max(self.peak_limit, self.limit)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from threading import Lock
+from typing import Dict, Optional, Set
+
+from pydantic import BaseModel
+
+from paka.utils import get_project_data_dir
+
+
+class JournalPart(BaseModel):
+    etag: str
+    size: int
+    sha256: str
+
+
+class UploadJournalEntry(BaseModel):
+    """
+    The persisted state of an in-progress multipart upload.
+
+    Attributes:
+        bucket (str): The bucket of the upload.
+        key (str): The key of the upload.
+        upload_id (str): The upload ID of the multipart upload.
+        part_size (int): The size of every part except the last one.
+        parts (Dict[int, JournalPart]): The completed parts keyed by part number. Each part
+            records its ETag, size and SHA256 hash so that a resumed upload can tell whether
+            the part it is about to send is already stored.
+    """
+
+    bucket: str
+    key: str
+    upload_id: str
+    part_size: int
+    parts: Dict[int, JournalPart] = {}
+
+
+def get_journal_dir() -> str:
+    return os.path.join(get_project_data_dir(), "uploads")
+
+
+class UploadJournal:
+    """
+    A local journal of the parts of a multipart upload.
+
+    The journal is written after every completed part, so an upload that dies
+    halfway can be resumed by a later run instead of starting from byte zero.
+    """
+
+    def __init__(self, file_path: str, entry: UploadJournalEntry) -> None:
+        self.file_path = file_path
+        self.entry = entry
+        self.lock = Lock()
+
+    @staticmethod
+    def _file_path(journal_dir: str, bucket: str, key: str) -> str:
+        name = hashlib.sha256(f"{bucket}/{key}".encode("utf-8")).hexdigest()
+        return os.path.join(journal_dir, f"{name}.json")
+
+    @classmethod
+    def load(cls, journal_dir: str, bucket: str, key: str) -> Optional[UploadJournal]:
+        """
+        Loads the journal of an upload.
+
+        Args:
+            journal_dir (str): The directory where journals are kept.
+            bucket (str): The bucket of the upload.
+            key (str): The key of the upload.
+
+        Returns:
+            Optional[UploadJournal]: The journal, or None if there is no readable journal for the upload.
+        """
+        file_path = cls._file_path(journal_dir, bucket, key)
+        try:
+            with open(file_path, "r") as f:
+                entry = UploadJournalEntry.model_validate_json(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if entry.bucket != bucket or entry.key != key:
+            return None
+        return cls(file_path, entry)
+
+    @classmethod
+    def create(
+        cls, journal_dir: str, bucket: str, key: str, upload_id: str, part_size: int
+    ) -> UploadJournal:
+        """
+        Creates an empty journal for a new upload, replacing any existing one.
+
+        Args:
+            journal_dir (str): The directory where journals are kept.
+            bucket (str): The bucket of the upload.
+            key (str): The key of the upload.
+            upload_id (str): The upload ID of the multipart upload.
+            part_size (int): The size of every part except the last one.
+
+        Returns:
+            UploadJournal: The journal.
+        """
+        journal = cls(
+            cls._file_path(journal_dir, bucket, key),
+            UploadJournalEntry(
+                bucket=bucket, key=key, upload_id=upload_id, part_size=part_size
+            ),
+        )
+        with journal.lock:
+            journal._write()
+        return journal
+
+    def get_part(self, part_number: int) -> Optional[JournalPart]:
+        with self.lock:
+            return self.entry.parts.get(part_number)
+
+    def record_part(self, part_number: int, part: JournalPart) -> None:
+        with self.lock:
+            self.entry.parts[part_number] = part
+            self._write()
+
+    def retain_parts(self, part_numbers: Set[int]) -> None:
+        """
+        Drops the journaled parts whose part numbers are not in `part_numbers`.
+        """
+        with self.lock:
+            self.entry.parts = {
+                n: part for n, part in self.entry.parts.items() if n in part_numbers
+            }
+            self._write()
+
+    def remove(self) -> None:
+        with self.lock:
+            try:
+                os.remove(self.file_path)
+            except FileNotFoundError:
+                pass
+
+    def _write(self) -> None:
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_file_path = f"{self.file_path}.tmp"
+        with open(tmp_file_path, "w") as f:
+            f.write(self.entry.model_dump_json())
+        # Replace atomically so that a crash never leaves a truncated journal
+        os.replace(tmp_file_path, self.file_path)
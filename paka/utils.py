@@ -396,14 +396,20 @@ def get_instance_info(provider: str, region: str, instance_type: str) -> Dict[st
                 "SupportedArchitectures", []
             )
             arch = architectures[0] if architectures else None
+            instance_storage = instance_type_info.get("InstanceStorageInfo", {})
+            vcpu_info = instance_type_info.get("VCpuInfo", {})
             return {
-                "cpu": instance_type_info.get("VCpuInfo", {}).get("DefaultVCpus"),
+                "cpu": vcpu_info.get("DefaultVCpus"),
+                "threads_per_core": vcpu_info.get("DefaultThreadsPerCore", 1),
                 "memory": instance_type_info.get("MemoryInfo", {}).get("SizeInMiB"),
                 "gpu_count": gpu.get("Count", 0),
                 "vram": vram,
                 "gpu_manufacturer": gpu.get("Manufacturer"),
                 "gpu_name": gpu.get("Name"),
                 "arch": arch,
+                "instance_storage": instance_storage.get("TotalSizeInGB", 0),
+                "nvme": instance_storage.get("NvmeSupport")
+                in ("required", "supported"),
             }
     else:
         raise Exception(f"Unsupported provider: {provider}")
@@ -413,3 +419,41 @@ def get_instance_info(provider: str, region: str, instance_type: str) -> Dict[st
 def camel_to_snake(camel_str: str) -> str:
     kebab_case = camel_to_kebab(camel_str)
     return kebab_case.replace("-", "_")
+
+
+def size_to_bytes(size: str) -> int:
+    """
+    Converts a size in the Mi or Gi format used by the configuration to bytes.
+
+    Args:
+        size (str): The size, e.g. 512Mi or 100Gi.
+
+    Returns:
+        int: The size in bytes.
+
+    Raises:
+        ValueError: If the format of the size is invalid.
+    """
+    match = re.match(r"^(\d+)(Mi|Gi)$", size)
+    if not match:
+        raise ValueError(f"Invalid size format: {size}")
+    return int(match.group(1)) * (1024**2 if match.group(2) == "Mi" else 1024**3)
+
+
+def cpu_to_millicores(cpu: str) -> int:
+    """
+    Converts a CPU amount in the format used by the configuration to millicores.
+
+    Args:
+        cpu (str): The CPU amount, e.g. 500m or 2.
+
+    Returns:
+        int: The CPU amount in millicores.
+
+    Raises:
+        ValueError: If the format of the CPU amount is invalid.
+    """
+    match = re.match(r"^(\d+)(m)?$", cpu)
+    if not match:
+        raise ValueError(f"Invalid CPU format: {cpu}")
+    return int(match.group(1)) * (1 if match.group(2) else 1000)
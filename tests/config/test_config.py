@@ -13,6 +13,9 @@ from paka.config import (
     ClusterConfig,
     Config,
     MixedModelGroup,
+    Model,
+    ModelVolume,
+    NodeCache,
     ResourceRequest,
     Runtime,
     ScalingConfigNonZero,
@@ -131,6 +134,46 @@ def test_aws_model_group() -> None:
         )
 
 
+def test_model_volume() -> None:
+    model_group = AwsModelGroup(
+        name="test",
+        nodeType="c7i.xlarge",
+        minInstances=1,
+        maxInstances=2,
+        runtime=Runtime(image="test-image"),
+        model=Model(hfRepoId="TheBloke/Llama-2-7B-GGUF"),
+        modelVolume=ModelVolume(medium="memory"),
+    )
+    assert model_group.modelVolume and model_group.modelVolume.sizeLimit is None
+
+    with pytest.raises(ValueError, match="Invalid size limit format"):
+        ModelVolume(medium="memory", sizeLimit="10G")
+
+    with pytest.raises(ValueError, match="cannot be used with the node cache"):
+        AwsModelGroup(
+            name="test",
+            nodeType="c7i.xlarge",
+            minInstances=1,
+            maxInstances=2,
+            runtime=Runtime(image="test-image"),
+            model=Model(
+                hfRepoId="TheBloke/Llama-2-7B-GGUF",
+                nodeCache=NodeCache(enabled=True),
+            ),
+            modelVolume=ModelVolume(medium="memory"),
+        )
+
+    with pytest.raises(ValueError, match="sizeLimit must be set"):
+        AwsModelGroup(
+            name="test",
+            nodeType="c7i.xlarge",
+            minInstances=1,
+            maxInstances=2,
+            runtime=Runtime(image="test-image"),
+            modelVolume=ModelVolume(medium="memory"),
+        )
+
+
 def test_cloud_vector_store() -> None:
     # Test with valid replicas and storage_size
     resource_request = ResourceRequest(cpu="2000m", memory="2Gi")
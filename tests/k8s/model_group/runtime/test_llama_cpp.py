@@ -1,6 +1,8 @@
+import io
 from unittest.mock import MagicMock, patch
 
 import pytest
+from botocore.exceptions import ClientError
 
 import paka.cluster
 import paka.cluster.utils
@@ -8,7 +10,13 @@ import paka.k8s.model_group.runtime.llama_cpp
 from paka.cluster.context import Context
 from paka.config import AwsModelGroup, Model, Runtime
 from paka.constants import MODEL_MOUNT_PATH
-from paka.k8s.model_group.runtime.llama_cpp import get_runtime_command_llama_cpp
+from paka.gguf import GGUFValueType, TensorInfo, encode_gguf
+from paka.k8s.model_group.runtime.llama_cpp import (
+    get_llama_cpp_cpu_plan,
+    get_llama_cpp_plan,
+    get_runtime_command_llama_cpp,
+)
+from paka.k8s.model_group.runtime.llama_cpp_estimator import LlamaCppPlan
 
 
 @pytest.fixture
@@ -33,7 +41,7 @@ def test_get_runtime_command_llama_cpp(model_group: AwsModelGroup) -> None:
         "get_model_store",
         return_value=mock_store,
     ) as mock_get_model_store, patch.object(
-        paka.k8s.model_group.runtime.llama_cpp, "HfFileSystem"
+        paka.k8s.model_group.runtime.llama_cpp, "HfRepoCache"
     ) as mock_hf_fs, patch.object(
         paka.k8s.model_group.runtime.llama_cpp,
         "validate_repo_id",
@@ -64,7 +72,7 @@ def test_get_runtime_command_llama_cpp(model_group: AwsModelGroup) -> None:
         )
         # Mock os.listdir to return an empty list
         mock_store.glob.return_value = []
-        # Mock HfFileSystem.glob to return a specific list of files
+        # Mock HfRepoCache.glob to return a specific list of files
         mock_hf_fs.return_value.glob.return_value = ["repoId/model.gguf"]
         command = get_runtime_command_llama_cpp(Context(), model_group)
         assert "--hf-repo" in command, "Expected '--hf-repo' to be in command list"
@@ -90,7 +98,7 @@ def test_get_runtime_command_llama_cpp(model_group: AwsModelGroup) -> None:
         )
         # Mock os.listdir to return an empty list
         mock_store.glob.return_value = []
-        # Mock HfFileSystem.glob to return an empty list
+        # Mock HfRepoCache.glob to return an empty list
         mock_hf_fs.return_value.glob.return_value = []
         with pytest.raises(
             ValueError, match="No model file found in HuggingFace repo."
@@ -114,3 +122,91 @@ def test_get_runtime_command_llama_cpp(model_group: AwsModelGroup) -> None:
         mock_hf_fs.return_value.glob.return_value = []
         with pytest.raises(ValueError, match="Did not find a model to load."):
             get_runtime_command_llama_cpp(Context(), model_group)
+
+
+def test_get_runtime_command_llama_cpp_with_plan(model_group: AwsModelGroup) -> None:
+    model_group.runtime.command = None
+    model_group.model = Model(useModelStore=True)
+    mock_store = MagicMock()
+    mock_store.glob.return_value = ["model.gguf"]
+    plan = LlamaCppPlan(
+        n_gpu_layers=33, ctx_size=16384, parallel=4, host_bytes=0, vram_bytes=0
+    )
+    with patch.object(
+        paka.k8s.model_group.runtime.llama_cpp,
+        "get_model_store",
+        return_value=mock_store,
+    ):
+        command = get_runtime_command_llama_cpp(Context(), model_group, plan)
+
+    assert command[command.index("--parallel") + 1] == "4"
+    assert command[command.index("--ctx-size") + 1] == "16384"
+    assert command[command.index("--n-gpu-layers") + 1] == "33"
+
+
+def test_get_runtime_command_llama_cpp_with_cpu_plan(
+    model_group: AwsModelGroup,
+) -> None:
+    model_group.runtime.command = None
+    model_group.model = Model(useModelStore=True)
+    model_group.resourceRequest = None
+    mock_store = MagicMock()
+    mock_store.glob.return_value = ["model.gguf"]
+    with patch.object(
+        paka.k8s.model_group.runtime.llama_cpp,
+        "get_model_store",
+        return_value=mock_store,
+    ), patch.object(
+        paka.k8s.model_group.runtime.llama_cpp,
+        "get_instance_info",
+        return_value={"cpu": 16, "threads_per_core": 2, "arch": "x86_64"},
+    ):
+        cpu_plan = get_llama_cpp_cpu_plan(MagicMock(), model_group)
+        assert cpu_plan
+        command = get_runtime_command_llama_cpp(
+            Context(), model_group, cpu_plan=cpu_plan
+        )
+
+    # 7 cores of the 8 of the node, without the vCPU left to the system
+    assert cpu_plan.cpu_request == 14
+    assert command[command.index("--threads") + 1] == "7"
+    assert command[command.index("--threads-batch") + 1] == "14"
+    assert command[command.index("--batch-size") + 1] == "448"
+    assert command[command.index("--ubatch-size") + 1] == "448"
+    assert "--numa" not in command
+
+
+def test_get_llama_cpp_plan_falls_back_to_defaults(model_group: AwsModelGroup) -> None:
+    model_group.model = Model(useModelStore=True)
+    metadata = {
+        "general.architecture": (GGUFValueType.STRING, "llama"),
+        "llama.block_count": (GGUFValueType.UINT32, 1),
+        "llama.embedding_length": (GGUFValueType.UINT32, 4096),
+        "llama.attention.head_count": (GGUFValueType.UINT32, 32),
+    }
+    # A tensor type newer than the parser, such as TQ1_0
+    data = encode_gguf(
+        metadata, [TensorInfo("blk.0.attn_q.weight", [4096, 4096], 34, 0)]
+    )
+    mock_store = MagicMock()
+    mock_store.glob.return_value = ["test-model-group/model.gguf"]
+    mock_store.open_range.side_effect = lambda path, start, length: io.BytesIO(
+        data[start : start + length]
+    )
+    with patch.object(
+        paka.k8s.model_group.runtime.llama_cpp,
+        "get_model_store",
+        return_value=mock_store,
+    ), patch.object(
+        paka.k8s.model_group.runtime.llama_cpp,
+        "get_instance_info",
+        return_value={"cpu": 4, "memory": 16384},
+    ):
+        assert get_llama_cpp_plan(MagicMock(), model_group) is None
+
+        # The model store cannot be read
+        mock_store.open_range.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}},
+            "GetObject",
+        )
+        assert get_llama_cpp_plan(MagicMock(), model_group) is None
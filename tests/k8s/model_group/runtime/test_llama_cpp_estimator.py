@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from paka.gguf import GGMLType, GGUFValueType, TensorInfo, encode_gguf, parse_gguf
+from paka.k8s.model_group.runtime.llama_cpp_estimator import (
+    MiB,
+    ModelMemory,
+    estimate_model_memory,
+    plan_llama_cpp,
+    plan_llama_cpp_cpu,
+)
+
+GiB = 1024 * MiB
+
+
+def make_memory(train_context: int = 8192) -> ModelMemory:
+    metadata: Dict[str, Tuple[int, Any]] = {
+        "general.architecture": (GGUFValueType.STRING, "llama"),
+        "llama.block_count": (GGUFValueType.UINT32, 4),
+        "llama.context_length": (GGUFValueType.UINT32, train_context),
+        "llama.embedding_length": (GGUFValueType.UINT32, 4096),
+        "llama.attention.head_count": (GGUFValueType.UINT32, 32),
+        "llama.attention.head_count_kv": (GGUFValueType.UINT32, 8),
+    }
+    # 1GiB per layer, 256MiB for the embeddings and for the output layer
+    tensor_infos: List[TensorInfo] = [
+        TensorInfo("token_embd.weight", [1024, 65536], GGMLType.F32, 0),
+        TensorInfo("output.weight", [1024, 65536], GGMLType.F32, 0),
+    ]
+    for layer in range(4):
+        for name in ("attn_q", "ffn_up"):
+            tensor_infos.append(
+                TensorInfo(f"blk.{layer}.{name}.weight", [1024, 131072], 0, 0)
+            )
+
+    memory = estimate_model_memory(parse_gguf(encode_gguf(metadata, tensor_infos)))
+    assert memory
+    return memory
+
+
+def test_estimate_model_memory() -> None:
+    memory = make_memory()
+
+    assert memory.layer_bytes == [GiB] * 4
+    assert memory.embedding_bytes == memory.output_bytes == 256 * MiB
+    # 8 KV heads of 128 dimensions, for keys and values, in f16
+    assert memory.kv_bytes_per_token == 8 * 128 * 2 * 2
+    assert memory.train_context == 8192
+
+    assert estimate_model_memory(parse_gguf(encode_gguf({}))) is None
+
+
+def test_plan_llama_cpp_on_cpu() -> None:
+    plan = plan_llama_cpp(make_memory(), 16 * GiB)
+
+    # Each slot adds 16MiB of KV cache per layer
+    assert plan.n_gpu_layers == 0
+    assert plan.parallel == 16
+    assert plan.ctx_size == 16 * 4096
+    assert plan.memory_request == f"{5 * 1024 + 16 * 64}Mi"
+
+    # Slots never exceed the context the model was trained with
+    plan = plan_llama_cpp(make_memory(train_context=2048), 16 * GiB)
+    assert plan.ctx_size == plan.parallel * 2048
+
+    with pytest.raises(ValueError, match="more than the node can give it"):
+        plan_llama_cpp(make_memory(), 2 * GiB)
+
+
+def test_plan_llama_cpp_on_gpu() -> None:
+    # 2.2GiB of usable VRAM holds two layers
+    plan = plan_llama_cpp(make_memory(), 16 * GiB, 3 * GiB, 1)
+    assert plan.n_gpu_layers == 2
+    assert plan.parallel == 6
+    assert plan.ctx_size == 6 * 4096
+    assert plan.vram_bytes == 2 * GiB + 2 * 6 * 16 * MiB
+
+    # The output layer is offloaded once every layer is
+    plan = plan_llama_cpp(make_memory(), 16 * GiB, 24 * GiB, 1)
+    assert plan.n_gpu_layers == 5
+    assert plan.parallel == 16
+    assert plan.host_bytes == 256 * MiB + 512 * MiB
+
+
+def test_plan_llama_cpp_cpu() -> None:
+    # Whole cores of an x86 node with two threads per core
+    plan = plan_llama_cpp_cpu(15, 2, "x86_64")
+    assert plan.cpu_request == 14
+    assert plan.threads == 7
+    assert plan.threads_batch == 14
+    assert plan.numa is None
+    assert plan.batch_size == 448
+
+    # Graviton cores have a single thread and a single socket
+    plan = plan_llama_cpp_cpu(63, 1, "arm64")
+    assert plan.cpu_request == plan.threads == plan.threads_batch == 63
+    assert plan.numa is None
+    assert plan.batch_size == 512
+
+    # Large x86 nodes span two sockets
+    assert plan_llama_cpp_cpu(127, 2, "x86_64").numa == "distribute"
+
+    plan = plan_llama_cpp_cpu(1, 2, "x86_64")
+    assert plan.cpu_request == plan.threads == 1
+    assert plan.batch_size == 128
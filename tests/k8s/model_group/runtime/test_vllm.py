@@ -1,9 +1,53 @@
+import json
+import struct
+from typing import Any, Callable, Dict
 from unittest.mock import MagicMock, patch
 
+import pytest
+import requests
+
 import paka.k8s.model_group.runtime.vllm
 from paka.cluster.context import Context
-from paka.config import AwsModelGroup, Model, Runtime
-from paka.k8s.model_group.runtime.vllm import get_runtime_command_vllm, is_vllm_image
+from paka.config import AwsGpuNodeConfig, AwsModelGroup, Model, Runtime
+from paka.k8s.model_group.runtime.vllm import (
+    get_runtime_command_vllm,
+    get_vllm_plan,
+    is_vllm_image,
+)
+
+CONFIG = {
+    "num_hidden_layers": 32,
+    "num_attention_heads": 32,
+    "num_key_value_heads": 8,
+    "hidden_size": 4096,
+    "max_position_embeddings": 8192,
+}
+
+
+def safetensors_reader(size: int) -> Callable[[int, int], bytes]:
+    header = json.dumps(
+        {"w": {"dtype": "BF16", "shape": [1], "data_offsets": [0, size]}}
+    ).encode()
+    data = struct.pack("<Q", len(header)) + header
+    return lambda start, end: data[start:end]
+
+
+def json_reader(value: Dict[str, Any]) -> Callable[[int, int], bytes]:
+    data = json.dumps(value).encode()
+    return lambda start, end: data[start:end]
+
+
+def create_gpu_model_group() -> AwsModelGroup:
+    return AwsModelGroup(
+        name="test",
+        minInstances=1,
+        maxInstances=1,
+        nodeType="g5.xlarge",
+        runtime=Runtime(image="vllm:latest"),
+        model=Model(hfRepoId="org/model", useModelStore=False),
+        gpu=AwsGpuNodeConfig(enabled=True),
+        resourceRequest={"cpu": "1000", "memory": "1Gi", "gpu": 1},
+    )
 
 
 def test_is_vllm_image() -> None:
@@ -51,3 +95,104 @@ def test_get_runtime_command_vllm() -> None:
             "--model",
             "/data",
         ]
+
+
+def test_get_runtime_command_vllm_with_plan() -> None:
+    readers = {
+        "config.json": json_reader(CONFIG),
+        "model.safetensors": safetensors_reader(16 * 1024**3),
+    }
+    with patch.object(
+        paka.k8s.model_group.runtime.vllm,
+        "get_model_file_readers",
+        return_value=readers,
+    ), patch.object(
+        paka.k8s.model_group.runtime.vllm,
+        "get_instance_info",
+        return_value={"gpu_count": 1, "vram": 24 * 1024},
+    ), patch.object(
+        paka.k8s.model_group.runtime.vllm,
+        "validate_repo_id",
+        return_value=True,
+    ):
+        model_group = create_gpu_model_group()
+
+        command = get_runtime_command_vllm(MagicMock(), model_group)
+        assert command[9:15] == [
+            "--max-model-len",
+            "8192",
+            "--gpu-memory-utilization",
+            "0.9",
+            "--max-num-seqs",
+            "14",
+        ]
+
+        model_group.nodeType = "g4dn.xlarge"
+        with patch.object(
+            paka.k8s.model_group.runtime.vllm,
+            "get_instance_info",
+            return_value={"gpu_count": 1, "vram": 16 * 1024},
+        ), pytest.raises(ValueError, match="does not fit on g4dn.xlarge"):
+            get_runtime_command_vllm(MagicMock(), model_group)
+
+
+def test_get_vllm_plan_counts_indexed_shards() -> None:
+    # The weights are stored twice, only the shards of the index are loaded
+    readers = {
+        "config.json": json_reader(CONFIG),
+        "consolidated.safetensors": safetensors_reader(14 * 1024**3),
+        "model-00001-of-00002.safetensors": safetensors_reader(7 * 1024**3),
+        "model-00002-of-00002.safetensors": safetensors_reader(7 * 1024**3),
+        "model.safetensors.index.json": json_reader(
+            {
+                "weight_map": {
+                    "a": "model-00001-of-00002.safetensors",
+                    "b": "model-00002-of-00002.safetensors",
+                }
+            }
+        ),
+    }
+    with patch.object(
+        paka.k8s.model_group.runtime.vllm,
+        "get_model_file_readers",
+        return_value=readers,
+    ), patch.object(
+        paka.k8s.model_group.runtime.vllm,
+        "get_instance_info",
+        return_value={"gpu_count": 1, "vram": 24 * 1024},
+    ):
+        plan = get_vllm_plan(MagicMock(), create_gpu_model_group())
+
+    assert plan is not None
+    assert plan.max_model_len == 8192
+
+
+def test_get_vllm_plan_falls_back_to_defaults() -> None:
+    def fail(start: int, end: int) -> bytes:
+        raise requests.ConnectionError("Connection refused")
+
+    model_group = create_gpu_model_group()
+    with patch.object(
+        paka.k8s.model_group.runtime.vllm,
+        "get_instance_info",
+        return_value={"gpu_count": 1, "vram": 24 * 1024},
+    ):
+        # GPT-2 names its attention settings differently
+        readers = {
+            "config.json": json_reader({"n_layer": 12, "n_head": 12, "n_embd": 768}),
+            "model.safetensors": safetensors_reader(500 * 1024**2),
+        }
+        with patch.object(
+            paka.k8s.model_group.runtime.vllm,
+            "get_model_file_readers",
+            return_value=readers,
+        ):
+            assert get_vllm_plan(MagicMock(), model_group) is None
+
+        readers = {"config.json": json_reader(CONFIG), "model.safetensors": fail}
+        with patch.object(
+            paka.k8s.model_group.runtime.vllm,
+            "get_model_file_readers",
+            return_value=readers,
+        ):
+            assert get_vllm_plan(MagicMock(), model_group) is None
@@ -0,0 +1,116 @@
+import json
+import struct
+from typing import Any, Dict, List
+
+import pytest
+
+from paka.k8s.model_group.runtime.vllm_planner import (
+    MiB,
+    ModelFootprint,
+    estimate_model_footprint,
+    plan_vllm,
+    read_safetensors_header,
+)
+
+GiB = 1024 * MiB
+
+CONFIG: Dict[str, Any] = {
+    "num_hidden_layers": 32,
+    "num_attention_heads": 32,
+    "num_key_value_heads": 8,
+    "hidden_size": 4096,
+    "max_position_embeddings": 8192,
+    "torch_dtype": "bfloat16",
+}
+
+
+def encode_safetensors(tensors: Dict[str, List[int]]) -> bytes:
+    header: Dict[str, Any] = {"__metadata__": {"format": "pt"}}
+    offset = 0
+    for name, shape in tensors.items():
+        size = 2 * shape[0] * shape[1]
+        header[name] = {
+            "dtype": "BF16",
+            "shape": shape,
+            "data_offsets": [offset, offset + size],
+        }
+        offset += size
+    header_bytes = json.dumps(header).encode()
+    return struct.pack("<Q", len(header_bytes)) + header_bytes
+
+
+def test_read_safetensors_header() -> None:
+    data = encode_safetensors({"a.weight": [4, 8], "b.weight": [2, 2]})
+    reads: List[int] = []
+
+    def read_range(start: int, end: int) -> bytes:
+        reads.append(end - start)
+        return data[start:end]
+
+    header = read_safetensors_header(read_range)
+
+    assert header["a.weight"]["data_offsets"] == [0, 64]
+    assert header["b.weight"]["shape"] == [2, 2]
+    # Only the size prefix and the header are read
+    assert reads == [8, len(data) - 8]
+
+    with pytest.raises(ValueError, match="ends within its header"):
+        read_safetensors_header(lambda start, end: data[:20][start:end])
+
+
+def test_estimate_model_footprint() -> None:
+    headers = [
+        read_safetensors_header(
+            lambda start, end: encode_safetensors({"a.weight": [1024, 1024]})[start:end]
+        ),
+        read_safetensors_header(
+            lambda start, end: encode_safetensors({"b.weight": [1024, 512]})[start:end]
+        ),
+    ]
+
+    footprint = estimate_model_footprint(CONFIG, headers)
+
+    assert footprint.param_bytes == 3 * MiB
+    # Keys and values of 8 heads of 128 dimensions in 32 layers, in bf16
+    assert footprint.kv_bytes_per_token == 2 * 32 * 8 * 128 * 2
+    assert footprint.max_position_embeddings == 8192
+
+    with pytest.raises(ValueError, match="hidden_size"):
+        estimate_model_footprint({"num_hidden_layers": 1, "num_attention_heads": 1}, [])
+
+
+def test_plan_vllm() -> None:
+    # An 8B model in bf16 on a 24GiB GPU
+    footprint = ModelFootprint(
+        param_bytes=16 * GiB,
+        kv_bytes_per_token=128 * 1024,
+        max_position_embeddings=8192,
+    )
+
+    plan = plan_vllm(footprint, 24 * GiB, 1)
+
+    kv_cache_tokens = int((24 * GiB * 0.9 - 2 * GiB - 16 * GiB) // (128 * 1024))
+    assert plan.kv_cache_tokens == kv_cache_tokens - kv_cache_tokens % 16
+    assert plan.max_model_len == 8192
+    assert plan.max_num_seqs == plan.kv_cache_tokens // 2048
+    assert plan.to_args() == [
+        "--max-model-len",
+        "8192",
+        "--gpu-memory-utilization",
+        "0.9",
+        "--max-num-seqs",
+        str(plan.max_num_seqs),
+    ]
+
+    # Concurrency is capped on large GPUs
+    assert plan_vllm(footprint, 4 * 80 * GiB, 4).max_num_seqs == 256
+
+    # The context is shortened to what the KV cache holds
+    footprint.max_position_embeddings = 131072
+    plan = plan_vllm(footprint, 24 * GiB, 1)
+    assert plan.max_model_len == plan.kv_cache_tokens < 131072
+
+    with pytest.raises(ValueError, match="weights take"):
+        plan_vllm(footprint, 16 * GiB, 1)
+    with pytest.raises(ValueError, match="KV cache only holds"):
+        plan_vllm(footprint, 20 * GiB + 200 * MiB, 1)
@@ -1,4 +1,16 @@
-from kubernetes.client import V1PodTemplateSpec, V1Probe
+from unittest.mock import MagicMock, patch
+
+import pytest
+from kubernetes.client import (
+    V1Node,
+    V1ObjectMeta,
+    V1Pod,
+    V1PodCondition,
+    V1PodSpec,
+    V1PodStatus,
+    V1PodTemplateSpec,
+    V1Probe,
+)
 
 from paka.cluster.context import Context
 from paka.config import (
@@ -7,15 +19,33 @@ from paka.config import (
     AwsModelGroup,
     ClusterConfig,
     Config,
+    Model,
+    ModelVolume,
+    NodeCache,
     ResourceRequest,
     Runtime,
 )
-from paka.constants import MODEL_MOUNT_PATH
+from paka.constants import (
+    MODEL_CACHE_HOST_PATH,
+    MODEL_CACHE_MOUNT_PATH,
+    MODEL_DOWNLOADER_IMAGE,
+    MODEL_MOUNT_PATH,
+    MODEL_PEER_PORT,
+)
+from paka.k8s.model_group.runtime.llama_cpp_estimator import (
+    LlamaCppCpuPlan,
+    LlamaCppPlan,
+)
 from paka.k8s.model_group.service import (
+    create_downloader_container,
     create_env_vars,
+    create_node_cache_agent,
+    create_peer_service,
     create_pod,
     create_probe,
     create_volume_mounts,
+    get_node_cache_states,
+    init_model_download,
 )
 
 
@@ -147,3 +177,328 @@ def test_create_pod() -> None:
     assert container.liveness_probe.http_get.port == 8080
     assert container.liveness_probe.initial_delay_seconds == 5
     assert container.liveness_probe.period_seconds == 5
+
+
+def test_init_model_download() -> None:
+    model_group = AwsModelGroup(
+        nodeType="c7a.xlarge",
+        minInstances=1,
+        maxInstances=1,
+        name="llama2-7b",
+        runtime=Runtime(image="johndoe/llama.cpp:server"),
+    )
+    ctx = Context()
+    ctx.set_bucket("test-bucket")
+
+    container = init_model_download(ctx, "test_namespace", model_group)
+
+    assert container.image == MODEL_DOWNLOADER_IMAGE
+    assert container.command and "pip install" not in container.command[2]
+    assert container.env
+    env = {var.name: var.value for var in container.env}
+    assert "def download_model(" in str(env["PAKA_DOWNLOADER_SCRIPT"])
+    assert env["PAKA_MODEL_BUCKET"] == "test-bucket"
+    assert env["PAKA_MODEL_PREFIX"] == "models/llama2-7b"
+    assert env["PAKA_MODEL_DEST_DIR"] == MODEL_MOUNT_PATH
+    assert container.volume_mounts
+    assert container.volume_mounts[0].mount_path == MODEL_MOUNT_PATH
+
+
+def test_create_pod_with_node_cache() -> None:
+    model_group = AwsModelGroup(
+        nodeType="c7a.xlarge",
+        minInstances=1,
+        maxInstances=1,
+        name="llama2-7b",
+        model=Model(
+            hfRepoId="TheBloke/Llama-2-7B-GGUF",
+            nodeCache=NodeCache(enabled=True, diskBudget="200Gi"),
+        ),
+        runtime=Runtime(
+            image="vllm/vllm-openai:latest",
+            command=[
+                "python3",
+                "-m",
+                "vllm.entrypoints.openai.api_server",
+                "--model",
+                MODEL_MOUNT_PATH,
+            ],
+        ),
+    )
+    ctx = Context()
+    ctx.set_bucket("test-bucket")
+
+    pod = create_pod(ctx, "test_namespace", model_group, 8080)
+
+    assert pod.spec and pod.spec.volumes and pod.spec.init_containers
+    cache_volume = pod.spec.volumes[1]
+    assert (
+        cache_volume.host_path and cache_volume.host_path.path == MODEL_CACHE_HOST_PATH
+    )
+
+    init_container = pod.spec.init_containers[0]
+    assert init_container.env and init_container.volume_mounts
+    env = {var.name: var.value for var in init_container.env}
+    assert env["PAKA_MODEL_CACHE_DIR"] == MODEL_CACHE_MOUNT_PATH
+    assert env["PAKA_MODEL_CACHE_BUDGET"] == str(200 * 1024**3)
+    assert not init_container.volume_mounts[1].read_only
+    # The pod leases the cached files under its UID
+    pod_uid = next(var for var in init_container.env if var.name == "PAKA_POD_UID")
+    assert pod_uid.value_from and pod_uid.value_from.field_ref
+    assert pod_uid.value_from.field_ref.field_path == "metadata.uid"
+
+    container = pod.spec.containers[0]
+    assert container.volume_mounts
+    assert container.volume_mounts[-1].mount_path == MODEL_CACHE_MOUNT_PATH
+    assert container.volume_mounts[-1].read_only
+
+    assert model_group.model and model_group.model.nodeCache
+    agent = create_node_cache_agent(
+        ctx, "test_namespace", model_group, model_group.model.nodeCache
+    )
+    assert agent.metadata and agent.metadata.name == "llama2-7b-cache"
+    assert agent.spec and agent.spec.template.spec
+    assert agent.spec.template.spec.node_selector == {
+        "app": "model-group",
+        "model": "llama2-7b",
+    }
+    assert not agent.spec.template.spec.init_containers
+    evictor_env = agent.spec.template.spec.containers[0].env
+    assert evictor_env
+    evictor_env_values = {var.name: var.value for var in evictor_env}
+    assert evictor_env_values["PAKA_DOWNLOADER_MODE"] == "evict"
+    # The evictor expires the leases of the pods that the kubelet no longer has
+    assert evictor_env_values["PAKA_KUBELET_PODS_DIR"] == "/kubelet-pods"
+    assert agent.spec.template.spec.volumes
+    assert agent.spec.template.spec.volumes[1].host_path
+    assert agent.spec.template.spec.volumes[1].host_path.path == "/var/lib/kubelet/pods"
+
+    # With prefetch, the runtime image and the model are pulled before the agent is ready
+    model_group.model.nodeCache.prefetch = True
+    agent = create_node_cache_agent(
+        ctx, "test_namespace", model_group, model_group.model.nodeCache
+    )
+    assert agent.spec and agent.spec.template.spec
+    init_containers = agent.spec.template.spec.init_containers
+    assert init_containers
+    assert init_containers[0].image == "vllm/vllm-openai:latest"
+    assert init_containers[1].name == "init-s3-model-download"
+    assert init_containers[1].env
+    assert "PAKA_POD_UID" not in {var.name for var in init_containers[1].env}
+
+
+def test_get_node_cache_states() -> None:
+    def node(name: str) -> V1Node:
+        return V1Node(metadata=V1ObjectMeta(name=name))
+
+    def pod(node_name: str, ready: bool) -> V1Pod:
+        return V1Pod(
+            spec=V1PodSpec(node_name=node_name, containers=[]),
+            status=V1PodStatus(
+                conditions=[
+                    V1PodCondition(type="Ready", status="True" if ready else "False")
+                ]
+            ),
+        )
+
+    with patch("paka.k8s.model_group.service.client.CoreV1Api") as core_v1_api:
+        api = core_v1_api.return_value
+        api.list_node.return_value = MagicMock(
+            items=[node("node-1"), node("node-2"), node("node-3")]
+        )
+        api.list_namespaced_pod.return_value = MagicMock(
+            items=[pod("node-1", True), pod("node-2", False)]
+        )
+
+        states = get_node_cache_states("test_namespace", "llama2-7b")
+
+    assert states == {"node-1": "warm", "node-2": "cold", "node-3": "cold"}
+    api.list_node.assert_called_once_with(
+        label_selector="app=model-group,model=llama2-7b"
+    )
+
+
+def test_create_pod_with_peer_download() -> None:
+    model_group = AwsModelGroup(
+        nodeType="c7a.xlarge",
+        minInstances=1,
+        maxInstances=1,
+        name="llama2-7b",
+        model=Model(hfRepoId="TheBloke/Llama-2-7B-GGUF", peerDownload=True),
+        runtime=Runtime(
+            image="vllm/vllm-openai:latest",
+            command=[
+                "python3",
+                "-m",
+                "vllm.entrypoints.openai.api_server",
+                "--model",
+                MODEL_MOUNT_PATH,
+            ],
+        ),
+    )
+    ctx = Context()
+    ctx.set_bucket("test-bucket")
+
+    pod = create_pod(ctx, "test_namespace", model_group, 8080)
+
+    assert pod.spec and pod.spec.init_containers
+    init_env = pod.spec.init_containers[0].env
+    assert init_env
+    assert {var.name: var.value for var in init_env}[
+        "PAKA_MODEL_PEERS"
+    ] == f"llama2-7b-peers.test_namespace.svc.cluster.local:{MODEL_PEER_PORT}"
+
+    assert len(pod.spec.containers) == 2
+    peer = pod.spec.containers[1]
+    assert peer.ports and peer.ports[0].container_port == MODEL_PEER_PORT
+    assert peer.env and peer.volume_mounts
+    assert {var.name: var.value for var in peer.env}["PAKA_DOWNLOADER_MODE"] == "serve"
+    assert peer.volume_mounts[0].read_only
+
+    service = create_peer_service("test_namespace", model_group)
+    assert service.spec and service.spec.cluster_ip == "None"
+    assert service.spec.selector == {"app": "model-group", "model": "llama2-7b"}
+
+
+def test_create_pod_with_streaming_download() -> None:
+    model_group = AwsModelGroup(
+        nodeType="c7a.xlarge",
+        minInstances=1,
+        maxInstances=1,
+        name="llama2-7b",
+        model=Model(
+            hfRepoId="TheBloke/Llama-2-7B-GGUF",
+            peerDownload=True,
+            streamingDownload=True,
+        ),
+        runtime=Runtime(
+            image="vllm/vllm-openai:latest",
+            command=[
+                "python3",
+                "-m",
+                "vllm.entrypoints.openai.api_server",
+                "--model",
+                MODEL_MOUNT_PATH,
+            ],
+        ),
+    )
+    ctx = Context()
+    ctx.set_bucket("test-bucket")
+
+    pod = create_pod(ctx, "test_namespace", model_group, 8080)
+
+    assert pod.spec
+    assert not pod.spec.init_containers
+    assert len(pod.spec.containers) == 2
+    download, runtime = pod.spec.containers
+    assert download.name == "model-download"
+    assert download.env and download.ports
+    env = {var.name: var.value for var in download.env}
+    assert env["PAKA_DOWNLOADER_MODE"] == "stream"
+    assert env["PAKA_PEER_PORT"] == str(MODEL_PEER_PORT)
+    assert download.ports[0].container_port == MODEL_PEER_PORT
+
+    assert runtime.command and runtime.command[:2] == ["sh", "-c"]
+    assert f"{MODEL_MOUNT_PATH}/manifest.yml" in runtime.command[2]
+    assert runtime.command[4:9] == [
+        "python3",
+        "-m",
+        "vllm.entrypoints.openai.api_server",
+        "--model",
+        MODEL_MOUNT_PATH,
+    ]
+    assert runtime.startup_probe
+
+
+def test_create_pod_with_memory_model_volume() -> None:
+    model_group = AwsModelGroup(
+        nodeType="c7a.xlarge",
+        minInstances=1,
+        maxInstances=1,
+        name="llama2-7b",
+        model=Model(hfRepoId="TheBloke/Llama-2-7B-GGUF"),
+        modelVolume=ModelVolume(medium="memory"),
+        resourceRequest=ResourceRequest(cpu="1000m", memory="2Gi"),
+        runtime=Runtime(
+            image="vllm/vllm-openai:latest",
+            command=["python3", "--model", MODEL_MOUNT_PATH],
+        ),
+    )
+    ctx = Context()
+    ctx.set_bucket("test-bucket")
+
+    store = MagicMock()
+    store.glob.return_value = ["llama2-7b/model.bin", "llama2-7b/manifest.yml"]
+    store.get_file_size.side_effect = [1000 * 1024**2, 1024]
+    with patch(
+        "paka.k8s.model_group.service.get_model_store", return_value=store
+    ) as get_model_store:
+        pod = create_pod(ctx, "test_namespace", model_group, 8080)
+        get_model_store.assert_called_once()
+
+    assert pod.spec and pod.spec.volumes
+    volume = pod.spec.volumes[0]
+    assert volume.empty_dir
+    assert volume.empty_dir.medium == "Memory"
+    assert volume.empty_dir.size_limit == "1101Mi"
+    resources = pod.spec.containers[0].resources
+    assert resources and resources.requests
+    assert resources.requests["memory"] == "3149Mi"
+
+    # An explicit size limit skips the model store
+    model_group.modelVolume = ModelVolume(medium="nvme", sizeLimit="200Gi")
+    pod = create_pod(ctx, "test_namespace", model_group, 8080)
+    assert pod.spec and pod.spec.volumes and pod.spec.volumes[0].empty_dir
+    assert pod.spec.volumes[0].empty_dir.medium is None
+    assert pod.spec.volumes[0].empty_dir.size_limit == "200Gi"
+
+
+def test_create_pod_with_cpu_plan() -> None:
+    model_group = AwsModelGroup(
+        nodeType="c6i.4xlarge",
+        minInstances=1,
+        maxInstances=1,
+        name="llama2-7b",
+        model=Model(useModelStore=False, hfRepoId="TheBloke/Llama-2-7B-GGUF"),
+        runtime=Runtime(image="johndoe/llama.cpp:server"),
+    )
+    plan = LlamaCppPlan(
+        n_gpu_layers=0,
+        ctx_size=4096,
+        parallel=1,
+        host_bytes=4096 * 1024**2,
+        vram_bytes=0,
+    )
+    cpu_plan = LlamaCppCpuPlan(
+        cpu_request=14, threads=7, threads_batch=14, numa=None, batch_size=448
+    )
+    with patch(
+        "paka.k8s.model_group.service.get_llama_cpp_plan", return_value=plan
+    ), patch(
+        "paka.k8s.model_group.service.get_llama_cpp_cpu_plan", return_value=cpu_plan
+    ), patch(
+        "paka.k8s.model_group.service.get_runtime_command_llama_cpp",
+        return_value=["/server"],
+    ):
+        pod = create_pod(Context(), "test_namespace", model_group, 8080)
+
+    assert pod.spec
+    resources = pod.spec.containers[0].resources
+    assert resources
+    assert resources.requests == {"cpu": "14", "memory": "4096Mi"}
+    # The memory request is an estimate, so it is not enforced as a limit
+    assert resources.limits is None
+
+
+def test_create_downloader_container_with_pip_install(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PAKA_MODEL_DOWNLOADER_IMAGE", "python:3.11-slim")
+    monkeypatch.setenv("PAKA_MODEL_DOWNLOADER_PIP_INSTALL", "1")
+
+    container = create_downloader_container("model-download", [], [])
+
+    assert container.image == "python:3.11-slim"
+    assert container.command
+    assert "pip install" in container.command[2]
+    assert container.command[2].endswith('exec python -c "$PAKA_DOWNLOADER_SCRIPT"')
@@ -0,0 +1,56 @@
+import asyncio
+import io
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from paka.constants import MAX_TRANSFERS_ENV_VAR
+from paka.model.aio import AsyncModelStore
+from paka.model.store import LocalModelStore
+
+
+def test_async_model_store(tmp_path: Path) -> None:
+    store = AsyncModelStore(LocalModelStore(str(tmp_path), with_progress_bar=False))
+
+    async def save_all() -> None:
+        await asyncio.gather(
+            *(
+                store.save_stream(f"model/{i}.bin", io.BytesIO(b"x" * i), i)
+                for i in range(1, 6)
+            )
+        )
+        await store.save("model/manifest.yml", b"name: model")
+
+    asyncio.run(save_all())
+
+    assert asyncio.run(store.file_exists("model/3.bin"))
+    assert len(asyncio.run(store.glob(r"model/.*\.bin"))) == 5
+
+
+def test_async_model_store_limits_transfers(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(MAX_TRANSFERS_ENV_VAR, "2")
+
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def save_stream(*args: object) -> None:
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    store = AsyncModelStore(MagicMock(save_stream=save_stream))
+
+    async def save_all() -> None:
+        await asyncio.gather(
+            *(store.save_stream(f"{i}.bin", io.BytesIO(), 0) for i in range(6))
+        )
+
+    asyncio.run(save_all())
+    assert peak[0] == 2
@@ -1,18 +1,21 @@
+import asyncio
 import io
 from unittest.mock import MagicMock, patch
 
 from paka.model.base_model import BaseMLModel
+from paka.model.checksum import PartLayout
+from paka.model.telemetry import TransferTelemetry
 
 
 class ConcreteMLModel(BaseMLModel):
-    def save(self) -> None:
+    async def asave(self) -> None:
         pass
 
 
 def test_base_ml_model() -> None:
 
-    progress_bar_mock = MagicMock()
-    model_store_mock = MagicMock(progress_bar=progress_bar_mock)
+    telemetry_mock = MagicMock(spec=TransferTelemetry)
+    model_store_mock = MagicMock(telemetry=telemetry_mock)
     model = ConcreteMLModel(
         name="TestModel",
         model_store=model_store_mock,
@@ -33,4 +36,52 @@ def test_base_ml_model() -> None:
     assert ("test.txt", "test_sha256") in model.completed_files
 
     model.finish()
-    progress_bar_mock.close_progress_bar.assert_called_once()
+    telemetry_mock.close.assert_called_once()
+    assert model.transfer_summary is telemetry_mock.close.return_value
+
+
+def test_base_ml_model_part_layout() -> None:
+    model_store_mock = MagicMock()
+    model_store_mock.get_part_layout.return_value = PartLayout(
+        part_size=4, parts=["a", "b", "c"]
+    )
+    model = ConcreteMLModel(
+        name="TestModel",
+        model_store=model_store_mock,
+        quantization=None,
+        prompt_template_name=None,
+        prompt_template_str=None,
+    )
+
+    model.save_single_stream("test.txt", io.BytesIO(b"Test data"), 9, "test_sha256")
+    model.save_manifest_yml()
+
+    manifest_yml = model_store_mock.save.call_args[0][1].decode("utf-8")
+    assert "part_size: 4" in manifest_yml
+    assert "- a" in manifest_yml
+
+
+def test_base_ml_model_asave_files() -> None:
+    model_store_mock = MagicMock()
+    model = ConcreteMLModel(
+        name="TestModel",
+        model_store=model_store_mock,
+        quantization=None,
+        prompt_template_name=None,
+        prompt_template_str=None,
+        concurrency=2,
+    )
+
+    def save_file(name: str) -> None:
+        if name == "bad.bin":
+            raise Exception("Connection reset")
+        model.save_single_stream(name, io.BytesIO(b"data"), 4, f"{name}_sha256")
+
+    with patch.object(BaseMLModel, "finish") as finish_mock:
+        asyncio.run(model.asave_files(save_file, ["a.bin", "bad.bin", "b.bin"]))
+
+    assert sorted(model.completed_files) == [
+        ("a.bin", "a.bin_sha256"),
+        ("b.bin", "b.bin_sha256"),
+    ]
+    finish_mock.assert_called_once()
@@ -0,0 +1,52 @@
+import threading
+
+from paka.model.buffer_pool import BufferPool, BufferReader, IterReader, fill_buffer
+
+
+def test_buffer_pool_reuses_buffers() -> None:
+    pool = BufferPool(budget=100)
+
+    buffer = pool.acquire(40)
+    assert len(buffer) == 40
+    pool.release(buffer)
+
+    assert pool.acquire(40) is buffer
+    assert pool.allocated == 40
+
+
+def test_buffer_pool_budget() -> None:
+    pool = BufferPool(budget=100)
+
+    first = pool.acquire(60)
+    assert pool.try_acquire(60) is None
+
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(60)))
+    waiter.start()
+    waiter.join(timeout=0.1)
+    assert waiter.is_alive()
+
+    pool.release(first)
+    waiter.join(timeout=5)
+    assert acquired == [first]
+
+    # Idle buffers of another size are dropped to make room
+    pool.release(first)
+    assert pool.try_acquire(80) is not None
+    assert pool.allocated == 80
+
+    # A buffer larger than the budget is handed out when nothing else is in use
+    assert len(BufferPool(budget=10).acquire(20)) == 20
+
+
+def test_fill_buffer() -> None:
+    buffer = bytearray(8)
+    reader = IterReader(iter([b"abc", b"defgh", b"ij"]))
+
+    assert fill_buffer(reader, memoryview(buffer)) == 8
+    assert buffer == b"abcdefgh"
+    assert fill_buffer(reader, memoryview(buffer)) == 2
+    assert buffer[:2] == b"ij"
+    assert fill_buffer(reader, memoryview(buffer)) == 0
+
+    assert fill_buffer(BufferReader(b"xyz"), memoryview(buffer)) == 3
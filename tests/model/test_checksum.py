@@ -0,0 +1,18 @@
+import hashlib
+
+from paka.model.checksum import OrderedHasher, from_s3_checksum, to_s3_checksum
+
+
+def test_s3_checksum() -> None:
+    sha256 = hashlib.sha256(b"Test data").hexdigest()
+    assert to_s3_checksum(sha256) == "4nyCFL6LfPW8zHwIJH48sMFRSkjuH2MZf+TvPvUdfm8="
+    assert from_s3_checksum(to_s3_checksum(sha256)) == sha256
+
+
+def test_ordered_hasher() -> None:
+    chunks = [bytes([i]) * 4096 for i in range(16)]
+
+    hasher = OrderedHasher()
+    futures = [hasher.update(chunk) for chunk in chunks]
+    assert hasher.hexdigest() == hashlib.sha256(b"".join(chunks)).hexdigest()
+    assert all(future.done() for future in futures)
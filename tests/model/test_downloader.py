@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import boto3
+import pytest
+import yaml
+from moto import mock_aws
+
+from paka.model.downloader import (
+    PROGRESS_FILE,
+    FileDownload,
+    download_model,
+    evict_cache,
+    serve_model,
+)
+
+
+def put_model(
+    s3: Any, files: Dict[str, bytes], part_size: int = 0, unhashed: Tuple[str, ...] = ()
+) -> None:
+    manifest_files: List[Dict[str, Any]] = []
+    for name, data in files.items():
+        s3.put_object(Bucket="mybucket", Key=f"models/test/{name}", Body=data)
+        # HfModel records no hash for the files that are not stored in LFS
+        entry: Dict[str, Any] = {
+            "name": name,
+            "sha256": "" if name in unhashed else hashlib.sha256(data).hexdigest(),
+        }
+        if part_size:
+            entry["part_size"] = part_size
+            entry["parts"] = [
+                hashlib.sha256(data[i : i + part_size]).hexdigest()
+                for i in range(0, len(data), part_size)
+            ]
+        manifest_files.append(entry)
+
+    s3.put_object(
+        Bucket="mybucket",
+        Key="models/test/manifest.yml",
+        Body=yaml.safe_dump({"name": "test", "files": manifest_files}).encode(),
+    )
+
+
+@mock_aws
+def test_download_model(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    files = {
+        "model.bin": os.urandom(100_000),
+        "tokenizer.json": b"{}",
+        "empty.txt": b"",
+    }
+    put_model(s3, files)
+
+    report = download_model(
+        s3, "mybucket", "models/test", str(tmp_path), max_workers=4, part_size=30_000
+    )
+
+    for name, data in files.items():
+        assert (tmp_path / name).read_bytes() == data
+    assert yaml.safe_load((tmp_path / "manifest.yml").read_text())["name"] == "test"
+    assert report.bytes == 100_002
+    # Largest first
+    assert [f.name for f in report.files][0] == "model.bin"
+    assert report.to_dict()["files"][0]["verified_by"] == "sha256"
+
+
+@mock_aws
+def test_download_model_verifies_parts(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    data = os.urandom(100_000)
+    put_model(s3, {"model.bin": data}, part_size=40_000)
+
+    report = download_model(s3, "mybucket", "models/test", str(tmp_path))
+
+    assert (tmp_path / "model.bin").read_bytes() == data
+    assert report.files[0].verified_by == "parts"
+
+    # The stored file no longer matches the manifest
+    s3.put_object(
+        Bucket="mybucket", Key="models/test/model.bin", Body=os.urandom(100_000)
+    )
+    with pytest.raises(Exception, match="does not match the manifest"):
+        download_model(s3, "mybucket", "models/test", str(tmp_path))
+
+
+@mock_aws
+def test_download_model_publishes_progress(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    put_model(s3, {"model.bin": os.urandom(100_000), "config.json": b"{}"})
+
+    report = download_model(
+        s3, "mybucket", "models/test", str(tmp_path), part_size=30_000, progress=True
+    )
+
+    progress = json.loads((tmp_path / PROGRESS_FILE).read_text())
+    assert progress["bytes"] == progress["total"] == 100_002
+    assert progress["files"]["model.bin"] == {
+        "size": 100_000,
+        "watermark": 100_000,
+        "verified": True,
+    }
+    assert report.seconds >= report.manifest_seconds + report.transfer_seconds
+
+
+def test_file_download_watermark(tmp_path: Path) -> None:
+    download = FileDownload(
+        "model.bin", "model.bin", str(tmp_path), 100, {"sha256": ""}
+    )
+
+    download.complete_range(50, 100)
+    assert download.watermark == 0
+    download.complete_range(0, 25)
+    assert download.watermark == 25
+    download.complete_range(25, 50)
+    assert download.watermark == 100
+
+
+@mock_aws
+def test_download_model_without_sha256(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    files = {"model.bin": os.urandom(100_000), "config.json": b"{}", "empty.txt": b""}
+    put_model(s3, files, unhashed=("config.json", "empty.txt"))
+
+    report = download_model(s3, "mybucket", "models/test", str(tmp_path))
+
+    for name, data in files.items():
+        assert (tmp_path / name).read_bytes() == data
+    assert {f.name: f.verified_by for f in report.files} == {
+        "model.bin": "sha256",
+        "config.json": "none",
+        "empty.txt": "none",
+    }
+
+
+@mock_aws
+def test_download_model_rejects_corrupted_file(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    put_model(s3, {"model.bin": b"Test data"})
+    s3.put_object(Bucket="mybucket", Key="models/test/model.bin", Body=b"Bad data!")
+
+    with pytest.raises(Exception, match="does not match the manifest"):
+        download_model(s3, "mybucket", "models/test", str(tmp_path))
+
+
+@mock_aws
+def test_download_model_with_node_cache(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    data = os.urandom(100_000)
+    sha256 = hashlib.sha256(data).hexdigest()
+    put_model(s3, {"model.bin": data})
+    cache_dir = tmp_path / "cache"
+
+    report = download_model(
+        s3, "mybucket", "models/test", str(tmp_path / "pod1"), cache_dir=str(cache_dir)
+    )
+    assert report.bytes == 100_000
+    assert (cache_dir / "blobs" / "sha256" / sha256).read_bytes() == data
+    assert os.path.islink(tmp_path / "pod1" / "model.bin")
+    assert (tmp_path / "pod1" / "model.bin").read_bytes() == data
+    assert os.listdir(cache_dir / "tmp") == []
+
+    # A second pod on the node finds the file in the cache
+    report = download_model(
+        s3, "mybucket", "models/test", str(tmp_path / "pod2"), cache_dir=str(cache_dir)
+    )
+    assert report.bytes == 0
+    assert report.files[0].verified_by == "cache"
+    assert (tmp_path / "pod2" / "model.bin").read_bytes() == data
+
+
+@mock_aws
+def test_download_model_with_node_cache_without_sha256(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    files = {"model.bin": os.urandom(100_000), "config.json": b"{}", "vocab.txt": b"a"}
+    put_model(s3, files, part_size=40_000, unhashed=("config.json", "vocab.txt"))
+    cache_dir = tmp_path / "cache"
+
+    for pod in ("pod1", "pod2"):
+        download_model(
+            s3,
+            "mybucket",
+            "models/test",
+            str(tmp_path / pod),
+            cache_dir=str(cache_dir),
+            pod_uid=pod,
+        )
+
+        for name, data in files.items():
+            assert (tmp_path / pod / name).read_bytes() == data
+        # Files without a hash are not cached or leased
+        assert not os.path.islink(tmp_path / pod / "config.json")
+        assert os.listdir(cache_dir / "blobs" / "sha256") == [
+            hashlib.sha256(files["model.bin"]).hexdigest()
+        ]
+        assert json.loads((cache_dir / "leases" / pod).read_text()) == [
+            hashlib.sha256(files["model.bin"]).hexdigest()
+        ]
+
+
+def test_evict_cache(tmp_path: Path) -> None:
+    blob_dir = tmp_path / "blobs" / "sha256"
+    blob_dir.mkdir(parents=True)
+    for i, name in enumerate(["old", "kept", "new"]):
+        (blob_dir / name).write_bytes(b"x" * 100)
+        os.utime(blob_dir / name, (1000 + i, 1000 + i))
+
+    assert evict_cache(str(tmp_path), 250) == ["old"]
+    assert evict_cache(str(tmp_path), 100, keep=("kept",)) == ["new"]
+    assert sorted(os.listdir(blob_dir)) == ["kept"]
+
+
+@mock_aws
+def test_evict_cache_keeps_leased_files(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    data = os.urandom(1000)
+    sha256 = hashlib.sha256(data).hexdigest()
+    put_model(s3, {"model.bin": data})
+    cache_dir = tmp_path / "cache"
+    pods_dir = tmp_path / "pods"
+    (pods_dir / "pod-uid").mkdir(parents=True)
+
+    download_model(
+        s3,
+        "mybucket",
+        "models/test",
+        str(tmp_path / "pod"),
+        cache_dir=str(cache_dir),
+        pod_uid="pod-uid",
+    )
+    # The file is the least recently used and over the budget
+    blob = cache_dir / "blobs" / "sha256" / sha256
+    os.utime(blob, (1000, 1000))
+
+    assert evict_cache(str(cache_dir), 0, pods_dir=str(pods_dir)) == []
+    # The runtime of the pod can restart onto its links
+    assert (tmp_path / "pod" / "model.bin").read_bytes() == data
+
+    # The lease ends once the kubelet removes the pod
+    (pods_dir / "pod-uid").rmdir()
+    assert evict_cache(str(cache_dir), 0, pods_dir=str(pods_dir)) == [sha256]
+    assert os.listdir(cache_dir / "leases") == []
+
+
+@mock_aws
+def test_download_model_from_peers(tmp_path: Path) -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    data = os.urandom(100_000)
+    put_model(s3, {"model.bin": data}, part_size=40_000)
+
+    download_model(s3, "mybucket", "models/test", str(tmp_path / "peer"))
+    server = serve_model(str(tmp_path / "peer"), 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    peer = f"127.0.0.1:{server.server_address[1]}"
+    try:
+        report = download_model(
+            s3, "mybucket", "models/test", str(tmp_path / "pod"), peers=[peer]
+        )
+        assert (tmp_path / "pod" / "model.bin").read_bytes() == data
+        assert report.peer_bytes == 100_000
+
+        # A corrupted peer is never trusted, its ranges are fetched from S3
+        with open(tmp_path / "peer" / "model.bin", "r+b") as f:
+            f.write(b"corrupted")
+        report = download_model(
+            s3, "mybucket", "models/test", str(tmp_path / "pod2"), peers=[peer]
+        )
+        assert (tmp_path / "pod2" / "model.bin").read_bytes() == data
+        assert report.peer_bytes == 60_000
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,92 @@
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from paka.model.hf_cache import HfRepoCache, glob_to_regex
+
+COMMIT_SHA = "a" * 40
+
+
+def make_api(commit_sha: str = COMMIT_SHA) -> MagicMock:
+    api = MagicMock()
+    api.repo_info.return_value.sha = commit_sha
+    api.list_repo_tree.return_value = [
+        SimpleNamespace(path="config.json", size=100, lfs=None),
+        SimpleNamespace(
+            path="model-00001-of-00002.safetensors",
+            size=1000,
+            lfs=SimpleNamespace(sha256="sha1"),
+        ),
+        SimpleNamespace(
+            path="model-00002-of-00002.safetensors",
+            size=500,
+            lfs=SimpleNamespace(sha256="sha2"),
+        ),
+        SimpleNamespace(path="onnx"),
+        SimpleNamespace(path="onnx/model.onnx", size=10, lfs=None),
+    ]
+    return api
+
+
+def test_glob_to_regex() -> None:
+    assert glob_to_regex("*.json") == r"[^/]*\.json"
+    assert glob_to_regex("**/*.onnx") == r".*/[^/]*\.onnx"
+    assert glob_to_regex("model-0000[!2]*") == r"model\-0000[^2][^/]*"
+
+
+def test_hf_repo_cache(tmp_path: Path) -> None:
+    api = make_api()
+    cache = HfRepoCache(api=api, cache_dir=str(tmp_path))
+
+    assert cache.glob("org/repo", "*.safetensors") == [
+        "org/repo/model-00001-of-00002.safetensors",
+        "org/repo/model-00002-of-00002.safetensors",
+    ]
+    assert cache.glob("org/repo", "*.onnx") == []
+    assert cache.glob("org/repo", "**/*.onnx") == ["org/repo/onnx/model.onnx"]
+
+    stat = cache.stat("org/repo", "org/repo/model-00002-of-00002.safetensors")
+    assert stat["size"] == 500
+    assert stat["lfs"]["sha256"] == "sha2"
+    assert cache.stat("org/repo", "org/repo/config.json")["lfs"] is None
+
+    # All patterns and stats resolve from one listing
+    api.repo_info.assert_called_once()
+    api.list_repo_tree.assert_called_once()
+
+    # A later run within the TTL makes no calls to the Hub
+    api = make_api()
+    cache = HfRepoCache(api=api, cache_dir=str(tmp_path))
+    assert len(cache.glob("org/repo", "*.json")) == 1
+    api.repo_info.assert_not_called()
+    api.list_repo_tree.assert_not_called()
+
+
+def test_hf_repo_cache_revalidates_branches(tmp_path: Path) -> None:
+    HfRepoCache(api=make_api(), cache_dir=str(tmp_path)).get_tree("org/repo")
+
+    # After the TTL, an unchanged commit only costs the commit check
+    api = make_api()
+    HfRepoCache(api=api, cache_dir=str(tmp_path), ttl=0).get_tree("org/repo")
+    api.repo_info.assert_called_once()
+    api.list_repo_tree.assert_not_called()
+
+    # A moved branch is listed again
+    api = make_api("b" * 40)
+    tree = HfRepoCache(api=api, cache_dir=str(tmp_path), ttl=0).get_tree("org/repo")
+    api.list_repo_tree.assert_called_once()
+    assert tree.commit_sha == "b" * 40
+
+
+def test_hf_repo_cache_pinned_commit(tmp_path: Path) -> None:
+    api = make_api()
+    HfRepoCache(api=api, cache_dir=str(tmp_path)).get_tree("org/repo", COMMIT_SHA)
+    api.repo_info.assert_not_called()
+
+    # A tree pinned to a commit never expires
+    api = make_api()
+    HfRepoCache(api=api, cache_dir=str(tmp_path), ttl=0).get_tree(
+        "org/repo", COMMIT_SHA
+    )
+    api.repo_info.assert_not_called()
+    api.list_repo_tree.assert_not_called()
@@ -8,6 +8,8 @@ def test_hf_model() -> None:
     with patch.object(
         paka.model.hf_model, "HfFileSystem", autospec=True
     ) as mock_hf_file_system, patch.object(
+        paka.model.hf_model, "HfRepoCache", autospec=True
+    ) as mock_repo_cache, patch.object(
         BaseMLModel,
         "finish",
         return_value=MagicMock(),
@@ -21,23 +23,48 @@ def test_hf_model() -> None:
             quantization="GPTQ",
         )
 
-        mock_hf_file_system.return_value.glob.return_value = ["file1", "file2"]
-        mock_hf_file_system.return_value.stat.return_value = {
+        mock_repo_cache.return_value.glob.return_value = [
+            "test-repo/file1",
+            "test-repo/file2",
+        ]
+        mock_repo_cache.return_value.stat.return_value = {
             "size": 10,
             "lfs": {"sha256": "test_sha256"},
         }
+        mock_repo_cache.return_value.get_tree.return_value.commit_sha = "a" * 40
         mock_hf_file_system.return_value.open.return_value.__enter__.return_value = (
             MagicMock()
         )
+        mock_hf_file_system.return_value.endpoint = "https://huggingface.co"
+        mock_hf_file_system.return_value.token = None
 
-        model.save()
-        mock_hf_file_system.return_value.glob.assert_called()
-        mock_hf_file_system.return_value.stat.assert_called()
-        mock_hf_file_system.return_value.open.assert_called()
-        model_store_mock.save_stream.assert_called()
+        with patch.object(model.session, "head") as mock_head:
+            mock_head.return_value.url = "https://cdn.example.com/file1?signed"
+            model.save()
+        mock_repo_cache.return_value.glob.assert_called_with("test-repo", "file2")
+        mock_repo_cache.return_value.stat.assert_called_with(
+            "test-repo", "test-repo/file2"
+        )
+        # The download URL is pinned to the commit of the cached tree
+        assert mock_head.call_args[0][0].startswith(
+            f"https://huggingface.co/test-repo/resolve/{'a' * 40}/"
+        )
+        # LFS files are fetched as byte ranges from the CDN
+        mock_hf_file_system.return_value.open.assert_not_called()
+        model_store_mock.save_ranges.assert_called()
+        path, read_range, total_size, sha256 = model_store_mock.save_ranges.call_args[0]
+        assert (total_size, sha256) == (10, "test_sha256")
+        assert read_range.args[1] == "https://cdn.example.com/file1?signed"
+        assert read_range.keywords == {"headers": {}}
         finish_mock.assert_called_once()
 
-        model._save_single_file("file1")
-        mock_hf_file_system.return_value.stat.assert_called_with("file1")
-        mock_hf_file_system.return_value.open.assert_called_with("file1", "rb")
+        # Files kept in git are read as a single stream
+        mock_repo_cache.return_value.stat.return_value = {"size": 10, "lfs": None}
+        model._save_single_file("test-repo/file1")
+        mock_repo_cache.return_value.stat.assert_called_with(
+            "test-repo", "test-repo/file1"
+        )
+        mock_hf_file_system.return_value.open.assert_called_with(
+            "test-repo/file1", "rb"
+        )
         model_store_mock.save_stream.assert_called()
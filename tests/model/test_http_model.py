@@ -34,3 +34,34 @@ def test_http_source_model() -> None:
         model._save_single_url("http://example.com/file1")
         mock_requests_get.assert_called_with("http://example.com/file1", stream=True)
         model_store_mock.save_stream.assert_called()
+
+
+def test_http_source_model_ranges() -> None:
+    with patch.object(paka.model.http_model.requests, "get") as mock_requests_get:
+        model_store_mock = MagicMock()
+        model = HttpSourceModel(
+            name="TestModel",
+            urls=["http://example.com/file1"],
+            model_store=model_store_mock,
+        )
+
+        mock_response = MagicMock()
+        mock_response.headers = {"accept-ranges": "bytes", "content-length": "100"}
+        mock_response.url = "http://cdn.example.com/file1"
+        mock_requests_get.return_value.__enter__.return_value = mock_response
+
+        model._save_single_url("http://example.com/file1")
+        model_store_mock.save_stream.assert_not_called()
+        model_store_mock.save_ranges.assert_called_once()
+        path, read_range, total_size, _ = model_store_mock.save_ranges.call_args[0]
+        assert path == "TestModel/file1"
+        assert total_size == 100
+
+        with patch.object(model.session, "get") as mock_session_get:
+            mock_session_get.return_value.status_code = 206
+            read_range(10, 20)
+            mock_session_get.assert_called_with(
+                "http://cdn.example.com/file1",
+                headers={"Range": "bytes=10-19"},
+                stream=True,
+            )
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Awaitable, Callable, List, Sequence
+
+from paka.model.scheduler import TransferScheduler, TransferTask
+
+
+def make_tasks(
+    sizes: List[int], events: List[str], failing: Sequence[int] = ()
+) -> List[TransferTask]:
+    def run(size: int) -> Callable[[], Awaitable[None]]:
+        async def transfer() -> None:
+            events.append(f"start {size}")
+            await asyncio.sleep(0.01)
+            if size in failing:
+                raise Exception("Connection reset")
+            events.append(f"end {size}")
+
+        return transfer
+
+    return [TransferTask(name=str(size), size=size, run=run(size)) for size in sizes]
+
+
+def test_scheduler_starts_largest_first() -> None:
+    events: List[str] = []
+    scheduler = TransferScheduler(max_bytes_in_flight=100, small_file_size=1)
+
+    report = asyncio.run(scheduler.run(make_tasks([20, 80, 50], events)))
+
+    starts = [e for e in events if e.startswith("start")]
+    assert starts == ["start 80", "start 20", "start 50"]
+    # 50 does not fit next to 80, so the smaller 20 is started alongside
+    assert events.index("start 20") < events.index("end 80")
+    assert events.index("start 50") > events.index("end 80")
+
+    assert report.total_bytes == 150
+    assert len(report.files) == 3
+    assert report.mbps > 0
+
+
+def test_scheduler_runs_oversized_files_alone() -> None:
+    events: List[str] = []
+    scheduler = TransferScheduler(max_bytes_in_flight=10, small_file_size=1)
+
+    asyncio.run(scheduler.run(make_tasks([40, 30], events)))
+    assert events == ["start 40", "end 40", "start 30", "end 30"]
+
+
+def test_scheduler_small_file_lane() -> None:
+    events: List[str] = []
+    scheduler = TransferScheduler(max_bytes_in_flight=100, small_file_size=5)
+
+    report = asyncio.run(
+        scheduler.run(make_tasks([100, 90, 2, 3], events, failing=[3]))
+    )
+
+    # Small files do not wait for the large files that fill the byte budget
+    assert events.index("end 2") < events.index("end 100")
+    assert events.index("start 90") > events.index("end 100")
+
+    assert [f.name for f in report.failed] == ["3"]
+    assert report.total_bytes == 192
@@ -1,12 +1,21 @@
 import hashlib
 import io
+import os
+from pathlib import Path
+from unittest.mock import patch
 
 import boto3
 import pytest
 from botocore.exceptions import ClientError
 from moto import mock_aws
 
-from paka.model.store import MODEL_PATH_PREFIX, S3ModelStore
+from paka.model.buffer_pool import BufferPool
+from paka.model.store import (
+    MODEL_PATH_PREFIX,
+    LocalModelStore,
+    S3ModelStore,
+    literal_prefix,
+)
 
 
 @mock_aws
@@ -72,3 +81,380 @@ def test_file_exists() -> None:
 
     assert store.file_exists("test", prefix_match=True)
     assert not store.file_exists("nonexistent", prefix_match=True)
+
+
+@mock_aws
+def test_save_ranges() -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    chunk_size = 5 * 1024 * 1024
+    store = S3ModelStore("mybucket", s3_chunk_size=chunk_size, s3_max_concurrency=2)
+
+    data = os.urandom(2 * chunk_size + 1024)
+    sha256_hash = hashlib.sha256(data).hexdigest()
+    requested_ranges = []
+
+    def read_range(start: int, end: int) -> io.BytesIO:
+        requested_ranges.append((start, end))
+        return io.BytesIO(data[start:end])
+
+    store.save_ranges("test.bin", read_range, len(data), sha256_hash)
+
+    body = conn.Object("mybucket", f"{MODEL_PATH_PREFIX}/test.bin").get()["Body"].read()
+    assert body == data
+    assert sorted(requested_ranges) == [
+        (0, chunk_size),
+        (chunk_size, 2 * chunk_size),
+        (2 * chunk_size, len(data)),
+    ]
+
+    with pytest.raises(
+        Exception,
+        match="SHA256 hash of the downloaded file does not match the expected value",
+    ):
+        store.save_ranges("test_2.bin", read_range, len(data), "invalid_hash")
+
+    assert not store.file_exists("test_2.bin")
+
+
+class InterruptedStream(io.RawIOBase):
+    def __init__(self, data: bytes, fail_after: int) -> None:
+        self.stream = io.BytesIO(data)
+        self.fail_after = fail_after
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if self.stream.tell() >= self.fail_after:
+            raise ConnectionError("Connection reset")
+        return self.stream.read(size)
+
+
+@mock_aws
+def test_save_stream_resumes_interrupted_upload(tmp_path: Path) -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    chunk_size = 5 * 1024 * 1024
+    data = os.urandom(2 * chunk_size + 1024)
+    sha256_hash = hashlib.sha256(data).hexdigest()
+
+    store = S3ModelStore(
+        "mybucket",
+        s3_chunk_size=chunk_size,
+        s3_max_concurrency=1,
+        resumable=True,
+        journal_dir=str(tmp_path),
+    )
+
+    # The connection dies after the first two parts are read
+    with pytest.raises(ConnectionError):
+        store.save_stream(
+            "test.bin",
+            InterruptedStream(data, 2 * chunk_size),
+            len(data),
+            sha256_hash,
+        )
+
+    assert not store.file_exists("test.bin")
+    assert len(list(tmp_path.iterdir())) == 1
+
+    uploads = store.s3.list_multipart_uploads(Bucket="mybucket")["Uploads"]
+    assert len(uploads) == 1
+
+    resumed_store = S3ModelStore(
+        "mybucket",
+        s3_chunk_size=chunk_size,
+        s3_max_concurrency=1,
+        resumable=True,
+        journal_dir=str(tmp_path),
+    )
+    with patch.object(
+        resumed_store.s3, "upload_part", wraps=resumed_store.s3.upload_part
+    ) as upload_part:
+        resumed_store.save_stream("test.bin", io.BytesIO(data), len(data), sha256_hash)
+
+    # Only the part that never made it to S3 is sent again
+    assert [call.kwargs["PartNumber"] for call in upload_part.call_args_list] == [3]
+
+    body = conn.Object("mybucket", f"{MODEL_PATH_PREFIX}/test.bin").get()["Body"].read()
+    assert body == data
+    assert list(tmp_path.iterdir()) == []
+
+
+@mock_aws
+def test_save_stream_copies_stored_blob() -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    store = S3ModelStore("mybucket", content_addressed=True)
+
+    data = b"Test data"
+    sha256_hash = hashlib.sha256(data).hexdigest()
+    store.save_stream("group1/model.gguf", io.BytesIO(data), len(data), sha256_hash)
+
+    with patch.object(
+        store.s3, "create_multipart_upload", wraps=store.s3.create_multipart_upload
+    ) as create_multipart_upload:
+        store.save_stream("group2/model.gguf", io.BytesIO(data), len(data), sha256_hash)
+    create_multipart_upload.assert_not_called()
+
+    body = (
+        conn.Object("mybucket", f"{MODEL_PATH_PREFIX}/group2/model.gguf")
+        .get()["Body"]
+        .read()
+    )
+    assert body == data
+
+    # A blob whose file was deleted is uploaded again
+    store.delete_file("group1/model.gguf")
+    store.delete_file("group2/model.gguf")
+    stream = io.BytesIO(data)
+    store.save_stream("group3/model.gguf", stream, len(data), sha256_hash)
+    assert stream.tell() == len(data)
+    assert store.file_exists("group3/model.gguf")
+
+
+@mock_aws
+def test_save_stream_uploads_when_stored_blob_changed() -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    store = S3ModelStore("mybucket", content_addressed=True)
+
+    data = b"Test data"
+    sha256_hash = hashlib.sha256(data).hexdigest()
+    store.save_stream("group1/model.gguf", io.BytesIO(data), len(data), sha256_hash)
+
+    # The indexed key is overwritten with other bytes of the same size
+    conn.Object("mybucket", f"{MODEL_PATH_PREFIX}/group1/model.gguf").put(
+        Body=b"Test dat!"
+    )
+
+    stream = io.BytesIO(data)
+    store.save_stream("group2/model.gguf", stream, len(data), sha256_hash)
+    assert stream.tell() == len(data)
+    body = (
+        conn.Object("mybucket", f"{MODEL_PATH_PREFIX}/group2/model.gguf")
+        .get()["Body"]
+        .read()
+    )
+    assert body == data
+
+
+@mock_aws
+def test_save_stream_without_content_index() -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    store = S3ModelStore("mybucket")
+
+    data = b"Test data"
+    sha256_hash = hashlib.sha256(data).hexdigest()
+    store.save_stream("group1/model.gguf", io.BytesIO(data), len(data), sha256_hash)
+
+    assert not list(conn.Bucket("mybucket").objects.filter(Prefix="blobs/"))
+
+
+def test_local_model_store(tmp_path: Path) -> None:
+    store = LocalModelStore(str(tmp_path / "store"), chunk_size=4)
+
+    store.save("test.txt", b"Test data")
+    assert (tmp_path / "store" / MODEL_PATH_PREFIX / "test.txt").read_bytes() == (
+        b"Test data"
+    )
+
+    data = b"Some model weights"
+    sha256_hash = hashlib.sha256(data).hexdigest()
+
+    # Network-like streams go through the write-behind path
+    store.save_stream("group/model.bin", io.BytesIO(data), len(data), sha256_hash)
+    assert store.file_exists("group/model.bin")
+
+    # File streams are copied by the kernel
+    source = tmp_path / "source.bin"
+    source.write_bytes(data)
+    with open(source, "rb") as f:
+        store.save_stream("group/copy.bin", f, len(data), sha256_hash)
+
+    store.save_ranges(
+        "group/ranges.bin",
+        lambda start, end: io.BytesIO(data[start:end]),
+        len(data),
+        sha256_hash,
+    )
+
+    for name in ["model.bin", "copy.bin", "ranges.bin"]:
+        assert (
+            tmp_path / "store" / MODEL_PATH_PREFIX / "group" / name
+        ).read_bytes() == data
+
+    with pytest.raises(
+        Exception,
+        match="SHA256 hash of the downloaded file does not match the expected value",
+    ):
+        store.save_stream("group/bad.bin", io.BytesIO(data), len(data), "invalid_hash")
+    assert not store.file_exists("group/bad.bin")
+
+    assert store.glob("group/*") == [
+        f"{MODEL_PATH_PREFIX}/group/copy.bin",
+        f"{MODEL_PATH_PREFIX}/group/model.bin",
+        f"{MODEL_PATH_PREFIX}/group/ranges.bin",
+    ]
+    assert store.file_exists("group", prefix_match=True)
+    assert not store.file_exists("nonexistent", prefix_match=True)
+
+    store.delete_file("group/model.bin")
+    assert not store.file_exists("group/model.bin")
+
+
+def test_literal_prefix() -> None:
+    assert literal_prefix("models/llama/.*\\.gguf") == "models/llama/"
+    assert literal_prefix("models/llama/*") == "models/llama"
+    assert literal_prefix("models/llama\\.cpp/x") == "models/llama.cpp/x"
+    assert literal_prefix("models/ab+") == "models/ab"
+    assert literal_prefix("models/a|b") == ""
+    assert literal_prefix(".*") == ""
+
+
+@mock_aws
+def test_glob_lists_prefix_once() -> None:
+    S3ModelStore.clear_listing_cache()
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+    for key in ["group1/a.gguf", "group1/b.json", "group2/a.gguf"]:
+        conn.Object("mybucket", f"{MODEL_PATH_PREFIX}/{key}").put(Body=b"data")
+
+    store = S3ModelStore("mybucket")
+    with patch.object(
+        store.s3, "get_paginator", wraps=store.s3.get_paginator
+    ) as get_paginator:
+        assert store.glob("group1/*") == [
+            f"{MODEL_PATH_PREFIX}/group1/a.gguf",
+            f"{MODEL_PATH_PREFIX}/group1/b.json",
+        ]
+        assert store.glob("group1/.*\\.gguf") == [f"{MODEL_PATH_PREFIX}/group1/a.gguf"]
+        assert get_paginator.call_count == 1
+
+        # Another store of the same process reuses the listing
+        assert S3ModelStore("mybucket").glob("group1/*") == [
+            f"{MODEL_PATH_PREFIX}/group1/a.gguf",
+            f"{MODEL_PATH_PREFIX}/group1/b.json",
+        ]
+
+        # Writes invalidate the listings they change
+        store.save("group1/c.txt", b"data")
+        assert f"{MODEL_PATH_PREFIX}/group1/c.txt" in store.glob("group1/*")
+        assert get_paginator.call_count == 2
+    S3ModelStore.clear_listing_cache()
+
+
+@mock_aws
+def test_save_stream_records_transfer_stats() -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    store = S3ModelStore("mybucket", s3_chunk_size=5 * 1024 * 1024, adaptive=True)
+
+    data = os.urandom(11 * 1024 * 1024)
+    store.save_stream("test.bin", io.BytesIO(data), len(data))
+
+    stats = store.transfer_stats[f"{MODEL_PATH_PREFIX}/test.bin"]
+    assert stats.part_size == 5 * 1024 * 1024
+    assert stats.total_bytes == len(data)
+    assert 1 <= stats.max_concurrency <= store.s3_max_concurrency
+    assert stats.mbps > 0
+
+
+@mock_aws
+def test_save_stream_with_memory_budget() -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    chunk_size = 5 * 1024 * 1024
+    # The budget fits two parts, so the upload has to reuse its buffers
+    pool = BufferPool(budget=2 * chunk_size)
+    store = S3ModelStore("mybucket", s3_chunk_size=chunk_size, buffer_pool=pool)
+
+    data = os.urandom(4 * chunk_size + 1024)
+    store.save_stream("stream.bin", io.BytesIO(data), len(data))
+    store.save_ranges(
+        "ranges.bin",
+        lambda start, end: io.BytesIO(data[start:end]),
+        len(data),
+        hashlib.sha256(data).hexdigest(),
+    )
+
+    for key in ["stream.bin", "ranges.bin"]:
+        obj = conn.Object("mybucket", f"{MODEL_PATH_PREFIX}/{key}")
+        assert obj.get()["Body"].read() == data
+    assert pool.allocated <= 2 * chunk_size
+    assert sum(len(buffers) for buffers in pool.free_buffers.values()) == 2
+
+
+@mock_aws
+def test_save_stream_records_part_layout() -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    chunk_size = 5 * 1024 * 1024
+    store = S3ModelStore("mybucket", s3_chunk_size=chunk_size, content_addressed=True)
+
+    data = os.urandom(2 * chunk_size + 1024)
+    sha256_hash = hashlib.sha256(data).hexdigest()
+    store.save_stream("group1/model.bin", io.BytesIO(data), len(data), sha256_hash)
+
+    layout = store.get_part_layout("group1/model.bin")
+    assert layout is not None
+    assert layout.part_size == chunk_size
+    assert layout.parts == [
+        hashlib.sha256(data[start : start + chunk_size]).hexdigest()
+        for start in range(0, len(data), chunk_size)
+    ]
+
+    # A copy from the content index keeps the layout of its source
+    store.save_stream("group2/model.bin", io.BytesIO(data), len(data), sha256_hash)
+    assert store.get_part_layout("group2/model.bin") == layout
+
+
+@mock_aws
+def test_s3_model_store_ranged_reads() -> None:
+    conn = boto3.resource("s3", region_name="us-east-1")
+    conn.create_bucket(Bucket="mybucket")
+
+    store = S3ModelStore("mybucket", with_progress_bar=False)
+    data = os.urandom(1000)
+    store.save("model.bin", data)
+
+    assert store.get_file_size("model.bin") == 1000
+    with store.open_range("model.bin", 100, 50) as stream:
+        assert stream.read() == data[100:150]
+    with store.open_range("model.bin", 990, 50) as stream:
+        assert stream.read() == data[990:]
+    with store.open_range("model.bin", 2000, 50) as stream:
+        assert stream.read() == b""
+
+    parts = list(store.iter_parts("model.bin", part_size=300))
+    assert [offset for offset, _ in parts] == [0, 300, 600, 900]
+    assert b"".join(part for _, part in parts) == data
+
+
+def test_local_model_store_ranged_reads(tmp_path: Path) -> None:
+    store = LocalModelStore(str(tmp_path), with_progress_bar=False)
+    data = os.urandom(1000)
+    store.save("model.bin", data)
+
+    assert store.get_file_size("model.bin") == 1000
+    with store.open_range("model.bin", 100, 50) as stream:
+        assert stream.read() == data[100:150]
+    with store.open_range("model.bin", 990, 50) as stream:
+        assert stream.read() == data[990:]
+
+    with pytest.raises(ValueError):
+        store.open_range("model.bin", -1, 10)
+
+    parts = list(store.iter_parts("model.bin", part_size=300))
+    assert [offset for offset, _ in parts] == [0, 300, 600, 900]
+    assert b"".join(part for _, part in parts) == data
@@ -0,0 +1,107 @@
+import json
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from paka.constants import PUSHGATEWAY_URL_ENV_VAR, TRANSFER_SUMMARY_PATH_ENV_VAR
+from paka.model.telemetry import TransferTelemetry, export_summary, push_to_gateway
+
+
+def test_telemetry_summary() -> None:
+    telemetry = TransferTelemetry("Testing", show_progress=False)
+
+    telemetry.start_file("model/a.bin", 100)
+    telemetry.advance("model/a.bin", 40)
+    telemetry.add_retries("model/a.bin", 2)
+    with patch("paka.model.telemetry.logger") as logger:
+        telemetry.finish_file("model/a.bin")
+    logger.info.assert_called_once_with("Model file model/a.bin is saved successfully.")
+
+    telemetry.start_file("model/b.bin", 50)
+    telemetry.finish_file("model/b.bin", "copied")
+
+    telemetry.start_file("model/c.bin", 10)
+    telemetry.advance("model/c.bin", 5)
+    telemetry.fail_file("model/c.bin", "Connection reset")
+
+    summary = telemetry.close()
+
+    # Copied files do not move any bytes
+    assert summary.bytes == 105
+    assert summary.retries == 2
+    files = {f.name: f for f in summary.files}
+    assert files["model/a.bin"].bytes == 100
+    assert files["model/a.bin"].retries == 2
+    assert files["model/b.bin"].status == "copied"
+    assert files["model/c.bin"].status == "failed"
+    assert files["model/c.bin"].error == "Connection reset"
+
+    data = json.loads(summary.to_json())
+    assert data["bytes"] == 105
+    assert len(data["files"]) == 3
+
+
+def test_telemetry_counts_retries_of_all_threads() -> None:
+    telemetry = TransferTelemetry("Testing", show_progress=False)
+    telemetry.start_file("model/a.bin", 100)
+
+    def retry() -> None:
+        for _ in range(100):
+            telemetry.add_retries("model/a.bin", 1)
+
+    threads = [threading.Thread(target=retry) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert telemetry.files["model/a.bin"].retries == 400
+
+
+def test_telemetry_renders_progress() -> None:
+    telemetry = TransferTelemetry("Testing")
+
+    telemetry.start_file("model/a.bin", 100)
+    assert telemetry.renderer is not None
+    telemetry.advance("model/a.bin", 60)
+    telemetry.finish_file("model/a.bin")
+
+    summary = telemetry.close()
+    assert telemetry.renderer is None
+    assert summary.bytes == 100
+
+
+def test_telemetry_prometheus() -> None:
+    telemetry = TransferTelemetry("Testing", show_progress=False)
+    telemetry.start_file("model/a.bin", 100)
+    telemetry.finish_file("model/a.bin")
+    summary = telemetry.close()
+
+    text = summary.to_prometheus()
+    assert "paka_transfer_bytes 100\n" in text
+    assert 'paka_transfer_file_seconds{file="model/a.bin",status="uploaded"}' in text
+
+    with patch("paka.model.telemetry.requests.put") as put:
+        push_to_gateway(summary, "http://pushgateway:9091/", "paka-model-test")
+    put.assert_called_once()
+    assert (
+        put.call_args.args[0] == "http://pushgateway:9091/metrics/job/paka-model-test"
+    )
+
+
+def test_export_summary(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    telemetry = TransferTelemetry("Testing", show_progress=False)
+    telemetry.start_file("model/a.bin", 100)
+    telemetry.finish_file("model/a.bin")
+    summary = telemetry.close()
+
+    summary_path = tmp_path / "summary.json"
+    monkeypatch.setenv(TRANSFER_SUMMARY_PATH_ENV_VAR, str(summary_path))
+    monkeypatch.setenv(PUSHGATEWAY_URL_ENV_VAR, "http://pushgateway:9091")
+    with patch("paka.model.telemetry.push_to_gateway") as push:
+        export_summary(summary, "paka-model-test")
+
+    assert json.loads(summary_path.read_text())["bytes"] == 100
+    push.assert_called_once_with(summary, "http://pushgateway:9091", "paka-model-test")
@@ -0,0 +1,55 @@
+from paka.model.tuning import (
+    ADAPTIVE_MAX_PART_SIZE,
+    S3_MAX_PARTS,
+    AimdConcurrency,
+    MiB,
+    TransferStats,
+    choose_part_size,
+)
+
+
+def test_choose_part_size() -> None:
+    # Small files keep the configured part size
+    assert choose_part_size(100 * MiB, 8 * MiB) == 8 * MiB
+    assert choose_part_size(100 * MiB, 8 * MiB, adaptive=True) == 8 * MiB
+
+    # Files that do not fit in 10,000 parts get larger parts in any mode
+    total_size = 140 * 1024 * MiB
+    part_size = choose_part_size(total_size, 8 * MiB)
+    assert part_size % MiB == 0
+    assert part_size * S3_MAX_PARTS >= total_size
+
+    # Adaptive mode scales the part size with the file size, up to a limit
+    assert choose_part_size(10 * 1024 * MiB, 8 * MiB, adaptive=True) == 11 * MiB
+    assert (
+        choose_part_size(total_size, 8 * MiB, adaptive=True) == ADAPTIVE_MAX_PART_SIZE
+    )
+
+
+def test_aimd_concurrency() -> None:
+    concurrency = AimdConcurrency(limit=2, max_limit=4)
+
+    # Stable latency grows the limit by one per window
+    for _ in range(2):
+        concurrency.record(MiB, 1.0)
+    assert concurrency.limit == 3
+    for _ in range(3):
+        concurrency.record(MiB, 1.0)
+    assert concurrency.limit == 4
+
+    # The limit never exceeds its upper bound
+    for _ in range(4):
+        concurrency.record(MiB, 1.0)
+    assert concurrency.limit == 4
+
+    # A window with much higher latency halves the limit
+    for _ in range(4):
+        concurrency.record(MiB, 3.0)
+    assert concurrency.limit == 2
+    assert concurrency.peak_limit == 4
+
+
+def test_transfer_stats() -> None:
+    stats = TransferStats(part_size=8 * MiB, total_bytes=100_000_000, seconds=2.0)
+    assert stats.mbps == 50.0
+    assert TransferStats(part_size=8 * MiB).mbps == 0.0
@@ -0,0 +1,175 @@
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from paka.gguf import (
+    GGMLType,
+    GGUFTruncatedError,
+    GGUFValueType,
+    LazyArray,
+    TensorInfo,
+    encode_gguf,
+    parse_gguf,
+    read_gguf,
+    read_gguf_range,
+    s3_range_reader,
+)
+
+METADATA: Dict[str, Tuple[int, Any]] = {
+    "general.architecture": (GGUFValueType.STRING, "llama"),
+    "general.alignment": (GGUFValueType.UINT32, 64),
+    "llama.context_length": (GGUFValueType.UINT32, 4096),
+    "llama.rope.freq_base": (GGUFValueType.FLOAT32, 10000.0),
+    "llama.use_parallel_residual": (GGUFValueType.BOOL, True),
+    "tokenizer.ggml.tokens": (
+        GGUFValueType.ARRAY,
+        (GGUFValueType.STRING, ["<unk>", "<s>", "</s>", "héllo"]),
+    ),
+    "tokenizer.ggml.scores": (
+        GGUFValueType.ARRAY,
+        (GGUFValueType.FLOAT32, [0.0, -1.0, -2.0, -3.5]),
+    ),
+    "tokenizer.ggml.token_type": (
+        GGUFValueType.ARRAY,
+        (GGUFValueType.INT32, [2, 3, 3, 1]),
+    ),
+    "nested": (
+        GGUFValueType.ARRAY,
+        (
+            GGUFValueType.ARRAY,
+            [(GGUFValueType.UINT8, [1, 2]), (GGUFValueType.UINT8, [])],
+        ),
+    ),
+}
+
+TENSOR_INFOS = [
+    TensorInfo(name="token_embd.weight", shape=[4096, 32000], dtype=2, offset=0),
+    TensorInfo(name="output_norm.weight", shape=[4096], dtype=0, offset=73728000),
+]
+
+
+@pytest.mark.parametrize(
+    "version,little_endian", [(3, True), (3, False), (2, True), (1, True)]
+)
+def test_parse_gguf(version: int, little_endian: bool) -> None:
+    data = encode_gguf(METADATA, TENSOR_INFOS, version, little_endian)
+
+    header = parse_gguf(data)
+
+    assert header.version == version
+    assert header.little_endian == little_endian
+    metadata = header.metadata
+    assert metadata["general.architecture"] == "llama"
+    assert metadata["llama.context_length"] == 4096
+    assert metadata["llama.rope.freq_base"] == 10000.0
+    assert metadata["llama.use_parallel_residual"] is True
+
+    tokens = metadata["tokenizer.ggml.tokens"]
+    assert isinstance(tokens, LazyArray)
+    assert len(tokens) == 4
+    assert tokens[3] == "héllo"
+    assert tokens[-1] == "héllo"
+    assert tokens[1:3] == ["<s>", "</s>"]
+    assert metadata["tokenizer.ggml.scores"].tolist() == [0.0, -1.0, -2.0, -3.5]
+    assert list(metadata["tokenizer.ggml.token_type"]) == [2, 3, 3, 1]
+    nested = metadata["nested"]
+    assert nested[0].tolist() == [1, 2] and len(nested[1]) == 0
+
+    assert header.tensor_infos == TENSOR_INFOS
+    assert header.header_size == len(data)
+    assert header.data_offset % 64 == 0
+    assert 0 <= header.data_offset - header.header_size < 64
+
+
+def test_parse_gguf_rejects_invalid_files() -> None:
+    with pytest.raises(ValueError, match="GGUF magic number"):
+        parse_gguf(b"GGML" + bytes(20))
+
+    data = encode_gguf(METADATA, TENSOR_INFOS)
+    with pytest.raises(GGUFTruncatedError) as e:
+        parse_gguf(data[:100])
+    assert e.value.needed > 100
+
+
+def test_read_gguf(tmp_path: Path) -> None:
+    path = tmp_path / "model.gguf"
+    path.write_bytes(encode_gguf(METADATA, TENSOR_INFOS) + bytes(1024))
+
+    header = read_gguf(str(path))
+
+    assert header.metadata["tokenizer.ggml.tokens"][0] == "<unk>"
+    assert [info.name for info in header.tensor_infos] == [
+        "token_embd.weight",
+        "output_norm.weight",
+    ]
+
+
+def test_read_gguf_range() -> None:
+    tokens = [f"token-{i}" for i in range(20000)]
+    metadata = {
+        **METADATA,
+        "tokenizer.ggml.tokens": (
+            GGUFValueType.ARRAY,
+            (GGUFValueType.STRING, tokens),
+        ),
+    }
+    header_bytes = encode_gguf(metadata, TENSOR_INFOS)
+    data = header_bytes + bytes(1024 * 1024)
+    reads: List[Tuple[int, int]] = []
+
+    def read_range(start: int, end: int) -> bytes:
+        reads.append((start, end))
+        return data[start:end]
+
+    header = read_gguf_range(read_range, read_ahead=4096)
+
+    assert header.metadata["tokenizer.ggml.tokens"][19999] == "token-19999"
+    assert header.tensor_infos == TENSOR_INFOS
+    # The windows grow until the header fits, without reading the tensor data
+    assert reads[0] == (0, 4096)
+    assert all(start == prev_end for (_, prev_end), (start, _) in zip(reads, reads[1:]))
+    assert len(reads) <= 1 + (len(header_bytes) // 4096).bit_length()
+    assert len(header_bytes) <= header.bytes_read < 2 * len(header_bytes) + 4096
+
+    with pytest.raises(ValueError, match="ends within its header"):
+        read_gguf_range(lambda start, end: header_bytes[:1000][start:end], 512)
+    with pytest.raises(ValueError, match="larger than"):
+        read_gguf_range(read_range, 512, max_header_size=8192)
+
+
+def test_tensor_sizes() -> None:
+    header = parse_gguf(encode_gguf(METADATA, TENSOR_INFOS))
+
+    assert TENSOR_INFOS[0].n_bytes == 4096 * 32000 // 32 * 18
+    assert TENSOR_INFOS[1].n_bytes == 4096 * 4
+    assert header.tensor_bytes == TENSOR_INFOS[0].n_bytes + TENSOR_INFOS[1].n_bytes
+    assert header.quantization == GGMLType.Q4_0.name
+    assert header.architecture == "llama"
+    assert header.context_length == 4096
+
+    # Tensor types newer than the parser cannot be sized
+    unknown = TensorInfo(name="blk.0.attn_q.weight", shape=[32], dtype=34, offset=0)
+    header = parse_gguf(encode_gguf(METADATA, [*TENSOR_INFOS, unknown]))
+    assert header.quantization == GGMLType.Q4_0.name
+    with pytest.raises(ValueError, match="Unknown tensor type"):
+        unknown.n_bytes
+
+
+@mock_aws
+def test_read_gguf_range_from_s3() -> None:
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="mybucket")
+    header_bytes = encode_gguf(METADATA, TENSOR_INFOS)
+    s3.put_object(Bucket="mybucket", Key="model.gguf", Body=header_bytes)
+
+    header = read_gguf_range(s3_range_reader(s3, "mybucket", "model.gguf"), 64)
+
+    assert header.metadata["tokenizer.ggml.tokens"].tolist() == [
+        "<unk>",
+        "<s>",
+        "</s>",
+        "héllo",
+    ]
@@ -3,6 +3,8 @@ import os
 from pathlib import Path
 from unittest.mock import mock_open, patch
 
+import pytest
+
 from paka.constants import HOME_ENV_VAR, PROJECT_NAME
 from paka.utils import (
     call_once,
@@ -12,6 +14,7 @@ from paka.utils import (
     get_project_data_dir,
     kubify_name,
     save_kubeconfig,
+    size_to_bytes,
     to_yaml,
 )
 
@@ -96,3 +99,10 @@ def test_camel_to_snake() -> None:
     assert camel_to_snake("IPV6Address") == "ipv6_address"
     assert camel_to_snake("noChange") == "no_change"
     assert camel_to_snake("") == ""
+
+
+def test_size_to_bytes() -> None:
+    assert size_to_bytes("512Mi") == 512 * 1024 * 1024
+    assert size_to_bytes("100Gi") == 100 * 1024 * 1024 * 1024
+    with pytest.raises(ValueError):
+        size_to_bytes("100G")